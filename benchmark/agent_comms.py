@@ -0,0 +1,154 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import threading
+import time
+
+import mock
+from django.test.client import Client
+from django.test.simple import DjangoTestSuiteRunner
+
+from chroma_agent_comms.views import MessageView, ValidatedClientView
+from chroma_core.models import ManagedHost
+from chroma_core.services.http_agent.host_state import HostStateCollection
+from chroma_core.services.http_agent.queues import HostQueueCollection
+from chroma_core.services.http_agent.sessions import SessionCollection
+from iml_common.lib.date_time import IMLDateTime
+from benchmark.generic import GenericBenchmark
+
+
+class Benchmark(GenericBenchmark):
+    """Simulate a fleet of agents long-polling MessageView.get through Django's test client.
+
+    Two phases are timed:
+     * backlog: every host has a backlog of messages queued, and each agent GETs until
+       its backlog is drained (shows the effect of the per-response limits)
+     * long poll: every agent has a GET waiting when one message per host is sent
+       (shows how quickly waiting GETs are woken)
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+        self.test_runner = DjangoTestSuiteRunner()
+        self.prepare()
+
+    def prepare(self):
+        from south.management.commands import patch_for_test_db_setup
+
+        self.test_runner.setup_test_environment()
+        patch_for_test_db_setup()
+        self.old_db_config = self.test_runner.setup_databases()
+
+        self.fqdns = ["agent%04d.mycompany.com" % i for i in range(0, self.options["agents"])]
+        for fqdn in self.fqdns:
+            ManagedHost.objects.create(address=fqdn, fqdn=fqdn, nodename=fqdn)
+
+        self.patches = [
+            mock.patch("chroma_core.models.HostContactAlert.notify"),
+            mock.patch("chroma_core.services.job_scheduler.job_scheduler_notify.notify"),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+        MessageView.queues = HostQueueCollection()
+        MessageView.sessions = SessionCollection(MessageView.queues)
+        MessageView.hosts = HostStateCollection()
+        ValidatedClientView.valid_certs = dict((fqdn, fqdn) for fqdn in self.fqdns)
+
+        now = IMLDateTime.utcnow().isoformat()
+        self.params = {"server_boot_time": now, "client_start_time": now}
+
+        # First contact resets the agent's sessions: get that out of the way
+        with mock.patch.object(MessageView, "LONG_POLL_TIMEOUT", 0):
+            for fqdn in self.fqdns:
+                self._get(Client(), fqdn)
+
+    def _get(self, client, fqdn):
+        response = client.get(
+            "/agent/message/", self.params, HTTP_X_SSL_CLIENT_SERIAL=fqdn, HTTP_X_SSL_CLIENT_NAME=fqdn
+        )
+        assert response.status_code == 200
+        return response
+
+    def _message(self, fqdn, seq):
+        return {
+            "fqdn": fqdn,
+            "type": "DATA",
+            "plugin": "benchmark",
+            "session_id": None,
+            "session_seq": seq,
+            "body": "x" * self.options["message_size"],
+        }
+
+    def run_backlog(self):
+        for fqdn in self.fqdns:
+            for seq in range(0, self.options["backlog"]):
+                MessageView.queues.send(self._message(fqdn, seq))
+
+        client = Client()
+        requests = 0
+        largest_response = 0
+        start = time.time()
+        for fqdn in self.fqdns:
+            while len(MessageView.queues.get(fqdn).tx):
+                response = self._get(client, fqdn)
+                requests += 1
+                largest_response = max(largest_response, len(response.content))
+        elapsed = time.time() - start
+
+        print(
+            "backlog: %d messages of %d bytes per agent drained in %d GETs, %.2fs (%.1f GETs/s), largest response %d bytes"
+            % (
+                self.options["backlog"],
+                self.options["message_size"],
+                requests,
+                elapsed,
+                requests / elapsed,
+                largest_response,
+            )
+        )
+
+    def run_long_poll(self):
+        latencies = []
+        lock = threading.Lock()
+        sent_at = {}
+
+        def agent(fqdn):
+            self._get(Client(), fqdn)
+            with lock:
+                latencies.append(time.time() - sent_at[fqdn])
+
+        threads = [threading.Thread(target=agent, args=(fqdn,)) for fqdn in self.fqdns]
+        for thread in threads:
+            thread.start()
+
+        # Give the GETs a chance to start waiting
+        time.sleep(self.options["settle"])
+
+        start = time.time()
+        for fqdn in self.fqdns:
+            sent_at[fqdn] = time.time()
+            MessageView.queues.send(self._message(fqdn, 0))
+
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+
+        latencies.sort()
+        print(
+            "long poll: %d waiting agents served in %.2fs, latency median %.3fs, max %.3fs"
+            % (len(latencies), elapsed, latencies[len(latencies) / 2], latencies[-1])
+        )
+
+    def run(self):
+        self.run_backlog()
+        self.run_long_poll()
+
+    def cleanup(self):
+        for patch in self.patches:
+            patch.stop()
+
+        self.test_runner.teardown_databases(self.old_db_config)
+        self.test_runner.teardown_test_environment()
@@ -0,0 +1,79 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import logging
+import os
+import time
+
+from chroma_core.services.log import LogPreview, SampledLog
+from benchmark.generic import GenericBenchmark
+
+
+class Benchmark(GenericBenchmark):
+    """Compare the CPU cost of logging agent message payloads by formatting them eagerly
+    with the cost of the deferred, truncated and sampled logging used on the agent comms path.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+
+        self.log = logging.getLogger("benchmark_comms_logging")
+        self.log.propagate = False
+        # A handler which formats records, as a real log file's would
+        self.log.addHandler(logging.StreamHandler(open(os.devnull, "w")))
+
+        self.body = {
+            "messages": [
+                {
+                    "fqdn": "oss1.mycompany.com",
+                    "type": "DATA",
+                    "plugin": "linux",
+                    "session_id": "2cda7d7a-2c4a-4c35-9b54-4d4ab87e6c7f",
+                    "session_seq": 1,
+                    "body": {
+                        "devs": dict(
+                            (
+                                "/dev/disk/by-id/scsi-%08d" % i,
+                                {
+                                    "major_minor": "8:%d" % i,
+                                    "size": 1099511627776,
+                                    "serial_80": "SATA_DISK%08d" % i,
+                                    "filesystem_type": None,
+                                    "parent": None,
+                                },
+                            )
+                            for i in range(0, self.options["devices"])
+                        )
+                    },
+                }
+            ]
+        }
+
+    def _time(self, fn):
+        start = time.time()
+        for i in range(0, self.options["iterations"]):
+            fn()
+        return (time.time() - start) / self.options["iterations"]
+
+    def run(self):
+        fqdn = "oss1.mycompany.com"
+        messages = self.body["messages"]
+        comms_log = SampledLog(self.log, self.options["sample_rate"])
+
+        def eager():
+            self.log.debug("MessageView.post: %s %s messages: %s" % (fqdn, len(messages), self.body))
+
+        def deferred():
+            comms_log.debug(fqdn, "MessageView.post: %s %s messages: %s", fqdn, len(messages), LogPreview(self.body))
+
+        print("%d devices per message, %d iterations" % (self.options["devices"], self.options["iterations"]))
+        for level, description in [(logging.INFO, "debug disabled"), (logging.DEBUG, "debug enabled")]:
+            self.log.setLevel(level)
+            eager_time = self._time(eager)
+            deferred_time = self._time(deferred)
+            print(
+                "%s: eager %.1fus, deferred %.1fus per message (%.0fx)"
+                % (description, eager_time * 1e6, deferred_time * 1e6, eager_time / deferred_time)
+            )
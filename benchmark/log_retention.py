@@ -0,0 +1,102 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import datetime
+import tempfile
+import time
+
+from django.test.simple import DjangoTestSuiteRunner
+from django.utils import timezone
+
+from chroma_core.models import LogMessage, LogMessagePartitions, MessageClass
+from benchmark.generic import GenericBenchmark
+
+
+class Benchmark(GenericBenchmark):
+    """Fill the partitioned log store with synthetic messages, then time the log API's common
+    queries and the trimming of the store back down to a retention limit.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+        self.test_runner = DjangoTestSuiteRunner()
+        self.prepare()
+
+    def prepare(self):
+        from south.management.commands import patch_for_test_db_setup
+
+        self.test_runner.setup_test_environment()
+        patch_for_test_db_setup()
+        self.old_db_config = self.test_runner.setup_databases()
+
+        self.partitions = LogMessagePartitions(self.options["partition_size"])
+        self.fqdns = ["oss%d.mycompany.com" % i for i in range(0, self.options["hosts"])]
+        self.start_time = timezone.now() - datetime.timedelta(seconds=self.options["lines"])
+
+    def _batch(self, start):
+        messages = []
+        for i in range(start, min(start + self.options["batch_size"], self.options["lines"])):
+            lustre = i % 10 == 0
+            messages.append(
+                dict(
+                    datetime=self.start_time + datetime.timedelta(seconds=i),
+                    fqdn=self.fqdns[i % len(self.fqdns)],
+                    severity=3,
+                    facility=0,
+                    tag="kernel",
+                    message=("LustreError: synthetic message %d" if lustre else "synthetic message %d") % i,
+                    message_class=MessageClass.LUSTRE_ERROR if lustre else MessageClass.NORMAL,
+                )
+            )
+        return messages
+
+    def _time(self, description, fn):
+        start = time.time()
+        result = fn()
+        print("%s: %.3fs" % (description, time.time() - start))
+        return result
+
+    def run(self):
+        def ingest():
+            for start in range(0, self.options["lines"], self.options["batch_size"]):
+                self.partitions.insert(self._batch(start))
+
+        self._time(
+            "Ingest %d lines into partitions of %d" % (self.options["lines"], self.partitions.partition_size), ingest
+        )
+        print("%d partitions" % len(self.partitions.partitions()))
+
+        # The queries behind the log API's default views
+        middle = self.start_time + datetime.timedelta(seconds=self.options["lines"] / 2)
+        queries = [
+            ("Latest 100 messages", lambda: LogMessage.objects.order_by("-datetime")[0:100]),
+            (
+                "Latest 100 Lustre messages",
+                lambda: LogMessage.objects.filter(
+                    message_class__in=[MessageClass.LUSTRE, MessageClass.LUSTRE_ERROR]
+                ).order_by("-datetime")[0:100],
+            ),
+            (
+                "100 messages from one host in a time range",
+                lambda: LogMessage.objects.filter(
+                    fqdn=self.fqdns[0], datetime__gte=middle, datetime__lt=middle + datetime.timedelta(hours=1)
+                ).order_by("datetime", "fqdn")[0:100],
+            ),
+            (
+                "100 messages after a time",
+                lambda: LogMessage.objects.filter(datetime__gte=middle).order_by("datetime", "fqdn")[0:100],
+            ),
+        ]
+        for description, query in queries:
+            self._time(description, lambda: len(query()))
+
+        keep = self.options["keep"]
+        with tempfile.NamedTemporaryFile() as f:
+            removed = self._time("Trim to %d lines, archiving" % keep, lambda: self.partitions.trim(keep, keep, f))
+        print("Removed %d lines, %d remain" % (removed, self.partitions.row_count))
+
+    def cleanup(self):
+        self.test_runner.teardown_databases(self.old_db_config)
+        self.test_runner.teardown_test_environment()
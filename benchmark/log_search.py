@@ -0,0 +1,120 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import datetime
+import random
+import time
+
+from django.test.simple import DjangoTestSuiteRunner
+from django.utils import timezone
+
+from chroma_core.models import LogMessage, LogMessagePartitions, MessageClass
+from benchmark.generic import GenericBenchmark
+
+
+TEMPLATES = [
+    (MessageClass.LUSTRE, "Lustre: %(target)s: Client %(uuid)s (at %(nid)s) reconnecting"),
+    (MessageClass.LUSTRE, "Lustre: %(target)s: Recovery over after 0:%(n)02d, of %(n)d clients %(n)d recovered"),
+    (
+        MessageClass.LUSTRE_ERROR,
+        "LustreError: %(target)s: haven't heard from client %(uuid)s (at %(nid)s) in 227 "
+        "seconds. I think it's dead, and I am evicting it.",
+    ),
+    (MessageClass.LUSTRE_ERROR, "LustreError: %(n)d:0:(ldlm_lockd.c:%(n)d:ldlm_failed_ast()) ### blocking AST failed"),
+    (MessageClass.LUSTRE_ERROR, "LustreError: %(n)d:0:(osd_handler.c:%(n)d:osd_trans_start()) ASSERTION( 0 ) failed"),
+    (MessageClass.LUSTRE_ERROR, "LustreError: %(n)d:0:(osd_handler.c:%(n)d:osd_trans_start()) LBUG"),
+    (MessageClass.NORMAL, "systemd: Started Session %(n)d of user root."),
+    (MessageClass.NORMAL, "kernel: sd %(n)d:0:0:0: [sdb] Synchronizing SCSI cache"),
+    (MessageClass.NORMAL, "sshd[%(n)d]: Accepted publickey for root from %(address)s port %(n)d ssh2"),
+]
+
+SEARCHES = ["LBUG", "evicting", "testfs-OST0003", "ASSERTION failed", "Synchronizing"]
+
+
+class Benchmark(GenericBenchmark):
+    """Fill the log store with synthetic messages, then time searches for words in messages,
+    using the full text index and using a substring match as the log API used to.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+        self.test_runner = DjangoTestSuiteRunner()
+        self.prepare()
+
+    def prepare(self):
+        from south.management.commands import patch_for_test_db_setup
+
+        self.test_runner.setup_test_environment()
+        patch_for_test_db_setup()
+        self.old_db_config = self.test_runner.setup_databases()
+
+        self.partitions = LogMessagePartitions()
+        self.fqdns = ["oss%d.mycompany.com" % i for i in range(0, self.options["hosts"])]
+        self.start_time = timezone.now() - datetime.timedelta(seconds=self.options["lines"])
+
+        random.seed(0)
+
+    def _message(self, i):
+        message_class, template = random.choice(TEMPLATES)
+        n = random.randint(0, 9999)
+        return (
+            message_class,
+            template
+            % {
+                "target": "testfs-OST%04x" % (n % 32),
+                "uuid": "%08x-%04x" % (n, n),
+                "nid": "10.0.%d.%d@tcp" % (n / 256 % 256, n % 256),
+                "address": "10.0.%d.%d" % (n / 256 % 256, n % 256),
+                "n": n,
+            },
+        )
+
+    def _batch(self, start):
+        messages = []
+        for i in range(start, min(start + self.options["batch_size"], self.options["lines"])):
+            message_class, message = self._message(i)
+            messages.append(
+                dict(
+                    datetime=self.start_time + datetime.timedelta(seconds=i),
+                    fqdn=self.fqdns[i % len(self.fqdns)],
+                    severity=3,
+                    facility=0,
+                    tag="kernel",
+                    message=message,
+                    message_class=message_class,
+                )
+            )
+        return messages
+
+    def _time(self, fn):
+        start = time.time()
+        result = fn()
+        return result, time.time() - start
+
+    def run(self):
+        def ingest():
+            for start in range(0, self.options["lines"], self.options["batch_size"]):
+                self.partitions.insert(self._batch(start))
+
+        _, elapsed = self._time(ingest)
+        print(
+            "Ingest %d lines: %.2fs, %.0f lines/s" % (self.options["lines"], elapsed, self.options["lines"] / elapsed)
+        )
+
+        # As the log API does it: a count for the page's meta, and a page of results
+        limit = self.options["limit"]
+        print("%-20s %10s %12s %12s" % ("Search", "Matches", "Indexed", "Substring"))
+        for search in SEARCHES:
+            searched = LogMessage.search(LogMessage.objects.all(), search)
+            (count, _), indexed = self._time(lambda: (searched.count(), list(searched[0:limit])))
+
+            substring = LogMessage.objects.filter(message__icontains=search).order_by("-datetime")
+            _, unindexed = self._time(lambda: (substring.count(), list(substring[0:limit])))
+
+            print("%-20s %10d %11.3fs %11.3fs" % (search, count, indexed, unindexed))
+
+    def cleanup(self):
+        self.test_runner.teardown_databases(self.old_db_config)
+        self.test_runner.teardown_test_environment()
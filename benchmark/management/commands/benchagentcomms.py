@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from benchmark.agent_comms import Benchmark
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option("--agents", type=int, default=1000, help="number of simulated agents (default: 1000)"),
+        make_option("--backlog", type=int, default=500, help="messages queued per agent (default: 500)"),
+        make_option("--message_size", type=int, default=4096, help="message body size in bytes (default: 4096)"),
+        make_option(
+            "--settle", type=int, default=5, help="seconds to let long-polling GETs start waiting (default: 5)"
+        ),
+    )
+    help = "Benchmark delivery of messages to agents through the long-polling message view"
+
+    def handle(self, *args, **kwargs):
+        bench = Benchmark(*args, **kwargs)
+        bench.run()
+        bench.cleanup()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from benchmark.comms_logging import Benchmark
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option("--devices", type=int, default=1000, help="devices in the simulated payload (default: 1000)"),
+        make_option("--iterations", type=int, default=1000, help="messages logged per measurement (default: 1000)"),
+        make_option("--sample_rate", type=int, default=1, help="log one in this many messages (default: 1)"),
+    )
+    help = "Benchmark the CPU cost of debug logging on the agent comms path"
+
+    def handle(self, *args, **kwargs):
+        bench = Benchmark(*args, **kwargs)
+        bench.run()
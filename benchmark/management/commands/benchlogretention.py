@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+import settings
+from benchmark.log_retention import Benchmark
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option("--lines", type=int, default=10000000, help="number of log lines to store (default: 10000000)"),
+        make_option("--batch_size", type=int, default=10000, help="log lines per insert (default: 10000)"),
+        make_option("--hosts", type=int, default=100, help="number of hosts sending log lines (default: 100)"),
+        make_option(
+            "--partition_size",
+            type=int,
+            default=settings.DBLOG_PARTITION_SIZE,
+            help="log lines per partition (default: %s)" % settings.DBLOG_PARTITION_SIZE,
+        ),
+        make_option(
+            "--keep",
+            type=int,
+            default=settings.DBLOG_LW,
+            help="number of log lines to trim down to (default: %s)" % settings.DBLOG_LW,
+        ),
+    )
+    help = "Benchmark the common log queries and trimming of a large partitioned log store"
+
+    def handle(self, *args, **kwargs):
+        bench = Benchmark(*args, **kwargs)
+        bench.run()
+        bench.cleanup()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from benchmark.log_search import Benchmark
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option("--lines", type=int, default=1000000, help="number of log lines to search (default: 1000000)"),
+        make_option("--batch_size", type=int, default=10000, help="log lines per insert (default: 10000)"),
+        make_option("--hosts", type=int, default=100, help="number of hosts sending log lines (default: 100)"),
+        make_option("--limit", type=int, default=100, help="search results per page (default: 100)"),
+    )
+    help = "Benchmark searching log messages with the full text index, against substring matching"
+
+    def handle(self, *args, **kwargs):
+        bench = Benchmark(*args, **kwargs)
+        bench.run()
+        bench.cleanup()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from benchmark.package_updates import Benchmark
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option("--hosts", type=int, default=500, help="number of hosts sending package reports (default: 500)"),
+        make_option("--packages", type=int, default=30, help="number of packages in the profile (default: 30)"),
+        make_option(
+            "--versions", type=int, default=20, help="number of available versions of each package (default: 20)"
+        ),
+        make_option("--passes", type=int, default=10, help="number of reports from each host (default: 10)"),
+        make_option(
+            "--fresh_index",
+            action="store_true",
+            default=False,
+            help="use a new package update index for every report, for comparison",
+        ),
+    )
+    help = "Benchmark checking the package reports of hosts for available updates"
+
+    def handle(self, *args, **kwargs):
+        bench = Benchmark(*args, **kwargs)
+        bench.run()
+        bench.cleanup()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from benchmark.resource_persist import Benchmark
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option("--hosts", type=int, default=8, help="number of hosts opening a session (default: 8)"),
+        make_option("--devices", type=int, default=1000, help="number of devices shared by the hosts (default: 1000)"),
+    )
+    help = "Benchmark persisting the resources of new storage plugin sessions"
+
+    def handle(self, *args, **kwargs):
+        bench = Benchmark(*args, **kwargs)
+        bench.run()
+        bench.cleanup()
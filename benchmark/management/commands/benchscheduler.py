@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from benchmark.scheduler import Benchmark
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option("--jobs", type=int, default=1000, help="number of runnable jobs (default: 1000)"),
+        make_option("--hosts", type=int, default=100, help="number of hosts the jobs act on (default: 100)"),
+        make_option("--passes", type=int, default=10, help="number of scheduling passes (default: 10)"),
+        make_option(
+            "--fresh_cache",
+            action="store_true",
+            default=False,
+            help="use a new dependency cache for every pass, for comparison",
+        ),
+    )
+    help = "Benchmark the job scheduler's dependency checking of runnable jobs"
+
+    def handle(self, *args, **kwargs):
+        bench = Benchmark(*args, **kwargs)
+        bench.run()
+        bench.cleanup()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from benchmark.state_routes import Benchmark
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option("--compiles", type=int, default=10, help="number of times to compile the tables (default: 10)"),
+        make_option(
+            "--iterations", type=int, default=1000, help="lookups of every pair of states per class (default: 1000)"
+        ),
+    )
+    help = "Benchmark compiling and looking up the state transition route tables of every StatefulObject class"
+
+    def handle(self, *args, **kwargs):
+        bench = Benchmark(*args, **kwargs)
+        bench.run()
+        bench.cleanup()
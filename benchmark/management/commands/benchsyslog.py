@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from benchmark.syslog import Benchmark
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option("--batches", type=int, default=100, help="number of batches of log lines (default: 100)"),
+        make_option("--batch_size", type=int, default=1000, help="log lines per batch (default: 1000)"),
+        make_option(
+            "--log_file",
+            type=str,
+            default=None,
+            help="file of recorded log messages, one per line (default: benchmark/samples/lustre_syslog.log)",
+        ),
+    )
+    help = "Benchmark ingest of log messages by the systemd_journal service"
+
+    def handle(self, *args, **kwargs):
+        bench = Benchmark(*args, **kwargs)
+        bench.run()
+        bench.cleanup()
@@ -0,0 +1,117 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import time
+
+import mock
+from django.db import connection
+from django.test.simple import DjangoTestSuiteRunner
+from django.test.utils import CaptureQueriesContext
+
+from chroma_core.models import Bundle, ManagedHost, ServerProfile, ServerProfilePackage
+from chroma_core.services.lustre_audit.package_index import PackageUpdateIndex
+from chroma_core.services.lustre_audit.update_scan import UpdateScan
+from benchmark.generic import GenericBenchmark
+
+
+class Benchmark(GenericBenchmark):
+    """Time UpdateScan.update_packages for package reports from a large number of hosts.
+
+    The hosts share a server profile and repos, and half of them are a version behind,
+    so there are two distinct reports between them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+        self.test_runner = DjangoTestSuiteRunner()
+        self.prepare()
+
+    def prepare(self):
+        from south.management.commands import patch_for_test_db_setup
+
+        self.test_runner.setup_test_environment()
+        patch_for_test_db_setup()
+        self.old_db_config = self.test_runner.setup_databases()
+
+        Bundle.objects.create(bundle_name="bench", location="/tmp/", description="Benchmark Bundle")
+        profile = ServerProfile.objects.create(
+            name="bench", ui_name="Benchmark", ui_description="Benchmark", managed=False, initial_state="monitored"
+        )
+        package_names = ["package%03d" % i for i in range(0, self.options["packages"])]
+        for package_name in package_names:
+            ServerProfilePackage.objects.create(bundle_id="bench", server_profile=profile, package_name=package_name)
+
+        self.hosts = []
+        for i in range(0, self.options["hosts"]):
+            address = "bench%03d" % i
+            self.hosts.append(
+                ManagedHost.objects.create(
+                    address=address, fqdn=address, nodename=address, server_profile=profile, immutable_state=True
+                )
+            )
+
+        def report(installed_version):
+            available = [["0", "1.%d" % v, "1", "x86_64"] for v in range(0, self.options["versions"])]
+            return {
+                "bench": dict(
+                    (
+                        package_name,
+                        {"installed": [["0", "1.%d" % installed_version, "1", "x86_64"]], "available": available},
+                    )
+                    for package_name in package_names
+                )
+            }
+
+        self.reports = [report(self.options["versions"] - 1), report(self.options["versions"] - 2)]
+
+    def run(self):
+        def notify(host, started_at, update_attrs):
+            # As the job scheduler would
+            for attr, value in update_attrs.items():
+                setattr(host, attr, value)
+
+        timings = []
+        query_counts = []
+        notifications = []
+
+        index = PackageUpdateIndex()
+        with mock.patch("chroma_core.services.job_scheduler.job_scheduler_notify.notify", side_effect=notify) as m:
+            for i in range(0, self.options["passes"]):
+                m.reset_mock()
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.time()
+                    for n, host in enumerate(self.hosts):
+                        scan = UpdateScan(None if self.options["fresh_index"] else index)
+                        scan.host = host
+                        scan.started_at = None
+                        scan.update_packages(self.reports[n % 2])
+                    timings.append(time.time() - start)
+                query_counts.append(len(queries))
+                notifications.append(m.call_count)
+
+        print(
+            "%d hosts, %d packages, %d available versions, %d passes (%s index)"
+            % (
+                len(self.hosts),
+                self.options["packages"],
+                self.options["versions"],
+                self.options["passes"],
+                "fresh" if self.options["fresh_index"] else "persistent",
+            )
+        )
+        print("first pass: %.3fs, %d queries, %d notifications" % (timings[0], query_counts[0], notifications[0]))
+        if len(timings) > 1:
+            print(
+                "later passes: mean %.3fs, mean %d queries, mean %d notifications"
+                % (
+                    sum(timings[1:]) / (len(timings) - 1),
+                    sum(query_counts[1:]) / (len(query_counts) - 1),
+                    sum(notifications[1:]) / (len(notifications) - 1),
+                )
+            )
+
+    def cleanup(self):
+        self.test_runner.teardown_databases(self.old_db_config)
+        self.test_runner.teardown_test_environment()
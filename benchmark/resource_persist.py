@@ -0,0 +1,90 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import time
+
+from django.db import connection
+from django.test.simple import DjangoTestSuiteRunner
+from django.test.utils import CaptureQueriesContext
+
+from chroma_core.models import ManagedHost, StorageResourceRecord
+from benchmark.generic import GenericBenchmark
+
+
+class Benchmark(GenericBenchmark):
+    """Time the resource manager persisting the resources of a linux plugin session.
+
+    Every host reports the same shared devices, each with a device node of its own, so
+    the first session creates the device records and the rest find them and only add
+    their own nodes and reported_by links.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+        self.test_runner = DjangoTestSuiteRunner()
+        self.prepare()
+
+    def prepare(self):
+        from south.management.commands import patch_for_test_db_setup
+        from chroma_core.lib.storage_plugin.manager import storage_plugin_manager
+        from chroma_core.services.plugin_runner.resource_manager import ResourceManager
+
+        self.test_runner.setup_test_environment()
+        patch_for_test_db_setup()
+        self.old_db_config = self.test_runner.setup_databases()
+
+        self.hosts = []
+        for i in range(0, self.options["hosts"]):
+            address = "bench%03d" % i
+            self.hosts.append(ManagedHost.objects.create(address=address, fqdn=address, nodename=address))
+
+        self.resource_manager = ResourceManager()
+        self.plugin_klass = storage_plugin_manager.get_plugin_class("linux")
+        self.root_class, self.root_class_id = storage_plugin_manager.get_plugin_resource_class(
+            "linux", "PluginAgentResources"
+        )
+        self.device_class, self.device_class_id = storage_plugin_manager.get_plugin_resource_class(
+            "linux", "ScsiDevice"
+        )
+        self.node_class, _ = storage_plugin_manager.get_plugin_resource_class("linux", "LinuxDeviceNode")
+
+    def _populate(self, plugin, host_id):
+        for i in range(0, self.options["devices"]):
+            device, created = plugin.update_or_create(self.device_class, serial="bench%06d" % i, size=1024 * 1024)
+            plugin.update_or_create(
+                self.node_class, parents=[device], logical_drive=device, host_id=host_id, path="/dev/bench%06d" % i
+            )
+
+    def run(self):
+        timings = []
+        query_counts = []
+
+        for host in self.hosts:
+            record, created = StorageResourceRecord.get_or_create_root(
+                self.root_class, self.root_class_id, {"plugin_name": "linux", "host_id": host.id}
+            )
+            plugin = self.plugin_klass(self.resource_manager, record.id)
+
+            with CaptureQueriesContext(connection) as queries:
+                start = time.time()
+                plugin._initial_populate(self._populate, plugin, host.id)
+                timings.append(time.time() - start)
+            query_counts.append(len(queries))
+
+        assert (
+            StorageResourceRecord.objects.filter(resource_class=self.device_class_id).count() == self.options["devices"]
+        )
+
+        print("%d hosts, %d shared devices" % (self.options["hosts"], self.options["devices"]))
+        print("first session: %.3fs, %d queries" % (timings[0], query_counts[0]))
+        if len(timings) > 1:
+            print(
+                "later sessions: mean %.3fs, mean %d queries"
+                % (sum(timings[1:]) / (len(timings) - 1), sum(query_counts[1:]) / (len(query_counts) - 1))
+            )
+
+    def cleanup(self):
+        self.test_runner.teardown_databases(self.old_db_config)
+        self.test_runner.teardown_test_environment()
@@ -0,0 +1,96 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import time
+
+import mock
+from django.db import connection
+from django.test.simple import DjangoTestSuiteRunner
+from django.test.utils import CaptureQueriesContext
+
+from chroma_core.lib.cache import ObjectCache
+from chroma_core.models import Command, DeployHostJob, ManagedHost
+from chroma_core.services.job_scheduler.dep_cache import DepCache
+from chroma_core.services.job_scheduler.job_scheduler import JobScheduler
+from benchmark.generic import GenericBenchmark
+
+
+class Benchmark(GenericBenchmark):
+    """Time JobScheduler._run_next with a large number of runnable jobs.
+
+    The same jobs are returned to 'pending' after each pass, so every pass
+    checks the dependencies of every job, as happens when a large command is
+    waiting to run and notifications keep the scheduler busy.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+        self.test_runner = DjangoTestSuiteRunner()
+        self.prepare()
+
+    def prepare(self):
+        from south.management.commands import patch_for_test_db_setup
+
+        self.test_runner.setup_test_environment()
+        patch_for_test_db_setup()
+        self.old_db_config = self.test_runner.setup_databases()
+
+        hosts = []
+        for i in range(0, self.options["hosts"]):
+            address = "bench%03d" % i
+            hosts.append(
+                ManagedHost.objects.create(address=address, fqdn=address, nodename=address, state="undeployed")
+            )
+
+        ObjectCache.clear()
+        self.job_scheduler = JobScheduler()
+        self.job_scheduler._spawn_job = mock.Mock()
+
+        command = Command.objects.create(message="Benchmark")
+        self.jobs = [
+            DeployHostJob.objects.create(
+                managed_host=hosts[i % len(hosts)], old_state="undeployed", wait_for_json="[]", locks_json="[]"
+            )
+            for i in range(0, self.options["jobs"])
+        ]
+        self.job_scheduler._job_collection.add_command(command, self.jobs)
+
+    def run(self):
+        timings = []
+        query_counts = []
+
+        with mock.patch.object(DeployHostJob, "get_steps", return_value=[]):
+            for i in range(0, self.options["passes"]):
+                if self.options["fresh_cache"]:
+                    self.job_scheduler._dep_cache = DepCache()
+
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.time()
+                    self.job_scheduler._run_next()
+                    timings.append(time.time() - start)
+                query_counts.append(len(queries))
+
+                assert self.job_scheduler._spawn_job.call_count == len(self.jobs) * (i + 1)
+                self.job_scheduler._job_collection.update_many(self.jobs, "pending")
+
+        print(
+            "%d jobs on %d hosts, %d passes (%s dependency cache)"
+            % (
+                len(self.jobs),
+                self.options["hosts"],
+                self.options["passes"],
+                "fresh" if self.options["fresh_cache"] else "persistent",
+            )
+        )
+        print("first pass: %.3fs, %d queries" % (timings[0], query_counts[0]))
+        if len(timings) > 1:
+            print(
+                "later passes: mean %.3fs, mean %d queries"
+                % (sum(timings[1:]) / (len(timings) - 1), sum(query_counts[1:]) / (len(query_counts) - 1))
+            )
+
+    def cleanup(self):
+        self.test_runner.teardown_databases(self.old_db_config)
+        self.test_runner.teardown_test_environment()
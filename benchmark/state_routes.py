@@ -0,0 +1,65 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import time
+
+from chroma_core.lib.util import all_subclasses
+from chroma_core.models import StatefulObject
+from benchmark.generic import GenericBenchmark
+
+
+class Benchmark(GenericBenchmark):
+    """Time compiling the state graph of every StatefulObject subclass into route tables, and
+    looking up the available states, routes and route jobs between every pair of states.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+        self.classes = [
+            klass for klass in all_subclasses(StatefulObject) if not klass._meta.abstract and klass.states is not None
+        ]
+        self.roots = set(StatefulObject.so_root(klass) for klass in self.classes)
+
+    def _compile(self):
+        for root in self.roots:
+            root.route_table = None
+
+        start = time.time()
+        StatefulObject.build_route_tables()
+        return time.time() - start
+
+    def _lookup(self, klass):
+        lookups = 0
+        for begin_state in klass.states:
+            for end_state in klass.states:
+                if klass.can_reach(begin_state, end_state):
+                    klass.get_route(begin_state, end_state)
+                    klass.get_route_job_classes(begin_state, end_state)
+                lookups += 1
+            klass.route_table.available_states(begin_state)
+
+        return lookups
+
+    def run(self):
+        compile_times = [self._compile() for i in range(0, self.options["compiles"])]
+
+        print(
+            "compiled %d state graphs for %d classes: mean %.3fms"
+            % (len(self.roots), len(self.classes), 1000 * sum(compile_times) / len(compile_times))
+        )
+
+        for klass in sorted(self.classes, key=lambda klass: klass.__name__):
+            start = time.time()
+            for i in range(0, self.options["iterations"]):
+                lookups = self._lookup(klass)
+            elapsed = time.time() - start
+
+            print(
+                "%-32s %2d states: %.2fus per state pair"
+                % (klass.__name__, len(klass.states), 1000000 * elapsed / (lookups * self.options["iterations"]))
+            )
+
+    def cleanup(self):
+        pass
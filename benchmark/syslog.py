@@ -0,0 +1,82 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import os
+import time
+
+import mock
+from django.test.simple import DjangoTestSuiteRunner
+
+from chroma_core.models import ManagedHost, LogMessage
+from iml_common.lib.date_time import IMLDateTime
+from benchmark.generic import GenericBenchmark
+
+
+SAMPLE_LOG = os.path.join(os.path.dirname(__file__), "samples", "lustre_syslog.log")
+
+
+class Benchmark(GenericBenchmark):
+    """Replay recorded log lines through the systemd_journal service's on_data, as if
+    received from an agent, and report the ingest rate.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+        self.test_runner = DjangoTestSuiteRunner()
+        self.prepare()
+
+    def prepare(self):
+        from south.management.commands import patch_for_test_db_setup
+
+        self.test_runner.setup_test_environment()
+        patch_for_test_db_setup()
+        self.old_db_config = self.test_runner.setup_databases()
+
+        self.fqdn = "oss1.mycompany.com"
+        ManagedHost.objects.create(address=self.fqdn, fqdn=self.fqdn, nodename=self.fqdn)
+
+        with open(self.options["log_file"] or SAMPLE_LOG) as f:
+            self.samples = [line.rstrip("\n") for line in f if line.strip()]
+
+        # The service's AMQP queue isn't used: messages are passed straight to on_data
+        from chroma_core.services.syslog import Service
+
+        with mock.patch("chroma_core.services.syslog.AgentRxQueue"):
+            self.service = Service()
+
+    def _batch(self, start):
+        now = IMLDateTime.utcnow().isoformat()
+        return {
+            "log_lines": [
+                {
+                    "message": self.samples[(start + i) % len(self.samples)],
+                    "severity": 3,
+                    "facility": 0,
+                    "source": "kernel",
+                    "datetime": now,
+                }
+                for i in range(0, self.options["batch_size"])
+            ]
+        }
+
+    def run(self):
+        batches = [self._batch(i * self.options["batch_size"]) for i in range(0, self.options["batches"])]
+        line_count = self.options["batch_size"] * self.options["batches"]
+
+        start = time.time()
+        for batch in batches:
+            self.service.on_data(self.fqdn, batch)
+        elapsed = time.time() - start
+
+        assert LogMessage.objects.count() == line_count
+
+        print(
+            "%d lines (%d samples) in batches of %d: %.2fs, %.0f lines/s"
+            % (line_count, len(self.samples), self.options["batch_size"], elapsed, line_count / elapsed)
+        )
+
+    def cleanup(self):
+        self.test_runner.teardown_databases(self.old_db_config)
+        self.test_runner.teardown_test_environment()
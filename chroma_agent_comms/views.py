@@ -3,7 +3,6 @@
 # license that can be found in the LICENSE file.
 
 
-import Queue
 import json
 import traceback
 import time
@@ -22,6 +21,7 @@ from chroma_core.models.copytool import Copytool, CopytoolEvent, CopytoolOperati
 from chroma_core.models.log import LogMessage, MessageClass
 from chroma_core.models.utils import Version
 from chroma_core.services import log_register
+from chroma_core.services.log import LogPreview, SampledLog
 from chroma_core.services.crypto import Crypto
 from iml_common.lib.date_time import IMLDateTime
 
@@ -30,6 +30,9 @@ import logging
 
 log.setLevel(logging.WARN)
 
+# For debug messages about every message to or from an agent
+comms_log = SampledLog(log, settings.AGENT_COMMS_LOG_SAMPLE_RATE)
+
 
 def log_exception(f):
     @wraps(f)
@@ -68,7 +71,7 @@ class CopytoolEventView(ValidatedClientView):
             copytool_log.error("Invalid client: %s" % request.META)
             return HttpForbidden()
 
-        copytool_log.debug("Incoming payload: %s" % body)
+        copytool_log.debug("Incoming payload: %s", LogPreview(body))
         try:
             copytool = Copytool.objects.select_related().get(id=body["copytool"])
             events = [CopytoolEvent(**e) for e in body["events"]]
@@ -77,7 +80,7 @@ class CopytoolEventView(ValidatedClientView):
         except Copytool.DoesNotExist:
             return HttpResponseBadRequest("Unknown copytool: %s" % body["copytool"])
 
-        copytool_log.debug("Received %d events from %s on %s" % (len(events), copytool, copytool.host))
+        copytool_log.debug("Received %d events from %s on %s", len(events), copytool, copytool.host)
 
         from chroma_core.services.job_scheduler.job_scheduler_client import JobSchedulerClient
 
@@ -182,7 +185,7 @@ class MessageView(ValidatedClientView):
             if message["fqdn"] != fqdn:
                 return HttpResponseBadRequest("Incorrect client name")
 
-        log.debug("MessageView.post: %s %s messages: %s" % (fqdn, len(messages), body))
+        comms_log.debug(fqdn, "MessageView.post: %s %s messages: %s", fqdn, len(messages), LogPreview(body))
         for message in messages:
             if message["type"] == "DATA":
                 try:
@@ -203,9 +206,13 @@ class MessageView(ValidatedClientView):
                         }
                     )
                 else:
-                    log.debug(
-                        "Forwarding valid message %s/%s/%s-%s"
-                        % (fqdn, message["plugin"], message["session_id"], message["session_seq"])
+                    comms_log.debug(
+                        fqdn,
+                        "Forwarding valid message %s/%s/%s-%s",
+                        fqdn,
+                        message["plugin"],
+                        message["session_id"],
+                        message["session_seq"],
                     )
                     self.queues.receive(message)
 
@@ -218,8 +225,9 @@ class MessageView(ValidatedClientView):
                 # from this point onwards go to the new agent and not any GET handlers that haven't
                 # caught up yet.  Achive this by sending a barrier message with the agent start time, such
                 # that any GET handler receiving the barrier which has a different agent start time will
-                # detach itself from the TX queue.  NB the barrier only works because there's also a lock,
-                # so if there was a zombie GET, it will be holding the lock and receive the barrier.
+                # detach itself from the TX queue.  NB the barrier only works because the TX queue serves
+                # one GET at a time, so if there was a zombie GET, it will either have been detached by a
+                # newer GET or receive the barrier.
 
                 self.queues.send({"fqdn": fqdn, "type": "TX_BARRIER", "client_start_time": body["client_start_time"]})
 
@@ -237,6 +245,10 @@ class MessageView(ValidatedClientView):
         return HttpResponse()
 
     def _filter_valid_messages(self, fqdn, messages):
+        """Drop messages for sessions which are no longer current
+
+        :param messages: A list of (message, JSON encoded message) tuples
+        """
         plugin_to_session_id = {}
 
         def is_valid(message):
@@ -249,14 +261,17 @@ class MessageView(ValidatedClientView):
                     plugin_to_session_id[message["plugin"]] = session_id = None
 
             if message["session_id"] != session_id:
-                log.debug(
-                    "Dropping message because it has stale session id (current is %s): %s" % (session_id, message)
+                comms_log.debug(
+                    fqdn,
+                    "Dropping message because it has stale session id (current is %s): %s",
+                    session_id,
+                    LogPreview(message),
                 )
                 return False
 
             return True
 
-        return [m for m in messages if is_valid(m)]
+        return [(message, encoded) for message, encoded in messages if is_valid(message)]
 
     @log_exception
     def get(self, request):
@@ -296,49 +311,33 @@ class MessageView(ValidatedClientView):
                 }
             )
 
-        log.debug("MessageView.get: composing messages for %s" % fqdn)
+        comms_log.debug(fqdn, "MessageView.get: composing messages for %s", fqdn)
         queues = self.queues.get(fqdn)
 
-        # If this handler is sitting on the TX queue, draining messages, then
+        # If this handler is sitting on the TX queue, waiting for messages, then
         # when a new session starts, *before* sending any TX messages, we have to
         # make sure it has been disconnected, to avoid the TX messages being sent
-        # to an 'old' session (old session meaning TCP connection from a now-dead agent)
-
-        with queues.tx_lock:
-            try:
-                first_message = queues.tx.get(block=True, timeout=self.LONG_POLL_TIMEOUT)
-                if first_message["type"] == "TX_BARRIER":
-                    if first_message["client_start_time"] != request.GET["client_start_time"]:
-                        log.warning(
-                            "Cancelling GET due to barrier %s %s"
-                            % (first_message["client_start_time"], request.GET["client_start_time"])
-                        )
-                        return HttpResponse(json.dumps({"messages": []}), mimetype="application/json")
-                else:
-                    messages.append(first_message)
-            except Queue.Empty:
-                pass
-            else:
-                # TODO: limit number of messages per response
-                while True:
-                    try:
-                        message = queues.tx.get(block=False)
-                        if message["type"] == "TX_BARRIER":
-                            if message["client_start_time"] != request.GET["client_start_time"]:
-                                log.warning(
-                                    "Cancelling GET due to barrier %s %s"
-                                    % (message["client_start_time"], request.GET["client_start_time"])
-                                )
-                                return HttpResponse(json.dumps({"messages": []}), mimetype="application/json")
-                        else:
-                            messages.append(message)
-                    except Queue.Empty:
-                        break
+        # to an 'old' session (old session meaning TCP connection from a now-dead agent):
+        # the TX queue only serves the latest GET for a host, and cancels a GET when it
+        # reaches the TX_BARRIER for a different agent instance.
+        tx_messages = queues.tx.get(
+            request.GET["client_start_time"],
+            self.LONG_POLL_TIMEOUT,
+            settings.AGENT_TX_MAX_MESSAGES,
+            settings.AGENT_TX_MAX_BYTES,
+        )
+        if tx_messages is None:
+            return HttpResponse(json.dumps({"messages": []}), mimetype="application/json")
 
+        messages = [(message, json.dumps(message)) for message in messages] + tx_messages
         messages = self._filter_valid_messages(fqdn, messages)
 
-        log.debug("MessageView.get: responding to %s with %s messages (%s)" % (fqdn, len(messages), client_start_time))
-        return HttpResponse(json.dumps({"messages": messages}), mimetype="application/json")
+        comms_log.debug(
+            fqdn, "MessageView.get: responding to %s with %s messages (%s)", fqdn, len(messages), client_start_time
+        )
+        return HttpResponse(
+            '{"messages": [%s]}' % ", ".join(encoded for message, encoded in messages), mimetype="application/json"
+        )
 
 
 def validate_token(key, credits=1):
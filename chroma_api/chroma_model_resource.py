@@ -2,8 +2,12 @@
 # Use of this source code is governed by a MIT-style
 # license that can be found in the LICENSE file.
 
+from django.db.models import Q
+from tastypie.api import url
 from tastypie.exceptions import ImmediateHttpResponse
+from tastypie.http import HttpBadRequest
 from tastypie.resources import ModelResource
+from tastypie.utils import trailing_slash
 from tastypie import fields
 
 from chroma_core.services import log_register
@@ -22,6 +26,106 @@ class ChromaModelResource(ModelResource):
     ALL_FILTER_ENUMERATION = ["exact", "contains", "startswith", "endswith", "in"]
     ALL_FILTER_BOOL = ["exact"]
 
+    # Fields other than the primary key which the resolve/ endpoint matches identifiers against
+    resolve_fields = []
+
+    # A class constructed with a list of objects, which loads what is needed to dehydrate them in
+    # bulk.  If set, a page of objects is dehydrated together, and each bundle's dehydration_context
+    # is the one for its page (or, outside of a list, one for just its object).
+    dehydration_context_class = None
+
+    def base_urls(self):
+        """Add resolve/ to every resource, without depending on subclasses' prepend_urls calling up to us"""
+        return [
+            url(
+                r"^(?P<resource_name>%s)/resolve%s$" % (self._meta.resource_name, trailing_slash()),
+                self.wrap_view("resolve"),
+                name="api_resolve",
+            )
+        ] + super(ChromaModelResource, self).base_urls()
+
+    def resolve(self, request, **kwargs):
+        """
+        POST {"identifiers": [...]} to find the objects which a batch of identifiers (e.g. names given
+        on the command line) refer to, in one query.  Each identifier is matched against the primary key
+        and the resource's resolve_fields.
+
+        Returns {"objects": {identifier: [{"id": ..., "resource_uri": ...}, ...]}}: the list for an
+        identifier is empty if nothing matched, and has more than one entry if it is ambiguous.
+        """
+        self.method_check(request, allowed=["post"])
+        self.is_authenticated(request)
+
+        deserialized = self.deserialize(
+            request, request.body, format=request.META.get("CONTENT_TYPE", "application/json")
+        )
+        identifiers = deserialized.get("identifiers") if isinstance(deserialized, dict) else None
+        if not isinstance(identifiers, list) or not all(isinstance(i, basestring) for i in identifiers):
+            return self.create_response(
+                request, {"identifiers": ["identifiers must be a list of strings"]}, response_class=HttpBadRequest
+            )
+
+        keys = ["pk"] + self.resolve_fields
+        query = Q(pk__in=[int(i) for i in identifiers if i.isdigit() and len(i) < 10])
+        for key in self.resolve_fields:
+            query |= Q(**{"%s__in" % key: identifiers})
+
+        bundle = self.build_bundle(request=request)
+        objects = self.authorized_read_list(self.get_object_list(request).filter(query), bundle)
+
+        matches = dict((identifier, []) for identifier in identifiers)
+        for obj in objects:
+            match = {"id": obj.pk, "resource_uri": self.get_resource_uri(obj)}
+            for value in set(unicode(getattr(obj, key)) for key in keys):
+                if value in matches:
+                    matches[value].append(match)
+
+        return self.create_response(request, {"objects": matches})
+
+    def get_list(self, request, **kwargs):
+        if self.dehydration_context_class is None:
+            return super(ChromaModelResource, self).get_list(request, **kwargs)
+
+        # As tastypie's get_list, but dehydrating the page of objects together
+        base_bundle = self.build_bundle(request=request)
+        objects = self.obj_get_list(bundle=base_bundle, **self.remove_api_resource_names(kwargs))
+        sorted_objects = self.apply_sorting(objects, options=request.GET)
+
+        paginator = self._meta.paginator_class(
+            request.GET,
+            sorted_objects,
+            resource_uri=self.get_resource_uri(),
+            limit=self._meta.limit,
+            max_limit=self._meta.max_limit,
+            collection_name=self._meta.collection_name,
+        )
+        to_be_serialized = paginator.page()
+
+        collection_name = self._meta.collection_name
+        to_be_serialized[collection_name] = self.full_dehydrate_page(
+            request, list(to_be_serialized[collection_name]), for_list=True
+        )
+        to_be_serialized = self.alter_list_data_to_serialize(request, to_be_serialized)
+        return self.create_response(request, to_be_serialized)
+
+    def full_dehydrate_page(self, request, objects, for_list=False):
+        """Dehydrate a list of objects, sharing one dehydration context between them"""
+        context = self.dehydration_context_class(objects)
+
+        bundles = []
+        for obj in objects:
+            bundle = self.build_bundle(obj=obj, request=request)
+            bundle.dehydration_context = context
+            bundles.append(self.full_dehydrate(bundle, for_list=for_list))
+
+        return bundles
+
+    def full_dehydrate(self, bundle, for_list=False):
+        if self.dehydration_context_class is not None and getattr(bundle, "dehydration_context", None) is None:
+            bundle.dehydration_context = self.dehydration_context_class([bundle.obj])
+
+        return super(ChromaModelResource, self).full_dehydrate(bundle, for_list)
+
     # Add the enumeration type to the schema info.
     def build_schema(self):
         """
@@ -4,8 +4,10 @@
 
 
 import json
+import time
 from collections import defaultdict
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from tastypie.validation import Validation
 from tastypie.utils import trailing_slash
@@ -19,6 +21,7 @@ from chroma_api.host import HostResource
 from chroma_api.chroma_model_resource import ChromaModelResource
 
 from chroma_core.models import Command
+from chroma_core.models import Job
 from chroma_core.models import SchedulingError
 from chroma_core.models import StepResult
 from chroma_api.validation_utils import validate
@@ -63,6 +66,11 @@ class CommandResource(ChromaModelResource):
 
     Typically this is used to poll a command for completion and find out whether it
     succeeded.
+
+    Rather than polling, a client may GET ``command/<id>/wait/?timeout=<seconds>``, which
+    returns the command when it completes, when one of its jobs completes, or when the
+    timeout expires, whichever is first.  The response is the command with an extra
+    ``incomplete_jobs`` attribute: the IDs of the command's jobs which are not complete.
     """
 
     jobs = fields.ToManyField("chroma_api.job.JobResource", "jobs", help_text="Jobs belonging to this command")
@@ -75,7 +83,12 @@ class CommandResource(ChromaModelResource):
     def dehydrate_logs(self, bundle):
         command = bundle.obj
         return "\n".join(
-            [stepresult.log for stepresult in StepResult.objects.filter(job__command=command).order_by("modified_at")]
+            [
+                stepresult.get_output("log")
+                for stepresult in StepResult.objects.filter(job__command=command)
+                .order_by("modified_at")
+                .prefetch_related("chunks")
+            ]
         )
 
     class Meta:
@@ -102,7 +115,12 @@ class CommandResource(ChromaModelResource):
                 r"^(?P<resource_name>%s)/dismiss_all%s$" % (self._meta.resource_name, trailing_slash()),
                 self.wrap_view("dismiss_all"),
                 name="api_command_dismiss_all",
-            )
+            ),
+            url(
+                r"^(?P<resource_name>%s)/(?P<pk>\d+)/wait%s$" % (self._meta.resource_name, trailing_slash()),
+                self.wrap_view("wait"),
+                name="api_command_wait",
+            ),
         ]
 
     def dismiss_all(self, request, **kwargs):
@@ -113,6 +131,49 @@ class CommandResource(ChromaModelResource):
 
         return http.HttpNoContent()
 
+    def wait(self, request, **kwargs):
+        """
+        GET parameters:
+        :timeout: Seconds to wait for a change, defaults to 0 (return immediately), and is
+                  limited to settings.COMMAND_WAIT_MAX_TIMEOUT.
+        """
+        if request.method != "GET":
+            return self.create_response(request, "", response_class=http.HttpMethodNotAllowed)
+
+        try:
+            timeout = float(request.GET.get("timeout", 0))
+            if timeout < 0:
+                raise ValueError()
+        except ValueError:
+            return self.create_response(
+                request, {"timeout": ["timeout must be a positive number"]}, response_class=http.HttpBadRequest
+            )
+
+        bundle = self.build_bundle(request=request)
+        command = self.obj_get(bundle, **self.remove_api_resource_names(kwargs))
+        incomplete_jobs = self._incomplete_jobs(command)
+
+        # Poll the database rather than have the client poll us: a query is much cheaper than a request
+        deadline = time.time() + min(timeout, settings.COMMAND_WAIT_MAX_TIMEOUT)
+        while not command.complete and time.time() < deadline:
+            time.sleep(min(settings.COMMAND_WAIT_POLL_INTERVAL, max(deadline - time.time(), 0)))
+
+            command = Command.objects.get(pk=command.pk)
+            latest_incomplete_jobs = self._incomplete_jobs(command)
+            if latest_incomplete_jobs != incomplete_jobs:
+                incomplete_jobs = latest_incomplete_jobs
+                break
+
+        bundle = self.full_dehydrate(self.build_bundle(obj=command, request=request))
+        bundle.data["incomplete_jobs"] = incomplete_jobs
+
+        return self.create_response(request, bundle)
+
+    def _incomplete_jobs(self, command):
+        return list(
+            Job.objects.filter(command=command).exclude(state="complete").order_by("id").values_list("id", flat=True)
+        )
+
     @validate
     def obj_create(self, bundle, **kwargs):
         request = bundle.request
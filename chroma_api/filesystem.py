@@ -21,6 +21,7 @@ from chroma_api.authentication import AnonymousAuthentication
 from chroma_api.utils import custom_response, ConfParamResource, MetricResource, dehydrate_command
 from chroma_api.validation_utils import validate
 from chroma_core.lib import conf_param
+from chroma_core.lib.metrics import FilesystemMetricStore
 
 
 class FilesystemValidation(Validation):
@@ -264,6 +265,24 @@ class FilesystemValidation(Validation):
             return {}
 
 
+class FilesystemDehydrationContext(object):
+    """
+    What FilesystemResource needs to dehydrate a page of filesystems, loaded in bulk: their
+    capacity metrics, fetched for the whole page the first time that they are needed rather
+    than one filesystem and metric at a time.
+    """
+
+    def __init__(self, filesystems):
+        self.filesystems = filesystems
+        self._capacity = None
+
+    def capacity(self, filesystem):
+        if self._capacity is None:
+            self._capacity = FilesystemMetricStore.fetch_capacity(self.filesystems)
+
+        return self._capacity[filesystem.id]
+
+
 class FilesystemResource(MetricResource, ConfParamResource):
     """
     A Lustre file system, associated with exactly one MGT and consisting of
@@ -324,10 +343,12 @@ class FilesystemResource(MetricResource, ConfParamResource):
         help_text="The MGT on which this file system is registered",
     )
 
-    def _get_stat_simple(self, bundle, klass, stat_name, factor=1.0):
+    dehydration_context_class = FilesystemDehydrationContext
+
+    def _get_stat_simple(self, bundle, stat_name, factor=1.0):
         try:
-            return bundle.obj.metrics.fetch_last(klass, fetch_metrics=[stat_name])[1][stat_name] * factor
-        except (KeyError, IndexError, TypeError):
+            return bundle.dehydration_context.capacity(bundle.obj)[stat_name] * factor
+        except (KeyError, TypeError):
             return None
 
     def dehydrate_mount_path(self, bundle):
@@ -341,16 +362,16 @@ class FilesystemResource(MetricResource, ConfParamResource):
             return None
 
     def dehydrate_bytes_free(self, bundle):
-        return self._get_stat_simple(bundle, ManagedOst, "kbytesfree", 1024)
+        return self._get_stat_simple(bundle, "kbytesfree", 1024)
 
     def dehydrate_bytes_total(self, bundle):
-        return self._get_stat_simple(bundle, ManagedOst, "kbytestotal", 1024)
+        return self._get_stat_simple(bundle, "kbytestotal", 1024)
 
     def dehydrate_files_free(self, bundle):
-        return self._get_stat_simple(bundle, ManagedMdt, "filesfree")
+        return self._get_stat_simple(bundle, "filesfree")
 
     def dehydrate_files_total(self, bundle):
-        return self._get_stat_simple(bundle, ManagedMdt, "filestotal")
+        return self._get_stat_simple(bundle, "filestotal")
 
     def get_hsm_control_params(self, mdt, bundle):
         all_params = set(HSM_CONTROL_PARAMS.keys())
@@ -393,11 +414,13 @@ class FilesystemResource(MetricResource, ConfParamResource):
             bundle.data["client_count"] = 0
         else:
             bundle.data["client_count"] = self._get_stat_simple(
-                bundle, ManagedMdt, "client_count", factor=1.0 / len(bundle.data["mdts"])
+                bundle, "client_count", factor=1.0 / len(bundle.data["mdts"])
             )
 
         return bundle
 
+    resolve_fields = ["name"]
+
     class Meta:
         queryset = ManagedFilesystem.objects.all()
         resource_name = "filesystem"
@@ -14,7 +14,7 @@ from chroma_api.validation_utils import validate
 import json
 
 
-from chroma_core.models import ManagedHost, Nid, ManagedFilesystem, ServerProfile, LustreClientMount, Command
+from chroma_core.models import ManagedHost, ManagedFilesystem, ServerProfile, LustreClientMount, Command
 from chroma_core.models import LNetConfiguration, NetworkInterface
 
 from django.shortcuts import get_object_or_404
@@ -163,6 +163,34 @@ class ClientMountResource(ChromaModelResource):
         raise custom_response(self, request, http.HttpAccepted, args)
 
 
+class HostDehydrationContext(object):
+    """
+    What HostResource needs to dehydrate a page of hosts, loaded in bulk: which of them are
+    members of an active filesystem, and their client mounts.
+    """
+
+    def __init__(self, hosts):
+        self.hosts = hosts
+        self._active_filesystem_members = None
+        self._client_mounts = None
+
+    def member_of_active_filesystem(self, host):
+        if self._active_filesystem_members is None:
+            self._active_filesystem_members = ManagedHost.members_of_active_filesystem(self.hosts)
+
+        return host.id in self._active_filesystem_members
+
+    def client_mounts(self, host):
+        if self._client_mounts is None:
+            from chroma_core.lib.cache import ObjectCache
+
+            self._client_mounts = defaultdict(list)
+            for mount in ObjectCache.get(LustreClientMount):
+                self._client_mounts[mount.host_id].append(mount)
+
+        return self._client_mounts[host.id]
+
+
 class HostResource(MetricResource, StatefulModelResource, BulkResourceOperation):
     """
     Represents a Lustre server that is being monitored and managed from the manager server.
@@ -194,26 +222,26 @@ class HostResource(MetricResource, StatefulModelResource, BulkResourceOperation)
     )
 
     def dehydrate_nids(self, bundle):
-        return [n.nid_string for n in Nid.objects.filter(lnet_configuration=bundle.obj.lnet_configuration)]
+        # Prefetched with the page of hosts
+        return [n.nid_string for n in bundle.obj.lnet_configuration.nid_set.all()]
 
     def dehydrate_member_of_active_filesystem(self, bundle):
-        return bundle.obj.member_of_active_filesystem
+        return bundle.dehydration_context.member_of_active_filesystem(bundle.obj)
 
     def dehydrate_client_mounts(self, bundle):
-        from chroma_core.lib.cache import ObjectCache
-        from chroma_core.models import LustreClientMount
-
-        search = lambda cm: cm.host == bundle.obj
-        mounts = ObjectCache.get(LustreClientMount, search)
         return [
             {"filesystem_name": mount.filesystem.name, "mountpoint": mount.mountpoint, "state": mount.state}
-            for mount in mounts
+            for mount in bundle.dehydration_context.client_mounts(bundle.obj)
         ]
 
+    resolve_fields = ["fqdn", "nodename", "address"]
+
+    dehydration_context_class = HostDehydrationContext
+
     class Meta:
-        queryset = ManagedHost.objects.select_related("lnet_configuration").prefetch_related(
-            "lnet_configuration__nid_set"
-        )
+        queryset = ManagedHost.objects.select_related(
+            "lnet_configuration", "server_profile", "_corosync_configuration", "_pacemaker_configuration"
+        ).prefetch_related("lnet_configuration__nid_set__network_interface")
         resource_name = "host"
         excludes = ["not_deleted"]
         authentication = AnonymousAuthentication()
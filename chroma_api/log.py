@@ -3,6 +3,12 @@
 # license that can be found in the LICENSE file.
 
 
+import re
+import time
+from collections import defaultdict
+
+from django.db.models.signals import post_save, post_delete
+
 from chroma_core.lib.util import normalize_nid
 from chroma_api.utils import DateSerializer
 
@@ -10,8 +16,132 @@ from tastypie import fields
 from tastypie.authorization import DjangoAuthorization
 
 from chroma_api.authentication import AnonymousAuthentication
+from chroma_core.models import ManagedHost, ManagedTarget, ManagedMgs, ManagedMdt, ManagedOst, NetworkInterface, Nid
 from chroma_core.models.log import LogMessage, MessageClass
 from chroma_api.chroma_model_resource import ChromaModelResource
+import settings
+
+
+# TODO: detect other NID types (cray?)
+_nid_regex = re.compile("(\d{1,3}\.){3}\d{1,3}@(tcp|ib)(_\d+)?")
+_target_regex = re.compile("[^\w](\w{1,8}-(MDT|OST)[\da-f]{4})")
+
+
+class LogLinkResolver(object):
+    """
+    Resolve the NIDs and target names in log messages to the hosts and targets which
+    they should link to.
+
+    All the NIDs and target names in a page of messages are resolved together, with one
+    query for hosts and one for targets.  The results (including NIDs and names which
+    could not be resolved) are kept for later pages, until a host, network interface,
+    NID or target is saved or deleted in this process, or for at most
+    settings.LOG_LINK_CACHE_TIMEOUT seconds, to pick up changes made by other processes.
+    """
+
+    def __init__(self):
+        self.clear()
+
+        # Connected for each class rather than for all senders, so as not to slow down deletion of other models
+        for sender in [ManagedHost, NetworkInterface, Nid, ManagedTarget, ManagedMgs, ManagedMdt, ManagedOst]:
+            post_save.connect(self._model_changed, sender=sender, weak=False)
+            post_delete.connect(self._model_changed, sender=sender, weak=False)
+
+    def clear(self):
+        # NID string -> ManagedHost, target name -> ManagedTarget, or None if it can't be resolved
+        self._hosts = {}
+        self._targets = {}
+        self._expires = time.time() + settings.LOG_LINK_CACHE_TIMEOUT
+
+    def _model_changed(self, sender, **kwargs):
+        self.clear()
+
+    def substitutions(self, messages):
+        """
+        :param messages: A list of log message strings
+        :return: A list of the substitutions for each message, in the same order
+        """
+        from chroma_api.urls import api
+
+        if time.time() > self._expires:
+            self.clear()
+        hosts, targets = self._hosts, self._targets
+
+        message_matches = []
+        nids, names = set(), set()
+        for message in messages:
+            nid_matches = [(normalize_nid(match.group(0)), match) for match in _nid_regex.finditer(message)]
+            target_matches = [(match.group(1), match) for match in _target_regex.finditer(message)]
+            message_matches.append((nid_matches, target_matches))
+            nids.update(nid for nid, match in nid_matches)
+            names.update(name for name, match in target_matches)
+
+        if nids - set(hosts):
+            self._resolve_nids(hosts, nids - set(hosts))
+        if names - set(targets):
+            self._resolve_target_names(targets, names - set(targets))
+
+        def substitution(obj, match, group):
+            return {
+                "start": match.start(group),
+                "end": match.end(group),
+                "label": obj.get_label(),
+                "resource_uri": api.get_resource_uri(obj),
+            }
+
+        result = []
+        for nid_matches, target_matches in message_matches:
+            substitutions = []
+            for nid, match in nid_matches:
+                host = hosts[nid]
+                if host is not None and host.state != "removed":
+                    substitutions.append(substitution(host, match, 0))
+
+            for name, match in target_matches:
+                target = targets[name]
+                if target is not None:
+                    substitutions.append(substitution(target, match, 1))
+
+            result.append(sorted(substitutions, key=lambda sub: sub["start"]))
+
+        return result
+
+    def _resolve_nids(self, hosts, nid_strings):
+        """
+        Resolve NIDs to hosts as ManagedHost.get_by_nid would, for many NIDs at once: a NID
+        resolves to a host if exactly one not-deleted host has it.
+        """
+        from chroma_api import api_log
+
+        nids = dict((nid_string, Nid.split_nid_string(nid_string)) for nid_string in nid_strings)
+
+        nid_hosts = defaultdict(dict)
+        for interface in NetworkInterface.objects.filter(
+            inet4_address__in=set(nid.nid_address for nid in nids.values()), host__not_deleted=True
+        ).select_related("host"):
+            nid_hosts[(interface.inet4_address, interface.type)][interface.host_id] = interface.host
+
+        for nid_string, nid in nids.items():
+            candidates = nid_hosts[(nid.nid_address, nid.lnd_type)].values()
+            if len(candidates) == 1:
+                hosts[nid_string] = candidates[0]
+            else:
+                if candidates:
+                    api_log.warn("Multiple hosts have NID %s" % nid_string)
+                else:
+                    api_log.warn("No host has NID %s" % nid_string)
+                hosts[nid_string] = None
+
+    def _resolve_target_names(self, targets, names):
+        for target in ManagedTarget.objects.filter(name__in=names):
+            # The first, in the default ordering, if several targets have the same name
+            targets.setdefault(target.name, target)
+
+        for name in names:
+            targets.setdefault(name, None)
+
+
+link_resolver = LogLinkResolver()
 
 
 class LogAuthorization(DjangoAuthorization):
@@ -38,8 +168,8 @@ class LogResource(ChromaModelResource):
     """
     syslog messages collected by the manager server.
 
-
-
+    Messages may be searched for words with the ``search`` parameter, e.g. ``?search=evicted``.  Messages
+    containing the words, or words with the same stems, are returned with the best matches first.
     """
 
     substitutions = fields.ListField(
@@ -56,9 +186,6 @@ class LogResource(ChromaModelResource):
         enumerations=MessageClass.strings(),
     )
 
-    def dehydrate_substitutions(self, bundle):
-        return self._substitutions(bundle.obj)
-
     class Meta:
         queryset = LogMessage.objects.all()
         filtering = {
@@ -84,8 +211,6 @@ class LogResource(ChromaModelResource):
         host_id = filters.get("host_id", None)
         if host_id is not None:
             del filters["host_id"]
-            from chroma_core.models import ManagedHost
-
             host = ManagedHost.objects.get(id=host_id)
             filters["fqdn"] = host.fqdn
 
@@ -100,47 +225,25 @@ class LogResource(ChromaModelResource):
 
         return super(LogResource, self).build_filters(filters)
 
-    def _substitutions(self, obj):
-        message = obj.message
-        from chroma_api import api_log
-        from chroma_api.urls import api
+    def apply_filters(self, request, applicable_filters):
+        """Apply the full text search, which is not a filter on a field so can't be done in build_filters"""
+        objects = super(LogResource, self).apply_filters(request, applicable_filters)
 
-        from chroma_core.models import ManagedHost, ManagedTarget
-        import re
+        search = request.GET.get("search", None)
+        if search:
+            objects = LogMessage.search(objects, search)
 
-        substitutions = []
+        return objects
 
-        def substitute(obj, match, group=1):
-            resource_uri = api.get_resource_uri(obj)
-            substitutions.append(
-                {
-                    "start": match.start(group),
-                    "end": match.end(group),
-                    "label": obj.get_label(),
-                    "resource_uri": resource_uri,
-                }
-            )
+    def alter_list_data_to_serialize(self, request, to_be_serialized):
+        """Decorate the messages in a page with substitutions, resolving their hosts and targets together"""
+        bundles = to_be_serialized["objects"]
+        for bundle, substitutions in zip(bundles, link_resolver.substitutions([b.obj.message for b in bundles])):
+            bundle.data["substitutions"] = substitutions
+
+        return to_be_serialized
+
+    def alter_detail_data_to_serialize(self, request, bundle):
+        bundle.data["substitutions"] = link_resolver.substitutions([bundle.obj.message])[0]
 
-        # TODO: detect other NID types (cray?)
-        nid_regex = re.compile("(\d{1,3}\.){3}\d{1,3}@(tcp|ib)(_\d+)?")
-        target_regex = re.compile("[^\w](\w{1,8}-(MDT|OST)[\da-f]{4})")
-        for match in nid_regex.finditer(message):
-            nid = match.group(0)
-            nid = normalize_nid(nid)
-            try:
-                host = ManagedHost.get_by_nid(nid)
-            except ManagedHost.DoesNotExist:
-                api_log.warn("No host has NID %s" % nid)
-                continue
-            except ManagedHost.MultipleObjectsReturned:
-                api_log.warn("Multiple hosts have NID %s" % nid)
-                continue
-            if host.state != "removed":
-                substitute(host, match, 0)
-
-        for match in target_regex.finditer(message):
-            target_name = match.group(1)
-            for target in ManagedTarget.objects.filter(name=target_name)[:1]:
-                substitute(target, match)
-
-        return sorted(substitutions, key=lambda sub: sub["start"])
+        return bundle
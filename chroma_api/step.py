@@ -3,10 +3,15 @@
 # license that can be found in the LICENSE file.
 
 
-from chroma_core.models.step_result import StepResult
+from collections import defaultdict
+
+from chroma_core.models.step_result import StepResult, StepResultChunk
 from tastypie.authorization import DjangoAuthorization
 from chroma_api.authentication import AnonymousAuthentication
 from tastypie import fields
+from tastypie.api import url
+from tastypie.http import HttpBadRequest, HttpMethodNotAllowed
+from tastypie.utils import trailing_slash
 
 from chroma_api.chroma_model_resource import ChromaModelResource
 
@@ -21,11 +26,13 @@ class StepResource(ChromaModelResource):
     and the user is interested in any captured exceptions or console output.
 
     Don't load steps for a job unless they're really needed; the console output may be
-    large.
+    large.  To follow the output of a running step use ``/api/step/<id>/output/``, which
+    takes ``stream`` (``log`` or ``console``) and ``offset`` GET parameters and returns only the
+    output after ``offset`` along with the ``offset`` to pass on the next request.
     """
 
     class Meta:
-        queryset = StepResult.objects.all()
+        queryset = StepResult.objects.all().prefetch_related("chunks")
         resource_name = "step"
         authorization = DjangoAuthorization()
         authentication = AnonymousAuthentication()
@@ -35,6 +42,18 @@ class StepResource(ChromaModelResource):
         list_allowed_methods = ["get"]
         detail_allowed_methods = ["get"]
 
+    log = fields.CharField(help_text="Human readable summary of progress during execution.")
+
+    def dehydrate_log(self, bundle):
+        return bundle.obj.get_output("log")
+
+    console = fields.CharField(
+        help_text="Combined standard out and standard error from all subprocesses run while completing this step."
+    )
+
+    def dehydrate_console(self, bundle):
+        return bundle.obj.get_output("console")
+
     description = fields.CharField()
 
     def dehydrate_description(self, bundle):
@@ -49,3 +68,45 @@ class StepResource(ChromaModelResource):
 
     def dehydrate_args(self, bundle):
         return bundle.obj.args
+
+    def prepend_urls(self):
+        return [
+            url(
+                r"^(?P<resource_name>%s)/(?P<pk>\d+)/output%s$" % (self._meta.resource_name, trailing_slash()),
+                self.wrap_view("get_output"),
+                name="api_step_output",
+            )
+        ]
+
+    def get_output(self, request, **kwargs):
+        """
+        GET parameters:
+        :stream: 'log' or 'console', defaults to 'console'
+        :offset: Character offset to return output from, as returned by a previous request.
+        """
+        if request.method != "GET":
+            return self.create_response(request, "", response_class=HttpMethodNotAllowed)
+
+        errors = defaultdict(list)
+
+        stream = request.GET.get("stream", "console")
+        if stream not in StepResultChunk.STREAMS:
+            errors["stream"].append("stream must be one of %s" % (StepResultChunk.STREAMS,))
+
+        try:
+            offset = int(request.GET.get("offset", 0))
+            if offset < 0:
+                raise ValueError()
+        except ValueError:
+            errors["offset"].append("offset must be a positive integer")
+
+        if errors:
+            return self.create_response(request, errors, response_class=HttpBadRequest)
+
+        bundle = self.build_bundle(request=request)
+        step_result = self.cached_obj_get(bundle, **self.remove_api_resource_names(kwargs))
+        output, next_offset = step_result.output_since(stream, offset)
+
+        return self.create_response(
+            request, {"stream": stream, "output": output, "offset": next_offset, "state": step_result.state}
+        )
@@ -59,6 +59,105 @@ class StorageResourceValidation(Validation):
         return errors
 
 
+class DehydrationContext(object):
+    """
+    What StorageResourceResource needs to dehydrate a page of records, loaded in bulk: the
+    plugin resource for each record, their alerts, and their statistics with the latest
+    histogram data.  Each is loaded with a fixed number of queries for the whole page, the
+    first time that it is needed.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self._resources = None
+        self._referenced_records = None
+        self._alerts = None
+        self._propagated_alerts = None
+        self._stats = None
+
+    def resource(self, record):
+        if self._resources is None:
+            self._resources = dict(
+                (resource._handle, resource) for resource in StorageResourceRecord.to_resources(self.records)
+            )
+
+        return self._resources[record.id]
+
+    def referenced_record(self, resource):
+        """The record of a resource referenced by an attribute of one of the page's resources"""
+        if self._referenced_records is None:
+            handles = set()
+            for record in self.records:
+                page_resource = self.resource(record)
+                for name, props in page_resource.get_all_attribute_properties():
+                    value = getattr(page_resource, name)
+                    if isinstance(value, BaseStorageResource):
+                        handles.add(value._handle)
+            self._referenced_records = StorageResourceRecord.objects.in_bulk(handles)
+
+        return self._referenced_records[resource._handle]
+
+    def alerts(self, record):
+        if self._alerts is None:
+            from chroma_core.models import StorageResourceAlert
+
+            self._alerts = defaultdict(list)
+            for alert in StorageResourceAlert.filter_by_item_ids(StorageResourceRecord, [r.id for r in self.records]):
+                self._alerts[alert.alert_item_id].append(alert)
+
+        return self._alerts[record.id]
+
+    def propagated_alerts(self, record):
+        if self._propagated_alerts is None:
+            from chroma_core.models import StorageAlertPropagated
+
+            self._propagated_alerts = defaultdict(list)
+            for sap in StorageAlertPropagated.objects.filter(storage_resource__in=self.records).select_related(
+                "alert_state"
+            ):
+                self._propagated_alerts[sap.storage_resource_id].append(sap.alert_state)
+
+        return self._propagated_alerts[record.id]
+
+    def stats(self, record):
+        """A list of (StorageResourceStatistic, BytesHistogram or similar, histogram bin values or None)"""
+        if self._stats is None:
+            self._load_stats()
+
+        return self._stats[record.id]
+
+    def _load_stats(self):
+        from chroma_core.lib.storage_plugin.manager import storage_plugin_manager
+        from chroma_core.models import SimpleHistoStoreTime
+        from chroma_core.models import SimpleHistoStoreBin
+
+        records = dict((r.id, r) for r in self.records)
+        stats = []
+        for stat in StorageResourceStatistic.objects.filter(storage_resource__in=self.records):
+            record = records[stat.storage_resource_id]
+            klass = storage_plugin_manager.get_resource_class_by_id(record.resource_class_id)
+            stats.append((stat, klass._meta.storage_statistics[stat.name]))
+
+        # The latest sample of each histogram, and its bins
+        histogram_ids = set(stat.id for stat, stat_props in stats if isinstance(stat_props, statistics.BytesHistogram))
+        latest_times = (
+            SimpleHistoStoreTime.objects.filter(storage_resource_statistic__in=histogram_ids)
+            .order_by("storage_resource_statistic", "-time")
+            .distinct("storage_resource_statistic")
+        )
+        stat_for_time = dict((time.id, time.storage_resource_statistic_id) for time in latest_times)
+        values = defaultdict(list)
+        for bin in SimpleHistoStoreBin.objects.filter(histo_store_time__in=stat_for_time.keys()).order_by(
+            "histo_store_time", "bin_idx"
+        ):
+            values[stat_for_time[bin.histo_store_time_id]].append(bin.value)
+
+        self._stats = defaultdict(list)
+        for stat, stat_props in stats:
+            histogram = values[stat.id] if stat.id in histogram_ids else None
+            self._stats[stat.storage_resource_id].append((stat, stat_props, histogram))
+
+
 class StorageResourceResource(MetricResource, ChromaModelResource):
     """
     Storage resources are objects within the storage plugin
@@ -121,6 +220,8 @@ class StorageResourceResource(MetricResource, ChromaModelResource):
 
     deletable = fields.BooleanField(help_text="If ``true``, this object may be removed with a DELETE operation")
 
+    dehydration_context_class = DehydrationContext
+
     def dehydrate_parent_classes(self, bundle):
         def find_bases(klass, bases=set()):
             for parent in klass.__bases__:
@@ -141,16 +242,22 @@ class StorageResourceResource(MetricResource, ChromaModelResource):
         objs = self._sort_by_attr(objs, bundle.request.GET, **kwargs)
         return objs
 
+    def get_object_list(self, request):
+        return (
+            super(StorageResourceResource, self)
+            .get_object_list(request)
+            .select_related("resource_class__storage_plugin")
+        )
+
     def get_list(self, request, **kwargs):
         if "ancestor_of" in request.GET:
             record = StorageResourceRecord.objects.get(id=request.GET["ancestor_of"])
-            ancestor_records = set(ResourceQuery().record_all_ancestors(record))
+            ancestor_records = list(set(ResourceQuery().record_all_ancestors(record)))
 
-            bundles = [self.build_bundle(obj=obj, request=request) for obj in ancestor_records]
-            dicts = [self.full_dehydrate(bundle) for bundle in bundles]
+            dicts = self.full_dehydrate_page(request, ancestor_records)
             return self.create_response(request, {"meta": None, "objects": dicts})
-        else:
-            return super(StorageResourceResource, self).get_list(request, **kwargs)
+
+        return super(StorageResourceResource, self).get_list(request, **kwargs)
 
     def _sort_by_attr(self, obj_list, options=None, **kwargs):
         options = options or {}
@@ -188,25 +295,15 @@ class StorageResourceResource(MetricResource, ChromaModelResource):
         return obj_list
 
     def dehydrate_propagated_alerts(self, bundle):
-        return [a.to_dict() for a in ResourceQuery().resource_get_propagated_alerts(bundle.obj.to_resource())]
+        return [a.to_dict() for a in bundle.dehydration_context.propagated_alerts(bundle.obj)]
 
     def dehydrate_stats(self, bundle):
-        from chroma_core.models import SimpleHistoStoreTime
-        from chroma_core.models import SimpleHistoStoreBin
-
         stats = {}
-        for s in StorageResourceStatistic.objects.filter(storage_resource=bundle.obj):
-            stat_props = s.storage_resource.get_statistic_properties(s.name)
+        for s, stat_props, histogram in bundle.dehydration_context.stats(bundle.obj):
             if isinstance(stat_props, statistics.BytesHistogram):
-                time = SimpleHistoStoreTime.objects.filter(storage_resource_statistic=s).latest("time")
-                bins = SimpleHistoStoreBin.objects.filter(histo_store_time=time).order_by("bin_idx")
-
                 type_name = "histogram"
                 # Composite type
-                data = {
-                    "bin_labels": [u"\u2264%s" % (bin[1:] or "") for bin in stat_props.bins],
-                    "values": [bin.value for bin in bins],
-                }
+                data = {"bin_labels": [u"\u2264%s" % (bin[1:] or "") for bin in stat_props.bins], "values": histogram}
             else:
                 type_name = "timeseries"
                 # Go get the data from <resource>/metrics/
@@ -228,20 +325,20 @@ class StorageResourceResource(MetricResource, ChromaModelResource):
         return stats
 
     def dehydrate_charts(self, bundle):
-        return bundle.obj.to_resource().get_charts()
+        return bundle.dehydration_context.resource(bundle.obj).get_charts()
 
     def dehydrate_deletable(self, bundle):
         return bundle.obj.resource_class.user_creatable
 
     def dehydrate_default_alias(self, bundle):
-        return bundle.obj.to_resource().get_label()
+        return bundle.dehydration_context.resource(bundle.obj).get_label()
 
     def dehydrate_alias(self, bundle):
-        resource = bundle.obj.to_resource()
+        resource = bundle.dehydration_context.resource(bundle.obj)
         return bundle.obj.alias_or_name(resource)
 
     def dehydrate_alerts(self, bundle):
-        return [a.to_dict() for a in ResourceQuery().resource_get_alerts(bundle.obj.to_resource())]
+        return [a.to_dict() for a in bundle.dehydration_context.alerts(bundle.obj)]
 
     def dehydrate_content_type_id(self, bundle):
         return ContentType.objects.get_for_model(bundle.obj.__class__).pk
@@ -249,7 +346,7 @@ class StorageResourceResource(MetricResource, ChromaModelResource):
     def dehydrate_attributes(self, bundle):
         # a list of dicts, one for each attribute.  Excludes hidden attributes.
         result = {}
-        resource = bundle.obj.to_resource()
+        resource = bundle.dehydration_context.resource(bundle.obj)
         attr_props = resource.get_all_attribute_properties()
         for name, props in attr_props:
             # Exclude password hashes
@@ -259,16 +356,18 @@ class StorageResourceResource(MetricResource, ChromaModelResource):
             val = getattr(resource, name)
             if isinstance(val, BaseStorageResource):
                 if val._handle:
-                    from chroma_api.urls import api
-
-                    raw = api.get_resource_uri(StorageResourceRecord.objects.get(pk=val._handle))
+                    raw = self.get_resource_uri(StorageResourceRecord(pk=val._handle))
                 else:
                     raw = None
             else:
                 raw = val
+            if isinstance(props, attributes.ResourceReference) and val is not None:
+                markup = props.to_markup(val, bundle.dehydration_context.referenced_record(val))
+            else:
+                markup = props.to_markup(val)
             result[name] = {
                 "raw": raw,
-                "markup": props.to_markup(val),
+                "markup": markup,
                 "label": props.get_label(name),
                 "class": props.__class__.__name__,
             }
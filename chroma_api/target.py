@@ -138,6 +138,59 @@ class TargetValidation(Validation):
             return {}
 
 
+class TargetDehydrationContext(object):
+    """
+    What TargetResource needs to dehydrate a page of targets, loaded in bulk: their volumes with
+    their nodes, the filesystems of OSTs and MDTs, the filesystems registered on MGTs, and the
+    conf params of OSTs and MDTs.  Each is loaded with a fixed number of queries for the whole
+    page, the first time that it is needed.
+    """
+
+    def __init__(self, targets):
+        self.targets = targets
+        self._volumes = None
+        self._filesystems = None
+        self._mgt_filesystems = None
+        self._conf_params = None
+
+    def volume(self, target):
+        if self._volumes is None:
+            self._volumes = ManagedTarget.full_volumes(self.targets)
+            for volume in self._volumes.values():
+                # Prefetched with the volumes, see WrappedAll
+                volume.prefetched_volume_nodes = volume.volumenode_set.all()
+
+        return self._volumes[target.volume_id]
+
+    def filesystem(self, target):
+        """The ManagedFilesystem of an OST or MDT"""
+        if self._filesystems is None:
+            filesystem_ids = set(getattr(t.downcast(), "filesystem_id", None) for t in self.targets)
+            self._filesystems = ManagedFilesystem._base_manager.in_bulk(filesystem_ids - set([None]))
+
+        return self._filesystems[target.downcast().filesystem_id]
+
+    def mgt_filesystems(self, target):
+        """The id and name of each filesystem registered on an MGT"""
+        if self._mgt_filesystems is None:
+            self._mgt_filesystems = defaultdict(list)
+            mgt_ids = [t.id for t in self.targets if issubclass(t.downcast_class, ManagedMgs)]
+            if mgt_ids:
+                for mgs_id, filesystem_id, name in ManagedFilesystem.objects.filter(mgs__in=mgt_ids).values_list(
+                    "mgs", "id", "name"
+                ):
+                    self._mgt_filesystems[mgs_id].append({"id": filesystem_id, "name": name})
+
+        return self._mgt_filesystems[target.id]
+
+    def conf_params(self, target):
+        """The conf params of an OST or MDT, or None for an MGT"""
+        if self._conf_params is None:
+            self._conf_params = chroma_core.lib.conf_param.get_targets_conf_params(self.targets)
+
+        return self._conf_params.get(target.id)
+
+
 class TargetResource(MetricResource, ConfParamResource):
     """
     A Lustre target.
@@ -214,7 +267,7 @@ class TargetResource(MetricResource, ConfParamResource):
 
     volume = fields.ToOneField(
         "chroma_api.volume.VolumeResource",
-        "full_volume",
+        lambda bundle: bundle.dehydration_context.volume(bundle.obj),
         full=True,
         help_text="\
                              The volume on which this target is stored.",
@@ -228,16 +281,9 @@ class TargetResource(MetricResource, ConfParamResource):
 
         return self.CONTENT_TYPE_ID_TO_KIND[id]
 
-    def full_dehydrate(self, bundle, for_list=False):
-        """The first call in the dehydrate cycle.
-
-        The ui, calls this directly, in addition to calling through the
-        normal api path.  So, use it to initialize the fs cache.
-        """
-
-        self._init_cached_fs()
+    resolve_fields = ["name"]
 
-        return super(TargetResource, self).full_dehydrate(bundle, for_list)
+    dehydration_context_class = TargetDehydrationContext
 
     class Meta:
         # ManagedTarget is a Polymorphic Model which gets related
@@ -250,6 +296,7 @@ class TargetResource(MetricResource, ConfParamResource):
             "managedost",
             "managedmdt",
             "managedmgs",
+            "active_mount__host",
         ).prefetch_related(
             "managedtargetmount_set", "managedtargetmount_set__host", "managedtargetmount_set__host__lnet_configuration"
         )
@@ -288,10 +335,9 @@ class TargetResource(MetricResource, ConfParamResource):
         ]
 
     def dehydrate_filesystems(self, bundle):
-        #  Limit this to one db hit per mgs, caching might help
         target = bundle.obj.downcast()
         if type(target) == ManagedMgs:
-            return [{"id": fs.id, "name": fs.name} for fs in bundle.obj.managedmgs.managedfilesystem_set.all()]
+            return bundle.dehydration_context.mgt_filesystems(bundle.obj)
         else:
             return None
 
@@ -311,30 +357,16 @@ class TargetResource(MetricResource, ConfParamResource):
         #  The ID is free - no db hit
         return getattr(bundle.obj.downcast(), "filesystem_id", None)
 
-    def _init_cached_fs(self):
-
-        # Object to hold seen filesystems, to preventing multiple
-        # db hits for the same filesystem.
-        self._fs_cache = defaultdict(ManagedFilesystem)
-
     def _get_cached_fs(self, bundle):
-        """Cache the ManagedFilesystem as they are seen.
-
-        The ManageFile can be accessed many times.  Use this method to get
-        it and the number of DB hits is reduced.
+        """Get the ManagedFilesystem of an OST or MDT, which is loaded along with those of the
+        rest of the page of targets.
 
         """
 
         #  Only OST and MDT are FS members.  Those subclass are joined in above
-        #  So this lookup is free accept for initial ManageFilesystem lookup
         managed_target = bundle.obj.downcast()
         if managed_target.filesystem_member:
-            val = getattr(managed_target, "filesystem_id", None)
-            if val not in self._fs_cache:
-                #  Only DB hit in this method.
-                self._fs_cache[val] = managed_target.filesystem
-
-            return self._fs_cache[val]  # a ManagedFilesystem
+            return bundle.dehydration_context.filesystem(managed_target)
         else:
             raise NotAFileSystemMember(type(managed_target))
 
@@ -357,6 +389,9 @@ class TargetResource(MetricResource, ConfParamResource):
         except NotAFileSystemMember:
             return None
 
+    def dehydrate_conf_params(self, bundle):
+        return bundle.dehydration_context.conf_params(bundle.obj)
+
     def dehydrate_primary_server_name(self, bundle):
         return bundle.obj.primary_host.get_label()
 
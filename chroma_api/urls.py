@@ -3,7 +3,11 @@
 # license that can be found in the LICENSE file.
 
 
+import hashlib
+
+from django.conf import settings
 from django.conf.urls import patterns, include
+from django.http import HttpResponseNotModified
 from tastypie.api import Api
 
 
@@ -28,6 +32,18 @@ class ChromaApi(Api):
 
         return None
 
+    def top_level(self, request, api_name=None):
+        """The list of resources, with an ETag so that clients (i.e. the CLI) can cache the schema.  The
+        server version goes into the ETag because the resource schemas change with it, not just the list."""
+        response = super(ChromaApi, self).top_level(request, api_name)
+
+        etag = '"%s"' % hashlib.md5("%s-%s-%s" % (settings.VERSION, settings.BUILD, response.content)).hexdigest()
+        if request.META.get("HTTP_IF_NONE_MATCH") == etag:
+            response = HttpResponseNotModified()
+        response["ETag"] = etag
+
+        return response
+
 
 api = ChromaApi(api_name="api")
 
@@ -44,7 +44,11 @@ class WrappedAll(object):
         return self
 
     def all(self):
-        return self.bundle.obj.volumenode_set.all().select_related("host")
+        try:
+            # Nodes which were loaded along with a batch of volumes, e.g. by TargetResource
+            return self.bundle.obj.prefetched_volume_nodes
+        except AttributeError:
+            return self.bundle.obj.volumenode_set.all().select_related("host")
 
     def __bool__(self):
         return True
@@ -51,4 +51,4 @@ class VolumeNodeResource(ChromaModelResource):
         excludes = ["not_deleted"]
         list_allowed_methods = ["get"]
         detail_allowed_methods = ["get"]
-        filtering = {"host": ["exact"], "path": ["exact"]}
+        filtering = {"host": ["exact", "in"], "path": ["exact"]}
@@ -4,8 +4,8 @@
 
 
 import json
-import time
 import re
+import time
 
 from urlparse import urljoin
 
@@ -20,6 +20,7 @@ from chroma_cli.exceptions import (
     AuthenticationFailure,
     ApiConnectionError,
 )
+from chroma_cli.schema_cache import SchemaCache
 
 
 DEFAULT_API_URL = "https://localhost/api/"
@@ -111,9 +112,19 @@ class ApiClient(object):
     def get_content_type(self, short_format):
         return self.serializer.content_types.get(short_format, "application/json")
 
+    @staticmethod
+    def _extra_headers(kwargs):
+        """Headers given as keyword arguments in the style of Django's test client, e.g. HTTP_IF_NONE_MATCH"""
+        return dict(
+            (key[len("HTTP_") :].replace("_", "-").title(), value)
+            for key, value in kwargs.items()
+            if key.startswith("HTTP_")
+        )
+
     def get(self, uri, format="json", data=None, authentication=None, **kwargs):
         content_type = self.get_content_type(format)
         headers = {"Content-Type": content_type, "Accept": content_type}
+        headers.update(self._extra_headers(kwargs))
 
         if authentication and not self.client.is_authenticated:
             self.client.login(**authentication)
@@ -149,13 +160,34 @@ class ApiClient(object):
 
 
 class CommandMonitor(object):
+    # How long to ask the server to wait for the command to change, in seconds
+    WAIT_TIMEOUT = 10
+
     def __init__(self, api, cmd):
         self.api = api
         self.cmd = cmd
+        self._incomplete_jobs = None
 
-    def update(self, pause=1):
-        time.sleep(pause)
-        self.cmd = self.api.endpoints["command"].show(self.cmd["id"])
+    def update(self, timeout=WAIT_TIMEOUT):
+        """
+        Fetch the command, waiting up to timeout seconds on the server for it or one of its jobs to complete.
+        """
+        started_at = time.time()
+        endpoint = self.api.endpoints["command"]
+        command = endpoint.get_decoded(urljoin(endpoint.resource_uri(self.cmd["id"]), "wait/"), timeout=timeout)
+        incomplete_jobs = command.pop("incomplete_jobs")
+        command = endpoint.resource_klass(**command)
+
+        # If the server returned early without anything having changed (e.g. it caps the
+        # timeout lower than we asked), wait out the rest here rather than ask again at once
+        unchanged = incomplete_jobs == self._incomplete_jobs and all(
+            command[key] == self.cmd[key] for key in ("complete", "cancelled", "errored")
+        )
+        if unchanged and not command["complete"]:
+            time.sleep(max(timeout - (time.time() - started_at), 0))
+
+        self._incomplete_jobs = incomplete_jobs
+        self.cmd = command
 
     def wait_complete(self):
         """
@@ -180,24 +212,15 @@ class CommandMonitor(object):
 
     @property
     def completed(self):
-        return self.status in ["Finished", "Canceled", "Failed"]
+        # Every complete command is finished with, whether it was cancelled, errored or both
+        return self.cmd["complete"]
 
     @property
     def incomplete_jobs(self):
-        def _job_id(j_uri):
-            m = re.search(r"(\d+)/?$", j_uri)
-            if m:
-                return m.group(1)
-            else:
-                return None
+        if self._incomplete_jobs is None:
+            self.update(timeout=0)
 
-        incomplete = []
-        for job_id in [_job_id(j_uri) for j_uri in self.cmd["jobs"]]:
-            job = self.api.endpoints["job"].show(job_id)
-            if job["state"] != "complete":
-                incomplete.append(int(job_id))
-
-        return incomplete
+        return self._incomplete_jobs
 
 
 class ApiHandle(object):
@@ -206,11 +229,18 @@ class ApiHandle(object):
     # ApiClient which uses Django's Client under the hood.
     ApiClient = ApiClient
 
-    def __init__(self, api_uri=None, authentication=None):
+    def __init__(self, api_uri=None, authentication=None, schema_cache_dir=None, schema_cache_max_age=0):
+        """
+        :param schema_cache_dir: If set, keep the API schema in a SchemaCache in this directory
+        :param schema_cache_max_age: Seconds for which a cached schema is used without asking the server
+        """
         self.__schema = None
         self.base_url = self._fix_base_uri(api_uri)
         if not self.base_url:
             self.base_url = DEFAULT_API_URL
+        self.schema_cache = None
+        if schema_cache_dir:
+            self.schema_cache = SchemaCache(schema_cache_dir, self.base_url, schema_cache_max_age)
         self.authentication = authentication
         self.endpoints = ApiEndpointGenerator(self)
         self.serializer = JsonSerializer()
@@ -249,10 +279,29 @@ class ApiHandle(object):
     @property
     def schema(self):
         if not self.__schema:
-            self.__schema = self.send_and_decode("get", "")
+            if self.schema_cache:
+                self.__schema = self._cached_schema()
+            else:
+                self.__schema = self.send_and_decode("get", "")
 
         return self.__schema
 
+    def _cached_schema(self):
+        cache = self.schema_cache
+        if cache.fresh:
+            return cache.top_level
+
+        headers = {"HTTP_IF_NONE_MATCH": cache.etag} if cache.etag else {}
+        r = self.send("get", "", **headers)
+        if r.status_code == 304:
+            cache.validated()
+            return cache.top_level
+
+        schema = self.decode(r)
+        # A requests Response, or a Django HttpResponse from the test framework's ApiClient
+        cache.replace(schema, getattr(r, "headers", r).get("ETag"))
+        return schema
+
     def data_or_text(self, content):
         try:
             return self.serializer.deserialize(content)
@@ -260,21 +309,27 @@ class ApiHandle(object):
             return content
 
     def send_and_decode(self, method_name, relative_url, data=None):
+        return self.decode(self.send(method_name, relative_url, data))
+
+    def send(self, method_name, relative_url, data=None, **kwargs):
         full_url = urljoin(self.base_url, relative_url)
 
         from requests import ConnectionError
 
         method = getattr(self.api_client, method_name)
         try:
-            r = method(full_url, data=data)
+            r = method(full_url, data=data, **kwargs)
         except ConnectionError:
             raise ApiConnectionError(self.base_url)
 
         if r.status_code == 401:
             # Try logging in and retry the request
             self.api_client.client.login(**self.authentication)
-            r = method(full_url, data=data)
+            r = method(full_url, data=data, **kwargs)
+
+        return r
 
+    def decode(self, r):
         decoded = self.data_or_text(r.content)
         if 200 <= r.status_code < 304:
             return decoded
@@ -355,8 +410,17 @@ class ApiEndpoint(object):
     @property
     def schema(self):
         if not self.__schema:
+            # Look this up first: it validates the schema cache, if there is one
             schema_url = self.api_handle.schema[self.name]["schema"]
-            self.__schema = self.api_handle.send_and_decode("get", schema_url)
+
+            schema_cache = self.api_handle.schema_cache
+            if schema_cache:
+                self.__schema = schema_cache.resource_schema(self.name)
+
+            if not self.__schema:
+                self.__schema = self.api_handle.send_and_decode("get", schema_url)
+                if schema_cache:
+                    schema_cache.add_resource_schema(self.name, self.__schema)
 
         return self.__schema
 
@@ -419,6 +483,45 @@ class ApiEndpoint(object):
 
         raise NotFound("Unable to resolve URI for %s/%s" % (self.name, query))
 
+    def resolve(self, subjects):
+        """
+        Resolve a batch of subjects (ids, or names etc.) to the resources that they refer to, in
+        one request for all those which exactly match a unique field, falling back to resolve_uri
+        for any others.
+
+        :return: A list of {"id": ..., "resource_uri": ...}, one for each subject.
+        """
+        names = []
+        for subject in subjects:
+            try:
+                int(subject)
+            except (ValueError, TypeError):
+                names.append(subject)
+
+        matches = {}
+        if names:
+            matches = self.api_handle.send_and_decode(
+                "post", urljoin(self.uri, "resolve/"), data={"identifiers": names}
+            )["objects"]
+
+        resolved = []
+        for subject in subjects:
+            candidates = matches.get(subject, [])
+            if len(candidates) > 1:
+                raise TooManyMatches(
+                    "The query %s/%s matches more than one resource: %s"
+                    % (self.name, subject, [c["resource_uri"] for c in candidates])
+                )
+            elif candidates:
+                resolved.append(candidates[0])
+            else:
+                resource_uri = self.resource_uri(subject)
+                resolved.append(
+                    {"id": int(re.search(r"(\d+)/?$", resource_uri).group(1)), "resource_uri": resource_uri}
+                )
+
+        return resolved
+
     def resource_uri(self, subject):
         try:
             id = int(subject)
@@ -19,3 +19,7 @@ defaults["output"] = "human"
 defaults["nowait"] = False
 defaults["noproxy"] = False
 defaults["force"] = False
+# The API schema is cached here between invocations ("" to disable)
+defaults["schema_cache"] = "~/.chroma_cache"
+# Seconds for which the cached schema is used before checking that it is current
+defaults["schema_cache_max_age"] = "300"
@@ -201,24 +201,36 @@ class Handler(object):
             parser.add_argument("--%s" % name, **kwargs)
 
     def _resolve_volume_node(self, spec):
-        try:
-            hostname, path = spec.split(":")
-            host = self.api.endpoints["host"].show(hostname)
-            kwargs = {"host": host["id"], "path": path}
-            vn_set = self.api.endpoints["volume_node"].list(**kwargs)
+        return self._resolve_volume_node_specs([spec])[0]
+
+    def _resolve_volume_node_specs(self, specs):
+        """Resolve a list of host:path specs, with one request for the hosts and one for the volume nodes"""
+        hostnames, paths = [], []
+        for spec in specs:
+            try:
+                hostname, path = spec.split(":")
+            except ValueError:
+                raise InvalidVolumeNode(spec)
+            hostnames.append(hostname)
+            paths.append(path)
+
+        host_ids = [host["id"] for host in self.api.endpoints["host"].resolve(hostnames)]
+        volume_nodes = self.api.endpoints["volume_node"].list(host__in=",".join(set(map(str, host_ids))), limit=0)
+
+        vn_list = []
+        for spec, host_id, path in zip(specs, host_ids, paths):
+            vn_set = [vn for vn in volume_nodes if vn["host_id"] == host_id and vn["path"] == path]
             if len(vn_set) > 1:
                 raise TooManyMatches()
-            else:
-                return vn_set[0]
-        except (ValueError, IndexError):
-            raise InvalidVolumeNode(spec)
+            elif not vn_set:
+                raise InvalidVolumeNode(spec)
+            vn_list.append(vn_set[0])
 
-    def _resolve_volume_nodes(self, specs):
-        vn_list = []
-        for spec in specs.split(","):
-            vn_list.append(self._resolve_volume_node(spec))
         return vn_list
 
+    def _resolve_volume_nodes(self, specs):
+        return self._resolve_volume_node_specs(specs.split(","))
+
     def list(self, ns, endpoint=None, **kwargs):
         kwargs["limit"] = "0"  # api defaults to 20
         if not endpoint:
@@ -451,8 +463,7 @@ class FilesystemHandler(Handler):
             raise BadUserInput("At least one MDT must be supplied.")
 
         mdts = []
-        for mdt_spec in ns.mdts:
-            mdt_vn = self._resolve_volume_node(mdt_spec)
+        for mdt_vn in self._resolve_volume_node_specs(ns.mdts):
             mdts.append({"conf_params": {}, "volume_id": mdt_vn.volume_id})
         return mdts
 
@@ -461,8 +472,7 @@ class FilesystemHandler(Handler):
             raise BadUserInput("At least one OST must be supplied.")
 
         osts = []
-        for ost_spec in ns.osts:
-            ost_vn = self._resolve_volume_node(ost_spec)
+        for ost_vn in self._resolve_volume_node_specs(ns.osts):
             osts.append({"conf_params": {}, "volume_id": ost_vn.volume_id})
         return osts
 
@@ -62,7 +62,12 @@ def standard_cli(args=None, config=None):
     )
 
     authentication = {"username": config.username, "password": config.password}
-    api = ApiHandle(api_uri=config.api_url, authentication=authentication)
+    api = ApiHandle(
+        api_uri=config.api_url,
+        authentication=authentication,
+        schema_cache_dir=config.schema_cache,
+        schema_cache_max_age=int(config.schema_cache_max_age),
+    )
 
     formatter = StandardFormatter(format=config.output, nowait=config.nowait, command_monitor=api.command_monitor)
 
@@ -0,0 +1,98 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+class SchemaCache(object):
+    """
+    An on-disk cache of one server's API schema: the top level list of resources, and
+    the schemas of the resources which have been used.  Saves every CLI invocation
+    from fetching the schema before it can do any work.
+
+    The cache is used as it is for max_age seconds after the server last confirmed it.
+    After that, it is revalidated with a conditional GET of the top level, using the
+    ETag which the server sent with it (which changes when the server is upgraded).
+    If the server answers 304 Not Modified, the cached resource schemas are still good.
+
+    The cache is best effort: if it can't be read or written, the CLI carries on without it.
+    """
+
+    # Change this if the layout of the cache file changes
+    FORMAT = 1
+
+    def __init__(self, cache_dir, base_url, max_age):
+        self.base_url = base_url
+        self.max_age = max_age
+        self.path = os.path.join(os.path.expanduser(cache_dir), "schema-%s.json" % hashlib.sha1(base_url).hexdigest())
+        self._entry = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entry = json.load(f)
+        except (IOError, ValueError):
+            return None
+
+        if not isinstance(entry, dict) or entry.get("format") != self.FORMAT or entry.get("base_url") != self.base_url:
+            return None
+
+        return entry
+
+    def _save(self):
+        try:
+            cache_dir = os.path.dirname(self.path)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir, 0o700)
+
+            # Write and rename, so that concurrent CLI invocations never read a partial file
+            fd, temp_path = tempfile.mkstemp(dir=cache_dir)
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._entry, f)
+            os.rename(temp_path, self.path)
+        except (IOError, OSError):
+            pass
+
+    @property
+    def fresh(self):
+        """True if the cache may be used without checking with the server"""
+        return self._entry is not None and 0 <= time.time() - self._entry["validated_at"] < self.max_age
+
+    @property
+    def etag(self):
+        return self._entry["etag"] if self._entry else None
+
+    @property
+    def top_level(self):
+        return self._entry["top_level"] if self._entry else None
+
+    def validated(self):
+        """Record that the server has confirmed that the cache is current"""
+        self._entry["validated_at"] = time.time()
+        self._save()
+
+    def replace(self, top_level, etag):
+        """Record a new top level schema from the server, forgetting the resource schemas which went with the old one"""
+        self._entry = {
+            "format": self.FORMAT,
+            "base_url": self.base_url,
+            "etag": etag,
+            "validated_at": time.time(),
+            "top_level": top_level,
+            "resources": {},
+        }
+        self._save()
+
+    def resource_schema(self, name):
+        return self._entry["resources"].get(name) if self._entry else None
+
+    def add_resource_schema(self, name, schema):
+        if self._entry is not None:
+            self._entry["resources"][name] = schema
+            self._save()
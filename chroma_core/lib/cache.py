@@ -13,6 +13,10 @@ log = log_register(__name__)
 class ObjectCache(object):
     instance = None
 
+    # Incremented whenever cached instances are added, replaced or dropped, so that anything
+    # derived from them (e.g. DepCache) can tell when it is out of date.
+    generation = 0
+
     def __init__(self):
         from chroma_core.models import ManagedFilesystem, ManagedHost, LNetConfiguration, LustreClientMount
         from chroma_core.models import PacemakerConfiguration, CorosyncConfiguration, Corosync2Configuration
@@ -51,6 +55,7 @@ class ObjectCache(object):
         log.debug("_add %s %s %s" % (instance.__class__, instance.id, id(instance)))
 
         self.objects[klass][instance.pk] = instance
+        ObjectCache.generation += 1
 
     @classmethod
     def add(cls, klass, instance):
@@ -133,6 +138,7 @@ class ObjectCache(object):
     def clear(cls):
         log.info("clear")
         cls.instance = None
+        ObjectCache.generation += 1
 
     @classmethod
     def host_client_mounts(cls, host_id):
@@ -175,6 +181,7 @@ class ObjectCache(object):
         cls.getInstance().objects[klass] = dict(
             [(o.pk, o) for o in cls.getInstance().objects[klass].values() if not filter(o)]
         )
+        ObjectCache.generation += 1
 
     def _update(self, obj):
         log.debug("update: %s %s" % (obj.__class__, obj.id))
@@ -187,6 +194,7 @@ class ObjectCache(object):
                 return None
             else:
                 class_collection[obj.pk] = fresh_instance
+                ObjectCache.generation += 1
             return fresh_instance
 
     @classmethod
@@ -438,6 +438,34 @@ def get_conf_params(obj):
     return result
 
 
+def get_targets_conf_params(targets):
+    """As get_conf_params, for many OSTs and MDTs at once: a query per target class rather than
+    per target.  Returns a dict of target ID to conf params, with no entries for other targets."""
+    from chroma_core.models import ManagedOst, ManagedMdt
+
+    result = {}
+    for klass, conf_param_klass, target_attr in [(ManagedOst, OstConfParam, "ost"), (ManagedMdt, MdtConfParam, "mdt")]:
+        target_ids = [target.id for target in targets if issubclass(target.downcast_class, klass)]
+        if not target_ids:
+            continue
+
+        # The latest version of each key, as ConfParam.get_latest_params
+        latest = {}
+        for target_id, key, value, version in conf_param_klass.objects.filter(
+            **{"%s__in" % target_attr: target_ids}
+        ).values_list(target_attr, "key", "value", "version"):
+            if (target_id, key) not in latest or version > latest[target_id, key][1]:
+                latest[target_id, key] = (value, version)
+
+        possible_conf_params = get_possible_conf_params(klass)
+        for target_id in target_ids:
+            result[target_id] = dict.fromkeys(possible_conf_params)
+        for (target_id, key), (value, version) in latest.items():
+            result[target_id][key] = value if key in possible_conf_params else None
+
+    return result
+
+
 def validate_conf_params(klass, params):
     """Return a dict of parameter name to list of human readable error strings"""
     from chroma_core.models import ManagedOst, ManagedMdt, ManagedFilesystem
@@ -8,8 +8,10 @@ import heapq
 import collections
 from datetime import datetime
 from chroma_core.services import log_register
+from django.contrib.contenttypes.models import ContentType
 from django.utils.timezone import utc
 from chroma_core.models import Point, Series, Stats, ManagedHost, ManagedTarget, ManagedFilesystem
+from chroma_core.models import ManagedOst, ManagedMdt
 from chroma_core.lib.storage_plugin.api import statistics
 from chroma_core.lib import scheduler
 
@@ -288,3 +290,41 @@ class FilesystemMetricStore(MetricStore):
             counter.update(data)
             latest = max(latest, dt)
         return latest, dict(counter)
+
+    # The capacity summary: for each target class, the target metrics which are summed for the filesystem
+    CAPACITY_METRICS = [
+        (ManagedOst, ["kbytesfree", "kbytestotal"]),
+        (ManagedMdt, ["filesfree", "filestotal", "client_count"]),
+    ]
+
+    @classmethod
+    def fetch_capacity(cls, filesystems):
+        """
+        The latest values of CAPACITY_METRICS, summed over each filesystem's targets as fetch_last
+        does, for many filesystems at once.  Uses a fixed number of queries, however many
+        filesystems and targets there are, and an index lookup per target metric.
+
+        :return: A dict of filesystem ID to dict of metric name to value.  As with fetch_last, a
+                 metric is absent if none of the filesystem's targets have it.
+        """
+        capacity = dict((filesystem.id, Counter()) for filesystem in filesystems)
+
+        series_targets = {}
+        for target_class, fetch_metrics in cls.CAPACITY_METRICS:
+            filesystem_ids = dict(
+                target_class.objects.filter(filesystem__in=capacity.keys()).values_list("id", "filesystem_id")
+            )
+            for series_id, object_id, name in Series.objects.filter(
+                content_type=ContentType.objects.get_for_model(target_class),
+                object_id__in=filesystem_ids.keys(),
+                name__in=fetch_metrics,
+            ).values_list("id", "object_id", "name"):
+                series_targets[series_id] = (filesystem_ids[object_id], name)
+
+        # The latest point of each series, as Stats.latest
+        means = Stats[0].latest_means(series_targets.keys())
+
+        for series_id, (filesystem_id, name) in series_targets.items():
+            capacity[filesystem_id].update({name: means.get(series_id, Point.zero.mean)})
+
+        return dict((filesystem_id, dict(counter)) for filesystem_id, counter in capacity.items())
@@ -0,0 +1,95 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+from collections import defaultdict
+
+
+class RouteTable(object):
+    """
+    The state graph of a StatefulObject class, compiled into tables so that which
+    states can be reached from a state, the route to each of them, and the jobs along
+    the route can be looked up without walking the graph.
+
+    Routes are shortest paths, found by a breadth first search from every state.
+    Transitions are explored in the order they are given, so the choice between routes
+    of the same length is repeatable.
+
+    The tables are built once and never modified, so they may be shared between threads.
+    """
+
+    def __init__(self, states, transitions):
+        """
+        :param states: The states of the class
+        :param transitions: A list of (old_state, new_state, job_class) for each StateChangeJob
+                            (a later job for the same transition replaces an earlier one)
+        """
+        self._states = frozenset(states)
+
+        self._job_classes = {}
+        next_states = defaultdict(list)
+        for old_state, new_state, job_class in transitions:
+            if (old_state, new_state) not in self._job_classes:
+                next_states[old_state].append(new_state)
+            self._job_classes[(old_state, new_state)] = job_class
+
+        self._available_states = {}
+        self._routes = {}
+        self._route_job_classes = {}
+
+        for begin_state in states:
+            routes = {begin_state: (begin_state,)}
+            reached = []
+            frontier = [begin_state]
+            while frontier:
+                next_frontier = []
+                for state in frontier:
+                    for next_state in next_states[state]:
+                        if next_state not in routes:
+                            routes[next_state] = routes[state] + (next_state,)
+                            reached.append(next_state)
+                            next_frontier.append(next_state)
+                frontier = next_frontier
+
+            self._available_states[begin_state] = tuple(reached)
+            for end_state in reached:
+                route = routes[end_state]
+                self._routes[(begin_state, end_state)] = route
+                self._route_job_classes[(begin_state, end_state)] = tuple(
+                    self._job_classes[hop] for hop in zip(route[:-1], route[1:])
+                )
+
+    def is_state(self, state):
+        return state in self._states
+
+    def available_states(self, begin_state):
+        """The states which can be reached from begin_state, nearest first"""
+        return self._available_states.get(begin_state, ())
+
+    def can_reach(self, begin_state, end_state):
+        return (begin_state, end_state) in self._routes
+
+    def route(self, begin_state, end_state):
+        """
+        The shortest route between two states, as a tuple of states from begin_state to end_state
+
+        :raises KeyError: if end_state cannot be reached from begin_state
+        """
+        return self._routes[(begin_state, end_state)]
+
+    def job_class(self, old_state, new_state):
+        """
+        The StateChangeJob which moves an object between two adjacent states
+
+        :raises KeyError: if there is no such job
+        """
+        return self._job_classes[(old_state, new_state)]
+
+    def route_job_classes(self, begin_state, end_state):
+        """
+        The StateChangeJobs along the route between two states, in the order they are run
+
+        :raises KeyError: if end_state cannot be reached from begin_state
+        """
+        return self._route_job_classes[(begin_state, end_state)]
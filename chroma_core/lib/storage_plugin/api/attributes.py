@@ -178,13 +178,17 @@ class ResourceReference(BaseResourceAttribute):
 
     model_class = StorageResourceAttributeReference
 
-    def to_markup(self, value):
+    def to_markup(self, value, record=None):
+        """
+        :param record: The StorageResourceRecord of the referenced resource, if the caller has already loaded it
+        """
         from chroma_core.models import StorageResourceRecord
 
         if value is None:
             return ""
 
-        record = StorageResourceRecord.objects.get(pk=value._handle)
+        if record is None:
+            record = StorageResourceRecord.objects.get(pk=value._handle)
         if record.alias:
             name = record.alias
         else:
@@ -95,6 +95,11 @@ class BaseStoragePlugin(object):
         self._delta_alerts = set()
         self._alerts = {}
 
+        # Resources whose attributes, parents or statistics have changed since the last
+        # commit: only these are flushed and have their AlertConditions re-evaluated.
+        self._dirty_lock = threading.Lock()
+        self._dirty_resources = set()
+
         # Should changes to resources be delta'd so that only changes are reported to the resource manager. This
         # required because it may be that at boot time (for example) we want all the changes everytime but once the
         # system is quiescent we only want the deltas.
@@ -109,6 +114,7 @@ class BaseStoragePlugin(object):
         root_resource = ResourceQuery().get_resource(scannable_id)
         root_resource._handle = self._generate_handle()
         root_resource._handle_global = False
+        root_resource._dirty_callback = self._mark_dirty
         self._root_resource = root_resource
 
     ##############################################################################################
@@ -194,8 +200,13 @@ class BaseStoragePlugin(object):
 
         # Creates, deletes, attrs, parents are all handled in session_open
         # the rest we do manually.
-        self._commit_resource_statistics()
-        self._check_alert_conditions()
+        resources = self._index.all()
+        self._take_dirty_resources()
+        for resource in resources:
+            resource.flush_deltas()
+
+        self._commit_resource_statistics(resources)
+        self._check_alert_conditions(resources)
         self._commit_alerts()
 
     def _generate_handle(self):
@@ -211,15 +222,29 @@ class BaseStoragePlugin(object):
 
         # Resources created since last update
         with self._resource_lock:
+            dirty_resources = self._take_dirty_resources()
+
             self._commit_resource_deletes()
             self._commit_resource_creates()
-            self._commit_resource_updates()
-            self._commit_resource_statistics()
-            self._check_alert_conditions()
+            self._commit_resource_updates(dirty_resources)
+            self._commit_resource_statistics(dirty_resources)
+            self._check_alert_conditions(dirty_resources)
             self._commit_alerts()
 
-    def _check_alert_conditions(self):
-        for resource in self._index.all():
+    def _mark_dirty(self, resource):
+        with self._dirty_lock:
+            self._dirty_resources.add(resource)
+
+    def _take_dirty_resources(self):
+        """Return the resources changed since the last call, and start a new dirty set"""
+        with self._dirty_lock:
+            dirty_resources = self._dirty_resources
+            self._dirty_resources = set()
+
+        return dirty_resources
+
+    def _check_alert_conditions(self, resources):
+        for resource in resources:
             # Check if any AlertConditions are matched
             for ac in resource._meta.alert_conditions:
                 alert_list = ac.test(resource)
@@ -245,9 +270,9 @@ class BaseStoragePlugin(object):
             )
             self._delta_delete_global_resources = []
 
-    def _commit_resource_updates(self):
+    def _commit_resource_updates(self, resources):
         # Resources with changed attributes
-        for resource in self._index.all():
+        for resource in resources:
             deltas = resource.flush_deltas()
             # If there were changes to attributes
             if len(deltas["attributes"]) > 0:
@@ -278,9 +303,9 @@ class BaseStoragePlugin(object):
                 )
             self._delta_alerts.clear()
 
-    def _commit_resource_statistics(self):
+    def _commit_resource_statistics(self, resources):
         samples = []
-        for resource in self._index.all():
+        for resource in resources:
             r_stats = resource.flush_stats()
             if r_stats and settings.STORAGE_PLUGIN_ENABLE_STATS:
                 samples += self._resource_manager.session_get_stats(self._scannable_id, resource._handle, r_stats)
@@ -318,6 +343,10 @@ class BaseStoragePlugin(object):
         self._index.add(resource)
         self._delta_new_resources.append(resource)
 
+        # New resources have their stats and alert conditions processed on the next commit.
+        resource._dirty_callback = self._mark_dirty
+        self._mark_dirty(resource)
+
     ############################################################
     # Methods below are implemented by the plugins themselves. #
     ############################################################
@@ -453,6 +482,10 @@ class BaseStoragePlugin(object):
         with self._resource_lock:
             self._index.remove(resource)
 
+            resource._dirty_callback = None
+            with self._dirty_lock:
+                self._dirty_resources.discard(resource)
+
             if isinstance(resource.identifier, identifiers.BaseScopedId):
                 self._delta_delete_local_resources.append(resource)
             else:
@@ -125,6 +125,10 @@ class BaseStorageResource(object):
         self._delta_parents = []
         self._calc_changes_delta = kwargs.pop("calc_changes_delta", lambda: True)
 
+        # Called with this resource whenever its attributes, parents or stats change, so
+        # that the owning plugin only has to commit resources that have been touched.
+        self._dirty_callback = None
+
         # Accumulate in between calls to flush_stats()
         self._delta_stats_lock = threading.Lock()
         self._delta_stats = defaultdict(list)
@@ -224,15 +228,21 @@ class BaseStorageResource(object):
             self._storage_dict[key] = value
             with self._delta_lock:
                 self._delta_attrs[key] = value
+            self._mark_dirty()
         elif key in self._meta.storage_statistics:
             stat_obj = self._meta.storage_statistics[key]
             stat_obj.validate(value)
 
             with self._delta_stats_lock:
                 self._delta_stats[key].append({"timestamp": time.time(), "value": value})
+            self._mark_dirty()
         else:
             object.__setattr__(self, key, value)
 
+    def _mark_dirty(self):
+        if self._dirty_callback is not None:
+            self._dirty_callback(self)
+
     def flush_stats(self):
         with self._delta_stats_lock:
             tmp = self._delta_stats
@@ -303,16 +313,20 @@ class BaseStorageResource(object):
     def add_parent(self, parent_resource):
         # TODO: lock _parents
         with self._delta_lock:
-            if parent_resource not in self._parents:
-                self._parents.append(parent_resource)
-                self._delta_parents.append(parent_resource)
+            if parent_resource in self._parents:
+                return
+            self._parents.append(parent_resource)
+            self._delta_parents.append(parent_resource)
+        self._mark_dirty()
 
     def remove_parent(self, parent_resource):
         # TODO: lock _parents
         with self._delta_lock:
-            if parent_resource in self._parents:
-                self._parents.remove(parent_resource)
-                self._delta_parents.append(parent_resource)
+            if parent_resource not in self._parents:
+                return
+            self._parents.remove(parent_resource)
+            self._delta_parents.append(parent_resource)
+        self._mark_dirty()
 
     def validate(self):
         """Call validate() on the BaseResourceAttribute for all _storage_dict items, and
@@ -3,10 +3,104 @@
 # license that can be found in the LICENSE file.
 
 
+from collections import defaultdict
+
 from chroma_core.models import StorageResourceRecord
 from chroma_core.lib.storage_plugin.log import storage_plugin_log
 
-from django.db import transaction
+from django.db import connection, transaction
+
+
+class RecordGraph(object):
+    """
+    Ancestor and descendant closures of StorageResourceRecords, for whole lists of
+    records at once.
+
+    Given an EdgeIndex (as kept by the plugin runner's ResourceManager) the graph is
+    walked in memory, otherwise all of the closures are found with one recursive query
+    on the StorageResourceRecord.parents table.
+    """
+
+    # Edges go 'from' child 'to' parent
+    CHILD_COLUMN = "from_storageresourcerecord_id"
+    PARENT_COLUMN = "to_storageresourcerecord_id"
+
+    CLOSURE_SQL = """
+        WITH RECURSIVE closure(origin, id) AS (
+            SELECT {start}, {next} FROM {table} WHERE {start} = ANY(%s)
+          UNION
+            SELECT closure.origin, {table}.{next} FROM closure JOIN {table} ON {table}.{start} = closure.id
+        )
+        SELECT origin, id FROM closure
+    """
+
+    def __init__(self, edges=None):
+        self._edges = edges
+
+    def ancestors(self, record_ids):
+        """
+        :param record_ids: An iterable of StorageResourceRecord IDs
+        :return: A dict of record ID to the set of IDs of its ancestors (not including itself)
+        """
+        if self._edges is not None:
+            return self._walk(record_ids, self._edges.get_parents)
+        else:
+            return self._query(record_ids, self.CHILD_COLUMN, self.PARENT_COLUMN)
+
+    def descendants(self, record_ids):
+        """
+        :param record_ids: An iterable of StorageResourceRecord IDs
+        :return: A dict of record ID to the set of IDs of its descendants (not including itself)
+        """
+        if self._edges is not None:
+            return self._walk(record_ids, self._edges.get_children)
+        else:
+            return self._query(record_ids, self.PARENT_COLUMN, self.CHILD_COLUMN)
+
+    @classmethod
+    def parent_ids(cls, record_ids):
+        """
+        :return: A dict of record ID to a list of the IDs of its parents, for each of record_ids
+        """
+        result = defaultdict(list)
+        for child, parent in StorageResourceRecord.parents.through.objects.filter(
+            **{"%s__in" % cls.CHILD_COLUMN: record_ids}
+        ).values_list(cls.CHILD_COLUMN, cls.PARENT_COLUMN):
+            result[child].append(parent)
+        return result
+
+    def _walk(self, record_ids, next_ids):
+        result = {}
+        for record_id in record_ids:
+            reached = set()
+            frontier = [record_id]
+            while frontier:
+                next_frontier = []
+                for node in frontier:
+                    for next_id in next_ids(node):
+                        if next_id not in reached:
+                            reached.add(next_id)
+                            next_frontier.append(next_id)
+                frontier = next_frontier
+            result[record_id] = reached
+        return result
+
+    def _query(self, record_ids, start_column, next_column):
+        result = dict((record_id, set()) for record_id in record_ids)
+        if not result:
+            return result
+
+        cursor = connection.cursor()
+        cursor.execute(
+            self.CLOSURE_SQL.format(
+                table=StorageResourceRecord.parents.through._meta.db_table, start=start_column, next=next_column
+            ),
+            [list(result.keys())],
+        )
+        for origin, record_id in cursor.fetchall():
+            result[origin].add(record_id)
+
+        return result
 
 
 class ResourceQuery(object):
@@ -17,15 +111,17 @@ class ResourceQuery(object):
         # Record plugins which fail to load
         self._errored_plugins = set()
 
+        # Records, and the IDs of their parents, loaded in bulk by _load_records
+        self._loaded_records = {}
+        self._loaded_parent_ids = {}
+
     def record_all_ancestors(self, record):
-        """Find an ancestor of type parent_klass, search depth first"""
+        """Return a list of the record and all of its ancestors"""
         if not isinstance(record, StorageResourceRecord):
             record = StorageResourceRecord.objects.get(pk=record)
 
-        result = [record]
-        for p in record.parents.all():
-            result.extend(self.record_all_ancestors(p))
-        return result
+        ancestor_ids = RecordGraph().ancestors([record.pk])[record.pk]
+        return [record] + list(StorageResourceRecord.objects.filter(pk__in=ancestor_ids))
 
     def record_all_alerts(self, record_id):
         if isinstance(record_id, StorageResourceRecord):
@@ -78,6 +174,22 @@ class ResourceQuery(object):
 
         return klass._meta.label, record.to_resource().get_label()
 
+    def _load_records(self, record_ids):
+        """Load the records and the parent IDs of a whole graph of records at once, for
+        _record_to_resource_parents and _load_record_and_children to build resources from"""
+        self._loaded_records.update(
+            StorageResourceRecord.objects.select_related("resource_class__storage_plugin").in_bulk(record_ids)
+        )
+        parent_ids = dict((record_id, []) for record_id in record_ids)
+        parent_ids.update(RecordGraph.parent_ids(record_ids))
+        self._loaded_parent_ids.update(parent_ids)
+
+    def _record_parents(self, record):
+        if record.pk in self._loaded_parent_ids:
+            return [self._loaded_records[p] for p in self._loaded_parent_ids[record.pk]]
+        else:
+            return record.parents.all()
+
     def _record_to_resource_parents(self, record):
         if isinstance(record, StorageResourceRecord):
             pk = record.pk
@@ -90,7 +202,7 @@ class ResourceQuery(object):
         else:
             resource = self._record_to_resource(record)
             if resource:
-                resource._parents = [self._record_to_resource_parents(p) for p in record.parents.all()]
+                resource._parents = [self._record_to_resource_parents(p) for p in self._record_parents(record)]
             return resource
 
     def _record_to_resource(self, record):
@@ -135,6 +247,7 @@ class ResourceQuery(object):
         """Like get_resource by also fills out entire ancestry"""
 
         vrr = StorageResourceRecord.objects.get(pk=vrr_id)
+        self._load_records([vrr.pk] + list(RecordGraph().ancestors([vrr.pk])[vrr.pk]))
         return self._record_to_resource_parents(vrr)
 
     @transaction.atomic
@@ -167,15 +280,13 @@ class ResourceQuery(object):
         for r in records:
             yield r["pk"]
 
-    def _load_record_and_children(self, record):
+    def _load_record_and_children(self, record, children_ids):
         storage_plugin_log.debug("load_record_and_children: %s" % record)
         resource = self._record_to_resource_parents(record)
         if resource:
-            children_records = StorageResourceRecord.objects.filter(parents=record)
-
             children_resources = []
-            for c in children_records:
-                child_resource = self._load_record_and_children(c)
+            for c in sorted(children_ids[record.pk]):
+                child_resource = self._load_record_and_children(self._loaded_records[c], children_ids)
                 children_resources.append(child_resource)
 
             resource._children = children_resources
@@ -185,9 +296,26 @@ class ResourceQuery(object):
         """For a given plugin and resource class, find all instances of that class
         and return a tree of resource instances (with additional 'children' attribute)"""
         storage_plugin_log.debug(">> get_resource_tree")
+        root_records = list(root_records)
+
+        # Load the records in the trees, and all of their ancestors, up front
+        graph = RecordGraph()
+        tree_ids = set(record.pk for record in root_records)
+        for descendant_ids in graph.descendants(tree_ids).values():
+            tree_ids |= descendant_ids
+        record_ids = set(tree_ids)
+        for ancestor_ids in graph.ancestors(tree_ids).values():
+            record_ids |= ancestor_ids
+        self._load_records(record_ids)
+
+        children_ids = defaultdict(list)
+        for child in tree_ids:
+            for parent in self._loaded_parent_ids[child]:
+                children_ids[parent].append(child)
+
         tree = []
         for record in root_records:
-            tree.append(self._load_record_and_children(record))
+            tree.append(self._load_record_and_children(record, children_ids))
         storage_plugin_log.debug("<< get_resource_tree")
 
         return tree
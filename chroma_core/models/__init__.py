@@ -34,3 +34,6 @@ from copytool import *
 from client_mount import *
 from lnet_configuration import *
 from sparse_model import *
+
+# Now that every StateChangeJob is defined, compile the state graphs once rather than on first use
+StatefulObject.build_route_tables()
@@ -22,9 +22,7 @@ logging = log_register("corosync2")
 
 class Corosync2Configuration(CorosyncConfiguration):
     # We want separate versions from the CorosyncConfiguration
-    route_map = None
-    transition_map = None
-    job_class_map = None
+    route_table = None
 
     def __str__(self):
         return "%s Corosync2 configuration" % self.host
@@ -186,20 +186,41 @@ class ManagedHost(DeletableStatefulObject, MeasuredEntity):
         See usage in chroma_apy/host.py:  used to determine if safe to configure LNet.
         """
 
+        return self.id in ManagedHost.members_of_active_filesystem([self])
+
+    @classmethod
+    def members_of_active_filesystem(cls, hosts):
+        """Return the IDs of those hosts for which member_of_active_filesystem is True, using a fixed
+        number of queries however many hosts and filesystems there are.
+        """
+
         # To prevent circular imports
         from chroma_core.models.filesystem import ManagedFilesystem
+        from chroma_core.models.target import ManagedTarget, ManagedTargetMount
+        from chroma_core.models.copytool import Copytool
+
+        active_states = ["available", "unavailable"]
+        host_ids = [host.id for host in hosts]
+
+        # Hosts which are servers of an available filesystem.
+        filesystems = ManagedFilesystem.objects.filter(state__in=active_states)
+        targets = ManagedTarget.objects.filter(
+            Q(managedmdt__filesystem__in=filesystems)
+            | Q(managedost__filesystem__in=filesystems)
+            | Q(id__in=filesystems.values("mgs"))
+        )
+        members = set(
+            ManagedTargetMount.objects.filter(target__in=targets, host__in=host_ids).values_list("host", flat=True)
+        )
 
-        # Host is part of an available filesystem.
-        for filesystem in ManagedFilesystem.objects.filter(state__in=["available", "unavailable"]):
-            if self in filesystem.get_servers():
-                return True
-
-        # Host has any associated copytools related to an available filesystem.
-        if self.copytools.filter(filesystem__state__in=["available", "unavailable"]).exists():
-            return True
+        # Hosts with any associated copytools related to an available filesystem.
+        members.update(
+            Copytool.objects.filter(host__in=host_ids, filesystem__state__in=active_states).values_list(
+                "host", flat=True
+            )
+        )
 
-        # This host is not related to any available filesystems.
-        return False
+        return members
 
     def get_label(self):
         """Return the FQDN if it is known, else the address"""
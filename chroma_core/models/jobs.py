@@ -4,6 +4,7 @@
 # license that can be found in the LICENSE file.
 
 
+import logging
 from collections import defaultdict, namedtuple
 
 from django.db import models
@@ -15,6 +16,7 @@ from chroma_core.models.utils import DeletableDowncastableMetaclass
 
 from chroma_core.lib.job import DependOn, DependAll, job_log
 from chroma_core.lib.util import all_subclasses
+from chroma_core.lib.state_routes import RouteTable
 
 MAX_STATE_STRING = 32
 
@@ -38,9 +40,8 @@ class StatefulObject(models.Model):
     immutable_state = models.BooleanField(default=False)
     states = None
     initial_state = None
-    route_map = None
-    transition_map = None
-    job_class_map = None
+    # The RouteTable for the class's state graph, see build_route_tables
+    route_table = None
 
     reverse_deps = {}
 
@@ -75,18 +76,18 @@ class StatefulObject(models.Model):
     @staticmethod
     def so_root(klass):
         """
-        We looked for two things to find first class that contains its own route_map. This is basically the parent
+        We looked for two things to find first class that contains its own route_table. This is basically the parent
         of the tree of objects. If we don't find that then we find the ancestor of klass which is a direct descendent
         of StatefulObject
         """
 
         # We do this because if I'm e.g. a ManagedMgs, I need to get my parent ManagedTarget
         # class in order to find out what jobs are applicable to me.
-        # However if a child wants to actually have its own jobs it can do this by defining its own class method
-        # route_map
+        # However if a child wants to actually have its own jobs it can do this by defining its own class
+        # attribute route_table
         assert issubclass(klass, StatefulObject)
 
-        if StatefulObject in klass.__bases__ or "route_map" in klass.__dict__:
+        if StatefulObject in klass.__bases__ or "route_table" in klass.__dict__:
             return klass
         else:
             for b in klass.__bases__:
@@ -97,98 +98,86 @@ class StatefulObject(models.Model):
             # Fallthrough: got as close as we're going
             return klass
 
+    @classmethod
+    def build_route_tables(cls):
+        """Compile the state graph of every StatefulObject class into a RouteTable, with one pass
+           over the StateChangeJob classes.  Called when chroma_core.models has been imported, so
+           that the graphs are not walked again for every lookup.
+        """
+        transitions = defaultdict(list)
+        for job_class in all_subclasses(StateChangeJob):
+            if job_class.state_transition is None:
+                continue
+
+            old_states = job_class.state_transition.old_state
+            if not isinstance(old_states, list):
+                old_states = [old_states]
+
+            for old_state in old_states:
+                transitions[job_class.state_transition.class_].append(
+                    (old_state, job_class.state_transition.new_state, job_class)
+                )
+
+        for klass in all_subclasses(cls):
+            if klass._meta.abstract or klass.states is None:
+                continue
+
+            root = StatefulObject.so_root(klass)
+            if root.__dict__.get("route_table") is None:
+                root.route_table = RouteTable(root.states, transitions[root])
+
     @classmethod
     def _build_maps(cls):
-        """Populate route_map and transition_map attributes by introspection of
-           this class and related StateChangeJob classes.  It is legal to call this
-           twice or concurrently.
+        """Populate the route_table attribute by introspection of this class and related
+           StateChangeJob classes, if build_route_tables has not already done so (e.g. for
+           a class defined since).  It is legal to call this twice or concurrently.
         """
-        if cls.route_map is not None:
+        if cls.route_table is not None:
             return
 
         cls_ = StatefulObject.so_root(cls)
 
-        transition_classes = [
-            s
-            for s in all_subclasses(StateChangeJob)
-            if ((s.state_transition is not None) and (s.state_transition.class_ == cls_))
-        ]
-        transition_options = defaultdict(list)
-        job_class_map = {}
-        for c in transition_classes:
-            to_state = c.state_transition.new_state
-            if isinstance(c.state_transition.old_state, list):
-                from_states = c.state_transition.old_state
-            else:
-                from_states = [c.state_transition.old_state]
-
-            for from_state in from_states:
-                transition_options[from_state].append(to_state)
-                job_class_map[(from_state, to_state)] = c
-
-        transition_map = defaultdict(list)
-        route_map = {}
-        for begin_state in cls_.states:
-            all_routes = set()
-
-            # Enumerate all possible routes from this state
-            def get_routes(stack, explore_state):
-                if explore_state in stack:
-                    all_routes.add(tuple(stack))
-                    return
-
-                stack = stack + [explore_state]
-
-                if len(transition_options[explore_state]) == 0:
-                    if len(stack) > 1:
-                        all_routes.add(tuple(stack))
-                    return
-
-                for next_state in transition_options[explore_state]:
-                    get_routes(stack, next_state)
-
-            get_routes([], begin_state)
-
-            # For all valid routes with more than 2 states,
-            # all truncations of 2 or more states are also valid routes.
-            truncations = set()
-            for r in all_routes:
-                for i in range(2, len(r)):
-                    truncations.add(tuple(r[0:i]))
-            all_routes = all_routes | truncations
-
-            routes = defaultdict(list)
-            # Build a map of end state to list of ways of getting there
-            for route in all_routes:
-                routes[route[-1]].append(route)
-
-            # Pick the shortest route to each end state
-            for (end_state, possible_routes) in routes.items():
-                possible_routes.sort(lambda a, b: cmp(len(a), len(b)))
-                shortest_route = possible_routes[0]
-
-                transition_map[begin_state].append(end_state)
-                route_map[(begin_state, end_state)] = shortest_route
-
-        cls_.route_map = route_map
-        cls_.transition_map = transition_map
-
-        cls_.job_class_map = job_class_map
+        transitions = []
+        for c in all_subclasses(StateChangeJob):
+            if (c.state_transition is not None) and (c.state_transition.class_ == cls_):
+                if isinstance(c.state_transition.old_state, list):
+                    from_states = c.state_transition.old_state
+                else:
+                    from_states = [c.state_transition.old_state]
+
+                for from_state in from_states:
+                    transitions.append((from_state, c.state_transition.new_state, c))
+
+        cls_.route_table = RouteTable(cls_.states, transitions)
 
     @classmethod
     def get_route(cls, begin_state, end_state):
         """Return an iterable of state strings, which is navigable using StateChangeJobs"""
+        cls._build_maps()
+
         for s in begin_state, end_state:
-            if not s in cls.states:
+            if not cls.route_table.is_state(s):
                 raise SchedulingError("%s not legal state for %s, legal states are %s" % (s, cls, cls.states))
 
-        cls._build_maps()
-
         try:
-            return cls.route_map[(begin_state, end_state)]
+            return cls.route_table.route(begin_state, end_state)
         except KeyError:
             raise SchedulingError("%s->%s not legal state transition for %s" % (begin_state, end_state, cls))
 
+    @classmethod
+    def get_route_job_classes(cls, begin_state, end_state):
+        """Return the StateChangeJob classes which are run, in order, to move from begin_state to end_state"""
+        cls.get_route(begin_state, end_state)
+
+        return cls.route_table.route_job_classes(begin_state, end_state)
+
+    @classmethod
+    def can_reach(cls, begin_state, end_state):
+        """Return True if there is a route from begin_state to end_state"""
+        cls._build_maps()
+
+        return cls.route_table.can_reach(begin_state, end_state)
+
     def get_available_states(self, begin_state):
         """States which should be advertised externally (i.e. exclude states which
         are used internally but don't make sense when requested externally, for example
@@ -196,15 +185,14 @@ class StatefulObject(models.Model):
         if self.immutable_state:
             return []
         else:
-            if not begin_state in self.states:
+            self._build_maps()
+
+            if not self.route_table.is_state(begin_state):
                 raise SchedulingError(
                     "%s not legal state for %s, legal states are %s" % (begin_state, self.__class__, self.states)
                 )
 
-            if self.transition_map is None:
-                self.__class__._build_maps()
-
-            return list(set(self.transition_map[begin_state]))
+            return list(self.route_table.available_states(begin_state))
 
     def get_verb(self, begin_state, end_state):
         """Return the GUI short (verb) and long description of the Job that is last in the route between the states
@@ -229,10 +217,9 @@ class StatefulObject(models.Model):
         self._build_maps()
 
         if last_job_in_route:
-            route = self.route_map[(begin_state, end_state)]
-            return self.job_class_map[(route[-2], route[-1])]
+            return self.route_table.route_job_classes(begin_state, end_state)[-1]
         else:
-            return self.job_class_map[(begin_state, end_state)]
+            return self.route_table.job_class(begin_state, end_state)
 
     def get_dependent_objects(self, inclusive=False):
         """Get all objects which MAY be depending on the state of this object"""
@@ -413,7 +400,7 @@ class Job(models.Model):
             # Generate dependencies (which will fail) for any dependents
             # which depend on our old state (bit of a roundabout way of doing it)
             dependent_deps = []
-            dependents = stateful_object.get_dependent_objects()
+            dependents = dep_cache.get_dependents(stateful_object)
             for dependent in dependents:
                 for dependent_dependency in dep_cache.get(dependent).all():
                     if (
@@ -434,14 +421,17 @@ class Job(models.Model):
     def _deps_satisfied(self, dep_cache):
         from chroma_core.lib.job import job_log
 
-        result = self.all_deps(dep_cache).satisfied()
+        deps = self.all_deps(dep_cache)
+        result = deps.satisfied()
 
-        job_log.debug("Job %s: deps satisfied=%s" % (self.id, result))
-        for d in self.all_deps(dep_cache).all():
-            satisfied = d.satisfied()
-            job_log.debug(
-                "  %s %s (actual %s) %s" % (d.stateful_object, d.acceptable_states, d.stateful_object.state, satisfied)
-            )
+        if job_log.isEnabledFor(logging.DEBUG):
+            job_log.debug("Job %s: deps satisfied=%s" % (self.id, result))
+            for d in deps.all():
+                satisfied = d.satisfied()
+                job_log.debug(
+                    "  %s %s (actual %s) %s"
+                    % (d.stateful_object, d.acceptable_states, d.stateful_object.state, satisfied)
+                )
         return result
 
     def description(self):
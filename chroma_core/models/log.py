@@ -3,10 +3,12 @@
 # license that can be found in the LICENSE file.
 
 
-from django.db import models
+from django.db import models, connection, transaction
 
 import re
 
+import settings
+
 
 class MessageClass:
     NORMAL = 0
@@ -38,10 +40,20 @@ class MessageClass:
         return cls._from_string[s]
 
 
+# Lustre messages start with "Lustre:" or "LustreError:", optionally after a kernel timestamp
+_message_class_re = re.compile(r"(?:\[[\d\.]*\])? ?(LustreError|Lustre):")
+
+# The text search configuration for LogMessage.search_vector: a column which is not a Django field, set
+# by a trigger when a message is inserted (see migration 0044 and LogMessagePartitions)
+SEARCH_CONFIG = "pg_catalog.english"
+
+
 class LogMessage(models.Model):
     class Meta:
         app_label = "chroma_core"
         ordering = ["-datetime"]
+        # The log API sorts by (datetime, fqdn), and the common queries filter on message_class
+        index_together = [["datetime", "fqdn"], ["message_class", "datetime"]]
 
     datetime = models.DateTimeField()
     # Note: storing FQDN rather than ManagedHost ID because:
@@ -66,14 +78,184 @@ class LogMessage(models.Model):
 
     @classmethod
     def get_message_class(cls, message):
-        log_match = "(\[[\d\.]*\])? ?%s:"
+        match = _message_class_re.match(message)
 
-        if re.match(log_match % "LustreError", message):
+        if match is None:
+            return MessageClass.NORMAL
+        elif match.group(1) == "LustreError":
             return MessageClass.LUSTRE_ERROR
-        elif re.match(log_match % "Lustre", message):
-            return MessageClass.LUSTRE
         else:
-            return MessageClass.NORMAL
+            return MessageClass.LUSTRE
+
+    @classmethod
+    def search(cls, queryset, text):
+        """
+        Filter LogMessages to those containing the words in text (or words with the same stems),
+        best matches first, using the full text index of the messages.
+        """
+        tsquery = "plainto_tsquery('%s', %%s)" % SEARCH_CONFIG
+        return queryset.extra(
+            select={"search_rank": "ts_rank(%s.search_vector, %s)" % (cls._meta.db_table, tsquery)},
+            select_params=[text],
+            where=["%s.search_vector @@ %s" % (cls._meta.db_table, tsquery)],
+            params=[text],
+            order_by=["-search_rank", "-datetime"],
+        )
 
     def __str__(self):
         return "%s %s %s %s %s %s" % (self.datetime, self.fqdn, self.severity, self.facility, self.tag, self.message)
+
+
+class LogMessagePartitions(object):
+    """
+    Bulk storage of LogMessages in a series of partitions: tables which inherit from the
+    LogMessage table, so that queries on LogMessage see the rows in all of them.
+
+    Each partition holds up to settings.DBLOG_PARTITION_SIZE rows, and the oldest
+    messages are removed by dropping whole partitions rather than by deleting rows.
+
+    Messages created with LogMessage.objects rather than insert() (which are few) are
+    stored in the LogMessage table itself, and are removed along with the partition
+    that was current when they were created.
+    """
+
+    COLUMNS = ["datetime", "fqdn", "severity", "facility", "tag", "message", "message_class"]
+
+    # Rows fetched at a time when archiving a partition
+    ARCHIVE_CHUNK = 10000
+    _archive_columns = "datetime, fqdn, severity, facility, tag, message"
+
+    def __init__(self, partition_size=None):
+        self.partition_size = partition_size or settings.DBLOG_PARTITION_SIZE
+        self._table = LogMessage._meta.db_table
+        # The partition's table name is filled in with format(), as the values are %s parameters
+        self._insert_sql = "INSERT INTO {table} (%s) VALUES (%s)" % (
+            ", ".join(self.COLUMNS),
+            ", ".join(["%s"] * len(self.COLUMNS)),
+        )
+        self.load()
+
+    def load(self):
+        """(Re)load the list of partitions and their sizes from the database"""
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+            [self._table],
+        )
+        names = sorted(row[0] for row in cursor.fetchall() if row[0].startswith(self._table + "_p"))
+
+        # A list of [name, row count], oldest first
+        self._partitions = []
+        for name in names:
+            cursor.execute("SELECT count(*) FROM %s" % name)
+            self._partitions.append([name, cursor.fetchone()[0]])
+
+        cursor.execute("SELECT count(*) FROM ONLY %s" % self._table)
+        self._unpartitioned_rows = cursor.fetchone()[0]
+
+    @property
+    def row_count(self):
+        return self._unpartitioned_rows + sum(rows for name, rows in self._partitions)
+
+    def partitions(self):
+        """A list of (partition name, row count), oldest first"""
+        return [tuple(partition) for partition in self._partitions]
+
+    def insert(self, messages):
+        """
+        Insert LogMessages, starting new partitions as the current one fills up.
+
+        :param messages: A list of dicts with a value for each of COLUMNS
+        """
+        cursor = connection.cursor()
+        offset = 0
+        while offset < len(messages):
+            if not self._partitions or self._partitions[-1][1] >= self.partition_size:
+                self._create_partition()
+
+            partition = self._partitions[-1]
+            chunk = messages[offset : offset + self.partition_size - partition[1]]
+            cursor.executemany(
+                self._insert_sql.format(table=partition[0]),
+                [[message[column] for column in self.COLUMNS] for message in chunk],
+            )
+            partition[1] += len(chunk)
+            offset += len(chunk)
+
+    def _create_partition(self):
+        number = int(self._partitions[-1][0][len(self._table) + 2 :]) + 1 if self._partitions else 1
+        name = "%s_p%06d" % (self._table, number)
+
+        with transaction.atomic():
+            cursor = connection.cursor()
+            # Columns and defaults (including the id sequence) are inherited, but not keys or indices...
+            cursor.execute("CREATE TABLE %s (PRIMARY KEY (id)) INHERITS (%s)" % (name, self._table))
+            cursor.execute("CREATE INDEX %s_datetime_fqdn ON %s (datetime, fqdn)" % (name, name))
+            cursor.execute("CREATE INDEX %s_message_class_datetime ON %s (message_class, datetime)" % (name, name))
+            cursor.execute("CREATE INDEX %s_search_vector ON %s USING gin (search_vector)" % (name, name))
+            # Triggers aren't inherited either: index the messages for search, and send table_update
+            # notifications as for the LogMessage table
+            cursor.execute(
+                "CREATE TRIGGER %s_search_vector BEFORE INSERT OR UPDATE ON %s FOR EACH ROW "
+                "EXECUTE PROCEDURE tsvector_update_trigger(search_vector, '%s', message)" % (name, name, SEARCH_CONFIG)
+            )
+            for operation in ["INSERT", "UPDATE", "DELETE"]:
+                cursor.execute(
+                    "CREATE TRIGGER %s_notify_%s AFTER %s ON %s FOR EACH ROW "
+                    "EXECUTE PROCEDURE table_partition_update_notify('%s')"
+                    % (name, operation.lower(), operation, name, self._table)
+                )
+
+        self._partitions.append([name, 0])
+
+    def trim(self, high_water, low_water, archive_file=None):
+        """
+        If there are more than high_water messages, drop the oldest partitions until there
+        are no more than low_water (or only the current partition is left).
+
+        :param archive_file: A file to which to write the dropped messages, if any
+        :return: The number of messages removed
+        """
+        if self.row_count <= high_water:
+            return 0
+
+        removed = 0
+        cursor = connection.cursor()
+        while len(self._partitions) > 1 and self.row_count > low_water:
+            name, rows = self._partitions[0]
+
+            with transaction.atomic():
+                cursor.execute("SELECT max(id) FROM %s" % name)
+                max_id = cursor.fetchone()[0]
+
+                if archive_file is not None:
+                    self._archive(cursor, "SELECT %s FROM %s ORDER BY id" % (self._archive_columns, name), archive_file)
+                    if max_id is not None and self._unpartitioned_rows:
+                        self._archive(
+                            cursor,
+                            "SELECT %s FROM ONLY %s WHERE id <= %s ORDER BY id"
+                            % (self._archive_columns, self._table, max_id),
+                            archive_file,
+                        )
+
+                cursor.execute("DROP TABLE %s" % name)
+                unpartitioned_rows = 0
+                if max_id is not None and self._unpartitioned_rows:
+                    cursor.execute("DELETE FROM ONLY %s WHERE id <= %%s" % self._table, [max_id])
+                    unpartitioned_rows = cursor.rowcount
+
+            self._partitions.pop(0)
+            self._unpartitioned_rows -= unpartitioned_rows
+            removed += rows + unpartitioned_rows
+
+        return removed
+
+    def _archive(self, cursor, sql, archive_file):
+        """Write the messages selected by sql to a file, in the format of LogMessage.__str__"""
+        cursor.execute(sql)
+        while True:
+            rows = cursor.fetchmany(self.ARCHIVE_CHUNK)
+            if not rows:
+                break
+            for row in rows:
+                archive_file.write("%s %s %s %s %s %s\n" % row)
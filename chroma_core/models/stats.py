@@ -9,7 +9,7 @@ import calendar
 import operator
 import functools
 from datetime import datetime, timedelta
-from django.db import models
+from django.db import connection, models
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes import generic
 from django.utils.timezone import utc
@@ -147,6 +147,24 @@ class Sample(models.Model):
         "Return most recent data point for series."
         return (cls.cache[id] or list(cls.select(id, order_by="-dt", limit=1)) or [Point.zero])[-1]
 
+    @classmethod
+    def latest_means(cls, ids):
+        """Return mapping of series ids to the mean of their most recent data point, as latest(id).mean.
+        One query for all series, which looks up the latest point of each in the (id, dt) index."""
+        means = dict((id, cls.cache[id][-1].mean) for id in ids if cls.cache.get(id))
+        missing = [id for id in ids if id not in means]
+        if missing:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT series_id, (SELECT CASE WHEN len = 0 THEN 0 ELSE sum / len END FROM {table} "
+                "WHERE id = series_id ORDER BY dt DESC LIMIT 1) FROM unnest(%s) AS series_id".format(
+                    table=cls._meta.db_table
+                ),
+                [missing],
+            )
+            means.update((id, Point.zero.mean if mean is None else mean) for id, mean in cursor.fetchall())
+        return means
+
     @classmethod
     def start(cls, id):
         "Return earliest datetime that should be stored for series."
@@ -7,6 +7,7 @@
 from base64 import b64decode
 
 from django.db import models
+from django.db.models import Max
 
 from picklefield.fields import PickledObjectField
 
@@ -27,6 +28,8 @@ class StepResult(models.Model):
     )
     step_count = models.IntegerField(help_text="Number of steps in this job")
 
+    # Output is appended as StepResultChunk rows while the step runs, these columns only hold output
+    # written before chunked storage was introduced.  Use get_output/output_since to read a stream.
     log = models.TextField(help_text="Human readable summary of progress during execution.")
 
     console = models.TextField(
@@ -85,6 +88,71 @@ class StepResult(models.Model):
     def describe(self):
         return self.step_class.describe(self.args)
 
+    def get_output(self, stream):
+        """
+        Reassemble the complete output of a stream ('log' or 'console') for this step.
+
+        Uses any prefetched chunks, so listing many steps with prefetch_related("chunks") does not
+        cost a query per step.
+        """
+        assert stream in StepResultChunk.STREAMS
+
+        chunks = sorted(
+            [chunk for chunk in self.chunks.all() if chunk.stream == stream], key=lambda chunk: chunk.sequence
+        )
+
+        return getattr(self, stream) + "".join(chunk.content for chunk in chunks)
+
+    def output_since(self, stream, offset=0):
+        """
+        Return the output of a stream from offset onwards, so that a client can tail a running step.
+
+        :param stream: 'log' or 'console'
+        :param offset: Character offset into the stream, as returned by a previous call.
+        :return: (output, next_offset) -- pass next_offset to the next call to receive only new output.
+        """
+        assert stream in StepResultChunk.STREAMS
+
+        # Output stored on the StepResult itself always precedes any chunks.
+        output = getattr(self, stream)[offset:]
+
+        chunks = self.chunks.filter(stream=stream)
+        if offset > 0:
+            # Start from the chunk containing offset
+            first_offset = chunks.filter(offset__lte=offset).aggregate(Max("offset"))["offset__max"]
+            if first_offset is not None:
+                chunks = chunks.filter(offset__gte=first_offset)
+
+        next_offset = len(getattr(self, stream))
+        for chunk in chunks.order_by("sequence"):
+            if chunk.offset + len(chunk.content) > offset:
+                output += chunk.content[max(0, offset - chunk.offset) :]
+            next_offset = chunk.offset + len(chunk.content)
+
+        return output, max(next_offset, offset)
+
     class Meta:
         app_label = "chroma_core"
         ordering = ["id"]
+
+
+class StepResultChunk(models.Model):
+    """
+    A piece of the log or console output of a StepResult.
+
+    Step output is only ever appended to, so each piece is stored as a new row rather than rewriting
+    an ever growing column on the StepResult for every line of output.
+    """
+
+    STREAMS = ("log", "console")
+
+    step_result = models.ForeignKey(StepResult, related_name="chunks")
+    stream = models.CharField(max_length=8, help_text="One of %s" % (STREAMS,))
+    sequence = models.IntegerField(help_text="Position of this chunk within the stream")
+    offset = models.IntegerField(help_text="Character offset of the start of this chunk within the stream")
+    content = models.TextField()
+
+    class Meta:
+        app_label = "chroma_core"
+        ordering = ["sequence"]
+        unique_together = ("step_result", "stream", "sequence")
@@ -161,21 +161,50 @@ class StorageResourceRecord(models.Model):
             yield (i.key, i.value)
 
     def to_resource(self):
+        return StorageResourceRecord.to_resources([self])[0]
+
+    @classmethod
+    def to_resources(cls, records):
+        """
+        to_resource for a list of records, loading their attributes with one query per
+        attribute model, plus the same again for each level of resources that they reference.
+        """
         from chroma_core.lib.storage_plugin.manager import storage_plugin_manager
 
-        klass = storage_plugin_manager.get_resource_class_by_id(self.resource_class_id)
-        attr_model_to_keys = defaultdict(list)
-        for attr, attr_props in klass._meta.storage_attributes.items():
-            attr_model_to_keys[attr_props.model_class].append(attr)
-        storage_dict = {}
-        for attr_model, keys in attr_model_to_keys.items():
-            for attr in attr_model.objects.filter(resource=self, key__in=keys):
-                storage_dict[attr.key] = attr_model.decode(attr.value)
+        klasses = dict(
+            (record.id, storage_plugin_manager.get_resource_class_by_id(record.resource_class_id)) for record in records
+        )
+        attr_model_to_keys = defaultdict(set)
+        for klass in set(klasses.values()):
+            for attr, attr_props in klass._meta.storage_attributes.items():
+                attr_model_to_keys[attr_props.model_class].add(attr)
 
-        resource = klass(**storage_dict)
-        resource._handle = self.id
-        resource._handle_global = True
-        return resource
+        storage_dicts = defaultdict(dict)
+        references = []
+        for attr_model, keys in attr_model_to_keys.items():
+            for attr in attr_model.objects.filter(resource__in=klasses.keys(), key__in=keys):
+                if attr.key not in klasses[attr.resource_id]._meta.storage_attributes:
+                    continue
+                elif attr_model is StorageResourceAttributeReference and attr.value_id is not None:
+                    # Decoded below, all together
+                    references.append(attr)
+                else:
+                    storage_dicts[attr.resource_id][attr.key] = attr_model.decode(attr.value)
+
+        if references:
+            referenced_records = cls.objects.filter(id__in=set(attr.value_id for attr in references))
+            referenced = dict((resource._handle, resource) for resource in cls.to_resources(list(referenced_records)))
+            for attr in references:
+                storage_dicts[attr.resource_id][attr.key] = referenced[attr.value_id]
+
+        resources = []
+        for record in records:
+            resource = klasses[record.id](**storage_dicts[record.id])
+            resource._handle = record.id
+            resource._handle_global = True
+            resources.append(resource)
+
+        return resources
 
     def alias_or_name(self, resource=None):
         if self.alias:
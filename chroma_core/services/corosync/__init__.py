@@ -3,18 +3,16 @@
 # license that can be found in the LICENSE file.
 
 
-from collections import namedtuple, defaultdict
+import logging
 
 from django.db import transaction
-from django.db.models import Q
 from django.utils import timezone
 
-from chroma_core.models import ManagedHost, HostOfflineAlert
+from chroma_core.models import ManagedHost
 from chroma_core.services import ChromaService, log_register
 from chroma_core.services.queue import AgentRxQueue
 from chroma_core.services.job_scheduler import job_scheduler_notify
-from chroma_core.models import CorosyncNoPeersAlert
-from chroma_core.models import StonithNotEnabledAlert
+from chroma_core.services.corosync.cluster_state import ClusterStateCollection
 from iml_common.lib.date_time import IMLDateTime
 
 log = log_register(__name__)
@@ -33,15 +31,11 @@ class Service(ChromaService):
 
     PLUGIN_NAME = "corosync"
 
-    #  Class to store the in-memory online/offline status and sample times
-    #  a HostStatus object is created for each host that is reported
-    HostStatus = namedtuple("HostStatus", ["status", "datetime"])
-
     def __init__(self):
         super(Service, self).__init__()
 
-        #  Holds each host seen as a key with a HostStatus value last set
-        self._host_status = defaultdict(self.HostStatus)
+        #  Our view of each HA cluster, merging the reports from all of its members
+        self._clusters = ClusterStateCollection()
 
         self._queue = AgentRxQueue(Service.PLUGIN_NAME)
 
@@ -61,7 +55,9 @@ class Service(ChromaService):
         """
 
         try:
-            host = ManagedHost.objects.get(fqdn=fqdn)
+            host = ManagedHost.objects.select_related("_corosync_configuration", "_pacemaker_configuration").get(
+                fqdn=fqdn
+            )
         except ManagedHost.DoesNotExist:
             # This might happen when we are deleting a host and the queues mean a message is still sat waiting to be
             # processed. Something has spoken to us and we don't know anything about it so really we can't do anything
@@ -102,77 +98,25 @@ class Service(ChromaService):
                     log.warning("Invalid date or tz string from corosync plugin: %s" % dt)
                     raise
 
-            def is_new(peer_node_identifier):
-                return (
-                    peer_node_identifier not in self._host_status
-                    or self._host_status[peer_node_identifier].datetime < dt
-                )
-
-            peers_str = "; ".join(
-                [
-                    "%s: online=%s, new=%s" % (peer_node_identifier, data["online"], is_new(peer_node_identifier))
-                    for peer_node_identifier, data in nodes.items()
-                ]
-            )
-            log.debug("Incoming peer report from %s:  %s" % (fqdn, peers_str))
-
-            # NB: This will ignore any unknown peers in the report.
-            cluster_nodes = ManagedHost.objects.select_related("ha_cluster_peers").filter(
-                Q(nodename__in=nodes.keys()) | Q(fqdn__in=nodes.keys())
-            )
+            cluster = self._clusters.get(nodes.keys())
 
-            unknown_nodes = (
-                set(nodes.keys()) - set([h.nodename for h in cluster_nodes]) - set([h.fqdn for h in cluster_nodes])
-            )
+            if log.isEnabledFor(logging.DEBUG):
+                peers_str = "; ".join(
+                    [
+                        "%s: online=%s, new=%s"
+                        % (peer_node_identifier, data["online"], cluster.is_new(peer_node_identifier, dt))
+                        for peer_node_identifier, data in nodes.items()
+                    ]
+                )
+                log.debug("Incoming peer report from %s:  %s" % (fqdn, peers_str))
 
-            # Leaving this out for now - because they raise issue caused by limitations in the simulator and
-            # test system as a whole. Difficult to know if they will or won't be raised it all depends on the past.
-            # CorosyncUnknownPeersAlert.notify(host.corosync_configuration, unknown_nodes != set())
-            if unknown_nodes:
-                log.warning("Unknown nodes in report from %s: %s" % (fqdn, unknown_nodes))
-
-            if stonith_enabled is not None:
-                StonithNotEnabledAlert.notify(host.corosync_configuration, stonith_enabled is False)
-
-            CorosyncNoPeersAlert.notify(host.corosync_configuration, len(cluster_nodes) == 1)
-            # CorosyncToManyPeersAlert.notify(host.corosync_configuration, len(cluster_nodes) > 2)
-
-            #  Consider all nodes in the peer group for this reporting agent
-            for host in cluster_nodes:
-                try:
-                    data = nodes[host.nodename]
-                    node_identifier = host.nodename
-                except KeyError:
-                    data = nodes[host.fqdn]
-                    node_identifier = host.fqdn
-
-                cluster_peer_keys = sorted([node.pk for node in cluster_nodes if node is not host])
-
-                if is_new(node_identifier) and host.corosync_configuration:
-                    host_reported_online = data["online"] == "true"
-
-                    log.debug("Corosync processing " "peer %s of %s " % (host.fqdn, fqdn))
-
-                    #  Raise an Alert - system suppresses duplicates
-                    log.debug("Alert notify on %s: active=%s" % (host, not host_reported_online))
-                    HostOfflineAlert.notify(host, not host_reported_online)
-                    if host_reported_online == False:
-                        log.debug("Host %s offline" % host.fqdn)
-                    else:
-                        log.debug("Host %s online" % host.fqdn)
-
-                    #  Attempt to save the state.
-                    if host.corosync_configuration.corosync_reported_up != host_reported_online:
-                        job_scheduler_notify.notify(
-                            host.corosync_configuration, timezone.now(), {"corosync_reported_up": host_reported_online}
-                        )
-
-                    peer_host_peer_keys = sorted([h.pk for h in host.ha_cluster_peers.all()])
-                    if peer_host_peer_keys != cluster_peer_keys:
-                        job_scheduler_notify.notify(host, timezone.now(), {"ha_cluster_peers": cluster_peer_keys})
-
-                    #  Keep internal track of the hosts state.
-                    self._host_status[node_identifier] = self.HostStatus(status=host_reported_online, datetime=dt)
+            try:
+                cluster.update_reporter(host, stonith_enabled)
+                cluster.update(nodes, dt)
+            except Exception:
+                # The transaction will be rolled back, so our view of what is in the database may be wrong
+                self._clusters.discard(nodes.keys())
+                raise
 
     def run(self):
         super(Service, self).run()
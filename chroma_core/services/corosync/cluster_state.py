@@ -0,0 +1,179 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import time
+from collections import namedtuple
+
+from django.db.models import Q
+from django.utils import timezone
+
+from chroma_core.models import ManagedHost, HostOfflineAlert
+from chroma_core.models import CorosyncNoPeersAlert
+from chroma_core.models import StonithNotEnabledAlert
+from chroma_core.services import log_register
+from chroma_core.services.job_scheduler import job_scheduler_notify
+
+log = log_register("corosync_cluster_state")
+
+
+#  The in-memory online/offline status of a node, and the time of the report it came from
+HostStatus = namedtuple("HostStatus", ["status", "datetime"])
+
+
+class ClusterState(object):
+    """
+    The corosync service's view of one HA cluster: the hosts which its members report on,
+    and what we last told the database about each of them.
+
+    Every member of a cluster reports on all of its peers, so most reports tell us nothing
+    new.  Reports from all members are merged by timestamp, and the database is only
+    touched when a node's online status, its peer list or an alert actually changes.
+    """
+
+    # Reload from the database this often, so that hosts which are removed or
+    # reconfigured behind our back are noticed.
+    REFRESH_INTERVAL = 60
+
+    def __init__(self, node_identifiers, member_status=None):
+        """
+        :param node_identifiers: The frozenset of node names (or fqdns) which the cluster's members report
+        :param member_status: HostStatus by node identifier, carried over from a previous view of the cluster
+        """
+        self.node_identifiers = node_identifiers
+        self.loaded_at = time.time()
+
+        self._member_status = dict(
+            (node_identifier, status)
+            for node_identifier, status in (member_status or {}).items()
+            if node_identifier in node_identifiers
+        )
+
+        #  The known hosts in the cluster by node identifier: unknown peers are ignored
+        self._hosts = {}
+        for host in (
+            ManagedHost.objects.select_related("_corosync_configuration")
+            .prefetch_related("ha_cluster_peers")
+            .filter(Q(nodename__in=node_identifiers) | Q(fqdn__in=node_identifiers))
+        ):
+            node_identifier = host.nodename if host.nodename in node_identifiers else host.fqdn
+            self._hosts[node_identifier] = host
+
+        self.unknown_nodes = node_identifiers - set(self._hosts.keys())
+
+        host_ids = [host.id for host in self._hosts.values()]
+        self._peer_ids = dict(
+            (host.id, sorted(peer.id for peer in host.ha_cluster_peers.all())) for host in self._hosts.values()
+        )
+        self._offline_alerted = set(
+            HostOfflineAlert.filter_by_item_ids(ManagedHost, host_ids).values_list("alert_item_id", flat=True)
+        )
+        self._reported_up = dict(
+            (host.id, host.corosync_configuration.corosync_reported_up)
+            for host in self._hosts.values()
+            if host.corosync_configuration
+        )
+
+        #  (stonith_enabled, no_peers) last notified for each reporting host's corosync configuration
+        self._reporter_alerts = {}
+
+    @property
+    def expired(self):
+        return time.time() - self.loaded_at > self.REFRESH_INTERVAL
+
+    @property
+    def member_status(self):
+        return self._member_status
+
+    def is_new(self, node_identifier, dt):
+        return node_identifier not in self._member_status or self._member_status[node_identifier].datetime < dt
+
+    def update_reporter(self, reporter, stonith_enabled):
+        """Notify the alerts which are about the reporting host's view of the cluster, if they have changed"""
+        corosync_configuration = reporter.corosync_configuration
+        alerts = (stonith_enabled, len(self._hosts) == 1)
+
+        if self._reporter_alerts.get(corosync_configuration.id) != alerts:
+            if stonith_enabled is not None:
+                StonithNotEnabledAlert.notify(corosync_configuration, stonith_enabled is False)
+
+            CorosyncNoPeersAlert.notify(corosync_configuration, len(self._hosts) == 1)
+
+            self._reporter_alerts[corosync_configuration.id] = alerts
+
+    def update(self, nodes, dt):
+        """
+        Merge a report of the online status of the cluster's nodes
+
+        :param nodes: The crm_info nodes from a member's report
+        :param dt: The time of the report
+        """
+        for node_identifier, host in self._hosts.items():
+            if not self.is_new(node_identifier, dt):
+                continue
+
+            host_reported_online = nodes[node_identifier]["online"] == "true"
+            self._member_status[node_identifier] = HostStatus(status=host_reported_online, datetime=dt)
+
+            if not host.corosync_configuration:
+                continue
+
+            if (host.id in self._offline_alerted) == host_reported_online:
+                log.debug("Alert notify on %s: active=%s" % (host, not host_reported_online))
+                HostOfflineAlert.notify(host, not host_reported_online)
+                if host_reported_online:
+                    self._offline_alerted.discard(host.id)
+                else:
+                    self._offline_alerted.add(host.id)
+
+            if self._reported_up.get(host.id) != host_reported_online:
+                log.debug("Host %s %s" % (host.fqdn, "online" if host_reported_online else "offline"))
+                job_scheduler_notify.notify(
+                    host.corosync_configuration, timezone.now(), {"corosync_reported_up": host_reported_online}
+                )
+                self._reported_up[host.id] = host_reported_online
+
+            cluster_peer_ids = sorted(peer.id for peer in self._hosts.values() if peer is not host)
+            if self._peer_ids[host.id] != cluster_peer_ids:
+                job_scheduler_notify.notify(host, timezone.now(), {"ha_cluster_peers": cluster_peer_ids})
+                self._peer_ids[host.id] = cluster_peer_ids
+
+
+class ClusterStateCollection(object):
+    """
+    The ClusterStates of the HA clusters which we have heard about, by the set of
+    nodes which their members report.
+
+    A node belongs to one cluster at a time: when a report arrives with different
+    membership, the clusters which the nodes belonged to before are discarded (keeping
+    the times of the last reports about their nodes, so that late reports are still dropped).
+    """
+
+    def __init__(self):
+        self._clusters = {}
+
+    def get(self, node_identifiers):
+        node_identifiers = frozenset(node_identifiers)
+
+        cluster = self._clusters.get(node_identifiers)
+        if cluster is not None and not cluster.expired:
+            return cluster
+
+        member_status = {}
+        for key, overlapping in self._clusters.items():
+            if key & node_identifiers:
+                member_status.update(overlapping.member_status)
+                del self._clusters[key]
+
+        cluster = self._clusters[node_identifiers] = ClusterState(node_identifiers, member_status)
+
+        if cluster.unknown_nodes:
+            # CorosyncUnknownPeersAlert is left out for now, because of limitations of the simulator and
+            # test system as a whole: whether it would be raised depends on the past.
+            log.warning("Unknown nodes in cluster %s: %s" % (sorted(node_identifiers), sorted(cluster.unknown_nodes)))
+
+        return cluster
+
+    def discard(self, node_identifiers):
+        self._clusters.pop(frozenset(node_identifiers), None)
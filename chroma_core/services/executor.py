@@ -0,0 +1,174 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+"""A bounded pool of worker threads for services which would otherwise start a thread per unit
+of work (per RPC, per job).
+
+Work is submitted with a priority.  High priority work (e.g. short RPCs) is always taken before
+low priority work (e.g. long running jobs), and a number of workers can be reserved for high
+priority work so that it is never stuck behind a pool full of long running jobs.
+
+Each worker keeps its Django database connection open between items of work, rather than
+connecting and disconnecting for every RPC.
+"""
+
+import sys
+import threading
+import traceback
+from collections import deque
+
+import django.db
+
+from chroma_core.services.log import log_register
+
+
+log = log_register("executor")
+
+
+class Executor(object):
+    HIGH_PRIORITY = 0
+    LOW_PRIORITY = 1
+
+    def __init__(self, name, max_workers, reserved_workers=0):
+        """
+        :param name: Used to name worker threads and in log messages
+        :param max_workers: The maximum number of worker threads, which are started as required.
+        :param reserved_workers: The number of workers which will only run HIGH_PRIORITY work.
+        """
+        assert max_workers > reserved_workers >= 0
+
+        self.name = name
+        self._max_workers = max_workers
+        self._low_priority_limit = max_workers - reserved_workers
+
+        self._condition = threading.Condition(threading.Lock())
+        self._queues = {self.HIGH_PRIORITY: deque(), self.LOW_PRIORITY: deque()}
+        self._workers = []
+        self._idle_workers = 0
+        self._running = {self.HIGH_PRIORITY: 0, self.LOW_PRIORITY: 0}
+        self._stopping = False
+
+    def submit(self, priority, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) to be run by a worker thread"""
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError("Executor %s is shutting down" % self.name)
+
+            self._queues[priority].append((fn, args, kwargs))
+
+            if priority == self.LOW_PRIORITY and self._running[priority] >= self._low_priority_limit:
+                # Nothing could run it yet, it will be picked up when a low priority item completes
+                return
+
+            # Only start the reserved workers for high priority work, so that they are there for it
+            worker_limit = self._max_workers if priority == self.HIGH_PRIORITY else self._low_priority_limit
+            if self._idle_workers == 0 and len(self._workers) < worker_limit:
+                worker = threading.Thread(target=self._worker, name="%s-%s" % (self.name, len(self._workers)))
+                self._workers.append(worker)
+                worker.start()
+            else:
+                self._wake_worker()
+
+    @property
+    def queue_depth(self):
+        """The number of submitted items of work which are waiting for a worker"""
+        with self._condition:
+            return len(self._queues[self.HIGH_PRIORITY]) + len(self._queues[self.LOW_PRIORITY])
+
+    def stats(self):
+        with self._condition:
+            return {
+                "workers": len(self._workers),
+                "idle_workers": self._idle_workers,
+                "running_high_priority": self._running[self.HIGH_PRIORITY],
+                "running_low_priority": self._running[self.LOW_PRIORITY],
+                "queued_high_priority": len(self._queues[self.HIGH_PRIORITY]),
+                "queued_low_priority": len(self._queues[self.LOW_PRIORITY]),
+            }
+
+    def shutdown(self, wait=True):
+        """Stop accepting work.  Work which is already queued will still be run."""
+        with self._condition:
+            self._stopping = True
+            self._idle_workers = 0
+            self._condition.notify_all()
+
+        if wait:
+            self.join()
+
+    def join(self):
+        with self._condition:
+            workers = list(self._workers)
+
+        for worker in workers:
+            worker.join()
+
+    def _wake_worker(self):
+        """Wake one idle worker, if there is one: call with _condition held"""
+        if self._idle_workers > 0:
+            # Count the worker as busy straight away, so that further submissions before it
+            # wakes up will start new workers rather than all trying to wake this one.
+            self._idle_workers -= 1
+            self._condition.notify()
+
+    def _next_work(self):
+        """Wait for an item of work which this worker may run: call with _condition held"""
+        while True:
+            if self._queues[self.HIGH_PRIORITY]:
+                return self.HIGH_PRIORITY, self._queues[self.HIGH_PRIORITY].popleft()
+
+            if self._queues[self.LOW_PRIORITY] and self._running[self.LOW_PRIORITY] < self._low_priority_limit:
+                return self.LOW_PRIORITY, self._queues[self.LOW_PRIORITY].popleft()
+
+            if self._stopping and not self._queues[self.LOW_PRIORITY]:
+                return None, None
+
+            self._idle_workers += 1
+            self._condition.wait()
+
+    def _worker(self):
+        try:
+            while True:
+                with self._condition:
+                    priority, work = self._next_work()
+                    if work is None:
+                        return
+                    self._running[priority] += 1
+
+                fn, args, kwargs = work
+                try:
+                    fn(*args, **kwargs)
+                except Exception:
+                    log.error(
+                        "Executor %s: unhandled exception: %s"
+                        % (self.name, "\n".join(traceback.format_exception(*(sys.exc_info()))))
+                    )
+                finally:
+                    _reset_database()
+
+                with self._condition:
+                    self._running[priority] -= 1
+                    if priority == self.LOW_PRIORITY and self._queues[self.LOW_PRIORITY]:
+                        # Low priority work may have been held back by the limit on low priority workers
+                        self._wake_worker()
+        finally:
+            _reset_database()
+            django.db.connection.close()
+
+
+def _reset_database():
+    """Make the worker's database connection fit for the next item of work, keeping it open if possible"""
+    # Imported here because chroma_core.services.job_scheduler imports models which import rpc, which imports us
+    from chroma_core.services.job_scheduler.disabled_connection import DISABLED_CONNECTION
+
+    connection = django.db.connection
+
+    if connection.connection == DISABLED_CONNECTION:
+        connection.connection = None
+    elif connection.connection is not None and connection.errors_occurred:
+        if connection.is_usable():
+            connection.errors_occurred = False
+        else:
+            connection.close()
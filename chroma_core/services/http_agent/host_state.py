@@ -3,6 +3,7 @@
 # license that can be found in the LICENSE file.
 
 
+import heapq
 import logging
 import threading
 import datetime
@@ -26,18 +27,38 @@ class HostState(object):
     # We get an update at the start of every long poll
     CONTACT_TIMEOUT = MessageView.LONG_POLL_TIMEOUT * 2
 
-    def __init__(self, fqdn, boot_time, client_start_time):
+    def __init__(self, fqdn, boot_time, client_start_time, host=None, alert_active=None):
+        """
+        :param host: The ManagedHost, if the caller already has it
+        :param alert_active: Whether a HostContactAlert is already active for the host, if the caller knows
+        """
         self.last_contact = None
         self.fqdn = fqdn
         self._healthy = False
-        self._host = ManagedHost.objects.get(fqdn=self.fqdn)
+        self._host = host if host is not None else ManagedHost.objects.get(fqdn=self.fqdn)
+
+        # Our view of the HostContactAlert, so that we only go to the database when it changes
+        if alert_active is None:
+            alert_active = HostContactAlert.filter_by_item(self._host).exists()
+        self._alert_active = alert_active
 
         self._last_contact = IMLDateTime.utcnow()
         self._boot_time = boot_time
         self._client_start_time = client_start_time
 
+    @property
+    def healthy(self):
+        return self._healthy
+
+    @property
+    def deadline(self):
+        """The time at which the host will be considered out of contact, if we do not hear from it again"""
+        return self.last_contact + datetime.timedelta(seconds=self.CONTACT_TIMEOUT)
+
     def update_health(self, healthy):
-        HostContactAlert.notify(self._host, not healthy)
+        if self._alert_active == healthy:
+            HostContactAlert.notify(self._host, not healthy)
+            self._alert_active = not healthy
         self._healthy = healthy
 
     def update(self, boot_time, client_start_time):
@@ -66,10 +87,9 @@ class HostState(object):
 
         return require_reset
 
-    def poll(self):
+    def poll(self, now=None):
         if self._healthy:
-            time_since_contact = IMLDateTime.utcnow() - self.last_contact
-            if time_since_contact > datetime.timedelta(seconds=self.CONTACT_TIMEOUT):
+            if (now or IMLDateTime.utcnow()) > self.deadline:
                 self.update_health(False)
         return self._healthy
 
@@ -78,16 +98,38 @@ class HostStateCollection(object):
     """
     Store some per-host state, things we will check and update
     without polling/continuously updating the database.
+
+    Healthy hosts are kept in a heap ordered by the time at which they will time out, so
+    that finding the hosts which have timed out does not mean looking at every host.  A
+    host's entry is not moved when we hear from it (that would be a heap operation on
+    every long poll): instead an entry which is found to be stale when it comes off the
+    heap is pushed back with the host's current deadline.
     """
 
     def __init__(self):
         self._hosts = {}
-
-        for mh in ManagedHost.objects.all().values("fqdn", "boot_time"):
-            self._hosts[mh["fqdn"]] = HostState(mh["fqdn"], mh["boot_time"], None)
+        self._lock = threading.Lock()
+        self._deadlines = []
+        # The hosts which currently have an entry in _deadlines
+        self._armed = set()
+
+        alerted_host_ids = set(
+            HostContactAlert.objects.filter(
+                active=True,
+                alert_item_type__model=ManagedHost.__name__.lower(),
+                alert_item_type__app_label=ManagedHost._meta.app_label,
+            ).values_list("alert_item_id", flat=True)
+        )
+
+        for host in ManagedHost.objects.all():
+            self._hosts[host.fqdn] = HostState(
+                host.fqdn, host.boot_time, None, host=host, alert_active=host.id in alerted_host_ids
+            )
 
     def remove_host(self, fqdn):
-        self._hosts.pop(fqdn, None)
+        with self._lock:
+            self._hosts.pop(fqdn, None)
+            self._armed.discard(fqdn)
 
     def update(self, fqdn, boot_time=None, client_start_time=None):
         try:
@@ -95,7 +137,56 @@ class HostStateCollection(object):
         except KeyError:
             state = self._hosts[fqdn] = HostState(fqdn, None, None)
 
-        return state.update(boot_time, client_start_time)
+        require_reset = state.update(boot_time, client_start_time)
+
+        with self._lock:
+            if fqdn not in self._armed and fqdn in self._hosts:
+                self._armed.add(fqdn)
+                heapq.heappush(self._deadlines, (state.deadline, fqdn))
+
+        return require_reset
+
+    def next_deadline(self):
+        """The earliest time at which a host might time out, or None if no hosts are healthy"""
+        with self._lock:
+            return self._deadlines[0][0] if self._deadlines else None
+
+    def expire(self, now=None):
+        """
+        Mark as unhealthy the hosts which we have not heard from within their timeout
+
+        :return: A list of the HostStates which have just become unhealthy
+        """
+        now = now or IMLDateTime.utcnow()
+        expired = []
+
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] < now:
+                deadline, fqdn = heapq.heappop(self._deadlines)
+                state = self._hosts.get(fqdn)
+                if state is None or fqdn not in self._armed:
+                    # Removed since it was pushed
+                    continue
+
+                if state.deadline >= now:
+                    # We have heard from it since it was pushed
+                    heapq.heappush(self._deadlines, (state.deadline, fqdn))
+                else:
+                    self._armed.discard(fqdn)
+                    expired.append(state)
+
+        # Outside the lock, as this goes to the database
+        for state in expired:
+            state.poll(now)
+
+        with self._lock:
+            for state in expired:
+                # We heard from it after all, between taking it off the heap and polling it
+                if state.healthy and state.fqdn not in self._armed and state.fqdn in self._hosts:
+                    self._armed.add(state.fqdn)
+                    heapq.heappush(self._deadlines, (state.deadline, state.fqdn))
+
+        return [state for state in expired if not state.healthy]
 
     def items(self):
         return self._hosts.items()
@@ -103,8 +194,8 @@ class HostStateCollection(object):
 
 class HostStatePoller(object):
     """
-    This thread periodically calls the .poll method of all the
-    hosts in a collection, in order to generate timeouts.
+    This thread wakes up when hosts in a collection are due to time
+    out (or at least every POLL_INTERVAL), in order to generate timeouts.
     """
 
     # How often to wake up and update alerts
@@ -123,12 +214,18 @@ class HostStatePoller(object):
         self._stopping.wait(self.STARTUP_DELAY)
 
         while not self._stopping.is_set():
-            for fqdn, host_state in self._hosts.items():
-                healthy = host_state.poll()
-                if not healthy:
-                    self._sessions.reset_fqdn_sessions(host_state.fqdn)
+            for host_state in self._hosts.expire():
+                self._sessions.reset_fqdn_sessions(host_state.fqdn)
+
+            self._stopping.wait(self._wait_time())
+
+    def _wait_time(self):
+        next_deadline = self._hosts.next_deadline()
+        if next_deadline is None:
+            return self.POLL_INTERVAL
 
-            self._stopping.wait(self.POLL_INTERVAL)
+        wait = (next_deadline - IMLDateTime.utcnow()).total_seconds()
+        return min(max(wait, 0), self.POLL_INTERVAL)
 
     def stop(self):
         self._stopping.set()
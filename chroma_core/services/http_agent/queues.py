@@ -4,9 +4,14 @@
 
 
 import Queue
+import json
 import threading
+import time
+from collections import deque
 from chroma_core.services import _amqp_connection, log_register
+from chroma_core.services.log import SampledLog
 from chroma_core.services.queue import ServiceQueue
+import settings
 
 
 class AgentTxQueue(ServiceQueue):
@@ -14,6 +19,7 @@ class AgentTxQueue(ServiceQueue):
 
 
 log = log_register(__name__)
+comms_log = SampledLog(log, settings.AGENT_COMMS_LOG_SAMPLE_RATE)
 
 
 class HostQueueCollection(object):
@@ -37,7 +43,12 @@ class HostQueueCollection(object):
 
     def remove_host(self, fqdn):
         with self._lock:
-            self._host_queues.pop(fqdn, None)
+            queues = self._host_queues.pop(fqdn, None)
+        comms_log.forget(fqdn)
+
+        if queues is not None:
+            # Don't leave a GET hanging on a queue that nothing will send to
+            queues.tx.detach()
 
     def send(self, message):
         queues = self.get(message["fqdn"])
@@ -53,8 +64,127 @@ class HostQueues(object):
     def __init__(self, fqdn):
         self.fqdn = fqdn
         self.rx = Queue.Queue()
-        self.tx = Queue.Queue()
-        self.tx_lock = threading.Lock()
+        self.tx = HostTxQueue(fqdn)
+
+
+class HostTxQueue(object):
+    """Messages waiting to be sent to one host, collected by the agent's long-polling GETs.
+
+    Only the most recent GET for a host is served: when a GET arrives while an older one is
+    still waiting (e.g. a hanging GET from an agent which has since restarted), the older
+    one is detached and returns with nothing.  Waiting GETs share the queue's one event,
+    so there is no lock or condition per request, and the threading primitives used are
+    the ones that gevent monkey patches when http_agent runs under gevent.
+
+    Messages are JSON encoded once, when they are queued, so that responses can be
+    limited in size without encoding anything twice.
+    """
+
+    def __init__(self, fqdn):
+        self.fqdn = fqdn
+        self._lock = threading.Lock()
+        self._messages = deque()
+        self._wakeup = threading.Event()
+        self._consumer = 0
+
+    def __len__(self):
+        return len(self._messages)
+
+    def put(self, message):
+        encoded = json.dumps(message)
+
+        with self._lock:
+            if not self._coalesce(message):
+                self._messages.append((message, encoded))
+            self._wakeup.set()
+
+    def _coalesce(self, message):
+        """Drop control messages superseded by `message`: call with _lock held
+
+        :return: True if `message` repeats a queued control message, and should not be queued
+        """
+        if message["type"] == "TX_BARRIER":
+            # Back to back barriers (an agent restarting repeatedly): only the latest agent
+            # instance matters, and the new barrier cancels GETs from all the older ones.
+            if self._messages and self._messages[-1][0]["type"] == "TX_BARRIER":
+                self._messages.pop()
+            return False
+        elif message["type"] != "SESSION_TERMINATE":
+            return False
+
+        # MessageView.post sends a SESSION_TERMINATE for every message an agent sends on a
+        # stale session, so a backlogged agent can otherwise be sent a long run of them.
+
+        # Compare with the latest message for the same plugin, without looking past a
+        # barrier: messages before it may be for a different agent instance.
+        for queued, encoded in reversed(self._messages):
+            if queued["type"] == "TX_BARRIER":
+                return False
+            elif queued["plugin"] == message["plugin"]:
+                return queued == message
+
+        return False
+
+    def detach(self):
+        """Make any waiting GET return empty-handed"""
+        with self._lock:
+            self._consumer += 1
+            self._wakeup.set()
+
+    def get(self, client_start_time, timeout, max_messages, max_bytes):
+        """Wait up to `timeout` seconds for messages, and return as many as fit within
+        `max_messages` and `max_bytes` (at least one, if any are waiting).
+
+        :return: A list of (message, JSON encoded message) tuples, or None if this GET should
+                 be cancelled: another GET for the host arrived, or a barrier for a different
+                 agent instance (`client_start_time`) was reached.
+        """
+        with self._lock:
+            # Detach any older GET which is still waiting
+            self._consumer += 1
+            consumer = self._consumer
+            self._wakeup.set()
+
+        deadline = time.time() + timeout
+        while True:
+            with self._lock:
+                if consumer != self._consumer:
+                    log.info("Detaching superseded GET for %s" % self.fqdn)
+                    return None
+                elif self._messages:
+                    return self._take(client_start_time, max_messages, max_bytes)
+
+                self._wakeup.clear()
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return []
+
+            self._wakeup.wait(remaining)
+
+    def _take(self, client_start_time, max_messages, max_bytes):
+        """Pop messages for a response: call with _lock held"""
+        messages = []
+        total_bytes = 0
+        while self._messages and len(messages) < max_messages:
+            message, encoded = self._messages[0]
+            if message["type"] == "TX_BARRIER":
+                self._messages.popleft()
+                if message["client_start_time"] != client_start_time:
+                    log.warning(
+                        "Cancelling GET due to barrier %s %s" % (message["client_start_time"], client_start_time)
+                    )
+                    return None
+                continue
+
+            if messages and total_bytes + len(encoded) > max_bytes:
+                break
+
+            self._messages.popleft()
+            messages.append((message, encoded))
+            total_bytes += len(encoded)
+
+        return messages
 
 
 class AmqpRxForwarder(object):
@@ -90,9 +220,13 @@ class AmqpTxForwarder(object):
         self._queue_collection = queue_collection
 
     def on_message(self, message):
-        log.debug(
-            "AmqpTxForwarder.on_message: %s/%s/%s %s"
-            % (message["fqdn"], message["plugin"], message["session_id"], message["type"])
+        comms_log.debug(
+            message["fqdn"],
+            "AmqpTxForwarder.on_message: %s/%s/%s %s",
+            message["fqdn"],
+            message["plugin"],
+            message["session_id"],
+            message["type"],
         )
         self._queue_collection.send(message)
 
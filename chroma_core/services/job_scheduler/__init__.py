@@ -92,7 +92,7 @@ class Service(ChromaService):
 
         self._job_scheduler = JobScheduler()
         self._queue_thread = ServiceThread(QueueHandler(self._job_scheduler))
-        self._rpc_thread = ServiceThread(JobSchedulerRpc(self._job_scheduler))
+        self._rpc_thread = ServiceThread(JobSchedulerRpc(self._job_scheduler, self._job_scheduler.executor))
         self._progress_thread = ServiceThread(self._job_scheduler.progress)
         AgentRpc.start()
         self._queue_thread.start()
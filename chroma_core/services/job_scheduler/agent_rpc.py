@@ -8,6 +8,7 @@ from paramiko import SSHException
 from collections import defaultdict
 from io import StringIO
 import json
+import math
 import threading
 import time
 import uuid
@@ -23,6 +24,43 @@ import settings
 log = log_register(__name__)
 
 
+class CancellationEvent(object):
+    """
+    A threading.Event which also sets any events listening to it when it is set.
+
+    This allows a thread to block on a single event which is set either when an RPC
+    completes or when the job running the RPC is cancelled, instead of waking up
+    periodically to check for cancellation.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._listeners = set()
+
+    def set(self):
+        with self._lock:
+            self._event.set()
+            for listener in self._listeners:
+                listener.set()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def add_listener(self, event):
+        with self._lock:
+            self._listeners.add(event)
+            if self._event.is_set():
+                event.set()
+
+    def remove_listener(self, event):
+        with self._lock:
+            self._listeners.discard(event)
+
+
 class ActionInFlight(object):
     def __init__(self, session_id, fqdn, action, args):
         self.id = uuid.uuid4().__str__()
@@ -90,8 +128,14 @@ class AgentRpcMessenger(object):
         self._action_runner_rx_queue = AgentRxQueue(AgentRpcMessenger.PLUGIN_NAME)
         self._action_runner_rx_queue.purge()
 
+        # A single broker connection is used for all requests, rather than one per request
+        self._tx_queue = AgentTxQueue(persistent=True)
+
         self._lock = threading.Lock()
 
+        # Notified (with _lock held) whenever _sessions changes, for threads waiting for a session
+        self._sessions_changed = threading.Condition(self._lock)
+
     def run(self):
         try:
             HttpAgentRpc().reset_plugin_sessions(AgentRpcMessenger.PLUGIN_NAME)
@@ -107,6 +151,7 @@ class AgentRpcMessenger(object):
     def stop(self):
         log.info("AgentRpcMessenger.stop")
         self._action_runner_rx_queue.stop()
+        self._tx_queue.close()
 
     def complete_all(self):
         log.info("AgentRpcMessenger.complete_all")
@@ -123,6 +168,7 @@ class AgentRpcMessenger(object):
                 del self._sessions[fqdn]
             except KeyError:
                 pass
+            self._sessions_changed.notify_all()
 
     def _abort_session(self, fqdn, message, old_session_id, new_session_id=None):
         log.warning("AgentRpcMessenger.on_rx: aborting session %s because %s" % (old_session_id, message))
@@ -135,6 +181,7 @@ class AgentRpcMessenger(object):
                 del self._sessions[fqdn]
             except KeyError:
                 pass
+        self._sessions_changed.notify_all()
 
         for rpc in old_rpcs.values():
             if new_session_id:
@@ -166,24 +213,21 @@ class AgentRpcMessenger(object):
 
         log.info("AgentRpcMessenger.await_restart: awaiting %s (old %s)" % (fqdn, old_session_id))
 
-        # Note: using polling here for simplicity, if efficiency became an issue here
-        # we could set up events to be triggered by the new session logic in on_rx, and
-        # sleep on them instead of polling.
+        deadline = time.time() + timeout
+        with self._sessions_changed:
+            while True:
+                current_session_id = self._sessions.get(fqdn)
 
-        duration = 0
-        poll_period = 1.0
-        while True:
-            current_session_id = self.get_session_id(fqdn)
-
-            if current_session_id is not None and current_session_id != old_session_id:
-                log.info("AgentRpcMessenger.await_restart: %s new %s" % (fqdn, current_session_id))
-                break
+                if current_session_id is not None and current_session_id != old_session_id:
+                    log.info("AgentRpcMessenger.await_restart: %s new %s" % (fqdn, current_session_id))
+                    break
 
-            if duration >= timeout:
-                log.info("AgentRpcMessenger.await_restart: %s timeout after %ss" % (fqdn, duration))
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    log.info("AgentRpcMessenger.await_restart: %s timeout after %ss" % (fqdn, timeout))
+                    break
 
-            duration += poll_period
-            time.sleep(poll_period)
+                self._sessions_changed.wait(remaining)
 
     def on_rx(self, message):
         with self._lock:
@@ -198,6 +242,7 @@ class AgentRpcMessenger(object):
                     self._abort_session(fqdn, "new session created", old_session_id, session_id)
                 else:
                     self._sessions[fqdn] = session_id
+                    self._sessions_changed.notify_all()
             elif message["type"] == "SESSION_TERMINATE":
                 # An agent has timed out or restarted, we're being told its session is now dead
                 if message["fqdn"] in self._sessions:
@@ -244,7 +289,7 @@ class AgentRpcMessenger(object):
     def _resend(self, rpc):
         log.debug("AgentRpcMessenger._resend: rpc %s in session %s" % (rpc.id, rpc.session_id))
         self._session_rpcs[rpc.session_id][rpc.id] = rpc
-        AgentTxQueue().put(rpc.get_request())
+        self._tx_queue.put(rpc.get_request())
 
     def _send_request(self, fqdn, action, args):
         wait_count = 0
@@ -272,7 +317,7 @@ class AgentRpcMessenger(object):
             rpc = ActionInFlight(session_id, fqdn, action, args)
 
             self._session_rpcs[session_id][rpc.id] = rpc
-            AgentTxQueue().put(rpc.get_request())
+            self._tx_queue.put(rpc.get_request())
             return rpc
 
     def _send_cancellation(self, rpc):
@@ -283,23 +328,29 @@ class AgentRpcMessenger(object):
                 log.warning("Dropping cancellation of RPC %s, it is already complete or aborted" % rpc.id)
             else:
                 log.warning("Cancelling RPC %s" % rpc.id)
-                AgentTxQueue().put(rpc.get_cancellation())
+                self._tx_queue.put(rpc.get_cancellation())
                 del self._session_rpcs[rpc.session_id][rpc.id]
 
     def _complete(self, rpc, cancel_event):
         log.info("AgentRpcMessenger._complete: starting wait for rpc %s" % rpc.id)
 
-        # Wait for rpc.complete, waking up every second to
-        # check cancel_event
-        while True:
-            if cancel_event.is_set():
-                self._send_cancellation(rpc)
-                self._cancelled_rpcs.append(rpc.id)
-                raise AgentCancellation()
-            else:
-                rpc.complete.wait(timeout=1.0)
-                if rpc.complete.is_set():
-                    break
+        if hasattr(cancel_event, "add_listener"):
+            # Cancellation also sets rpc.complete, so a single wait covers both
+            cancel_event.add_listener(rpc.complete)
+            try:
+                rpc.complete.wait()
+            finally:
+                cancel_event.remove_listener(rpc.complete)
+        else:
+            # A plain threading.Event cannot wake us when it is set, so fall back to checking it every second
+            while not rpc.complete.wait(timeout=1.0) and not cancel_event.is_set():
+                pass
+
+        # Cancellation takes precedence over a result arriving at the same time
+        if cancel_event.is_set():
+            self._send_cancellation(rpc)
+            self._cancelled_rpcs.append(rpc.id)
+            raise AgentCancellation()
 
         log.info("AgentRpcMessenger._complete: completed wait for rpc %s" % rpc.id)
         if rpc.exception:
@@ -319,15 +370,20 @@ class AgentRpcMessenger(object):
         :param timeout: how long to wait before quiting.
         :return: timeout remaining 0=failed, !0 is pass and useful for debug.
         """
-        while self.get_session_id(fqdn) == None and timeout > 0:
-            # Allow a short wait for a session to show up, for example
-            # when running setup actions on a host we've just added its
-            # session may not yet have been fully established
-            log.info("AgentRpcMessenger._send: no session yet for %s, %s seconds remain" % (fqdn, timeout))
-            timeout -= 1
-            time.sleep(1)
-
-        return timeout
+        deadline = time.time() + timeout
+        with self._sessions_changed:
+            while fqdn not in self._sessions:
+                # Allow a short wait for a session to show up, for example
+                # when running setup actions on a host we've just added its
+                # session may not yet have been fully established
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return 0
+
+                log.info("AgentRpcMessenger._send: no session yet for %s, %.1f seconds remain" % (fqdn, remaining))
+                self._sessions_changed.wait(remaining)
+
+        return max(int(math.ceil(deadline - time.time())), 1)
 
 
 class AgentRpc(object):
@@ -3,16 +3,38 @@
 # license that can be found in the LICENSE file.
 
 
+from chroma_core.lib.cache import ObjectCache
+
+
 class DepCache(object):
+    """Memoize the results of get_deps() and get_dependent_objects().
+
+    The JobScheduler keeps one of these for its lifetime rather than building a new one
+    for each scheduling pass.  Dependencies are computed from, and refer to, the instances
+    held in ObjectCache, so everything is dropped as soon as ObjectCache changes (every
+    state change notification and every completed job updates ObjectCache).
+    """
+
     def __init__(self):
         self.hits = 0
         self.misses = 0
         self.cache = {}
+        self.dependents = {}
+        self._generation = ObjectCache.generation
 
     @classmethod
     def clear(cls):
         cls.instance = None
 
+    def invalidate(self):
+        self.cache.clear()
+        self.dependents.clear()
+        self._generation = ObjectCache.generation
+
+    def _check_generation(self):
+        if self._generation != ObjectCache.generation:
+            self.invalidate()
+
     def _get(self, obj, state):
         if state:
             return obj.get_deps(state)
@@ -22,6 +44,8 @@ class DepCache(object):
     def get(self, obj, state=None):
         from chroma_core.models import StatefulObject
 
+        self._check_generation()
+
         if state == None and isinstance(obj, StatefulObject):
             state = obj.state
 
@@ -39,3 +63,17 @@ class DepCache(object):
             self.cache[key] = self._get(obj, state)
             self.misses += 1
             return self.cache[key]
+
+    def get_dependents(self, obj):
+        """Memoized obj.get_dependent_objects()"""
+        self._check_generation()
+
+        try:
+            v = self.dependents[obj]
+            self.hits += 1
+
+            return v
+        except KeyError:
+            self.dependents[obj] = obj.get_dependent_objects()
+            self.misses += 1
+            return self.dependents[obj]
@@ -13,8 +13,9 @@ from django.core.exceptions import ObjectDoesNotExist
 import os
 import operator
 import itertools
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import Queue
+import settings
 from copy import deepcopy
 from chroma_core.lib.util import all_subclasses
 from chroma_core.services import dbutils
@@ -34,7 +35,7 @@ from chroma_core.models import ManagedMdt
 from chroma_core.models import FilesystemMember
 from chroma_core.models import ConfigureLNetJob
 from chroma_core.models import ManagedTarget, ApplyConfParams, ManagedOst, Job, DeletableStatefulObject
-from chroma_core.models import StepResult
+from chroma_core.models import StepResult, StepResultChunk
 from chroma_core.models import ManagedMgs, ManagedFilesystem, NetworkInterface, LNetConfiguration
 from chroma_core.models import ManagedTargetMount, VolumeNode
 from chroma_core.models import DeployHostJob, UpdatesAvailableAlert, LustreClientMount, Copytool
@@ -46,9 +47,10 @@ from chroma_core.models import TriggerPluginUpdatesJob
 from chroma_core.services.job_scheduler.dep_cache import DepCache
 from chroma_core.services.job_scheduler.lock_cache import LockCache
 from chroma_core.services.job_scheduler.command_plan import CommandPlan
-from chroma_core.services.job_scheduler.agent_rpc import AgentException
+from chroma_core.services.job_scheduler.agent_rpc import AgentException, CancellationEvent
 from chroma_core.services.plugin_runner.agent_daemon_interface import AgentDaemonRpcInterface
 from chroma_core.services.rpc import RpcError
+from chroma_core.services.executor import Executor
 from chroma_core.services.log import log_register
 from disabled_connection import DISABLED_CONNECTION
 from iml_common.lib.date_time import IMLDateTime
@@ -163,19 +165,37 @@ class JobProgress(threading.Thread, Queue.Queue):
         self._stopping = threading.Event()
         self._job_to_result = {}
 
+        # Step output is buffered here and written out as StepResultChunk rows at most every
+        # STEP_OUTPUT_FLUSH_INTERVAL seconds, rather than rewriting the StepResult for every line.
+        self._pending_output = OrderedDict()
+        self._output_positions = {}
+        self._output_flushed_at = time.time()
+
     def run(self):
+        timeout = min(1, settings.STEP_OUTPUT_FLUSH_INTERVAL)
+
         while not self._stopping.is_set():
             try:
-                self._handle(self.get(block=True, timeout=1))
+                self._handle(self.get(block=True, timeout=timeout))
             except Queue.Empty:
                 pass
 
+            if time.time() - self._output_flushed_at >= settings.STEP_OUTPUT_FLUSH_INTERVAL:
+                self._flush_output()
+
         for msg in self.queue:
             self._handle(msg)
 
+        self._flush_output()
+
     def _handle(self, msg):
         fn = getattr(self, "_%s" % msg[0])
 
+        # Anything other than more output may depend on the output so far being stored, for
+        # example a new step starting or a failure being reported.
+        if msg[0] not in StepResultChunk.STREAMS:
+            self._flush_output()
+
         fn(*msg[1], **msg[2])
 
     def stop(self):
@@ -199,6 +219,7 @@ class JobProgress(threading.Thread, Queue.Queue):
             return getter
 
     def _complete_job(self, job_id, errored):
+        self._reset_output_positions(job_id)
         self._job_scheduler.complete_job(job_id, errored=errored)
 
     def _advance(self):
@@ -209,18 +230,41 @@ class JobProgress(threading.Thread, Queue.Queue):
             result = StepResult(job_id=job_id, **kwargs)
             result.save()
         self._job_to_result[job_id] = result
+        self._reset_output_positions(job_id)
 
     def _log(self, job_id, log_string):
-        result = self._job_to_result[job_id]
-        with transaction.atomic():
-            result.log += log_string
-            result.save()
+        self._append_output(job_id, "log", log_string)
 
     def _console(self, job_id, log_string):
-        result = self._job_to_result[job_id]
+        self._append_output(job_id, "console", log_string)
+
+    def _append_output(self, job_id, stream, output):
+        self._pending_output.setdefault((job_id, stream), []).append(output)
+
+    def _reset_output_positions(self, job_id):
+        for stream in StepResultChunk.STREAMS:
+            self._output_positions.pop((job_id, stream), None)
+
+    def _flush_output(self):
+        self._output_flushed_at = time.time()
+
+        if not self._pending_output:
+            return
+
+        chunks = []
+        for (job_id, stream), outputs in self._pending_output.items():
+            result = self._job_to_result[job_id]
+            sequence, offset = self._output_positions.get((job_id, stream), (0, len(getattr(result, stream))))
+            content = "".join(outputs)
+            chunks.append(
+                StepResultChunk(step_result=result, stream=stream, sequence=sequence, offset=offset, content=content)
+            )
+            self._output_positions[(job_id, stream)] = (sequence + 1, offset + len(content))
+
+        self._pending_output.clear()
+
         with transaction.atomic():
-            result.console += log_string
-            result.save()
+            StepResultChunk.objects.bulk_create(chunks)
 
     def _step_failure(self, job_id, backtrace):
         result = self._job_to_result[job_id]
@@ -237,15 +281,20 @@ class JobProgress(threading.Thread, Queue.Queue):
             result.save()
 
 
-class RunJobThread(threading.Thread):
+class RunJobThread(object):
+    """
+    Runs the steps of a job.  Despite the name this is not a thread of its own: run() is
+    submitted to the JobScheduler's Executor, which runs it on one of a bounded pool of workers.
+    """
+
     CANCEL_TIMEOUT = 30
 
     def __init__(self, job_progress, connection_quota, job, steps):
-        super(RunJobThread, self).__init__()
         self.job = job
         self._job_progress = job_progress
         self._connection_quota = connection_quota
-        self._cancel = threading.Event()
+        self._cancel = CancellationEvent()
+        self._started = threading.Event()
         self._complete = threading.Event()
         self.steps = steps
 
@@ -254,6 +303,10 @@ class RunJobThread(threading.Thread):
         self._cancel.set()
         log.info("Job %s: waiting %ss for run to complete" % (self.job.id, self.CANCEL_TIMEOUT))
 
+        if not self._started.is_set():
+            # Still queued for a worker, when it gets one it will return straight away
+            self._complete.set()
+
     def cancel_complete(self):
         self._complete.wait(self.CANCEL_TIMEOUT)
         if self._complete.is_set():
@@ -263,8 +316,11 @@ class RunJobThread(threading.Thread):
             log.error("Job %s: cancel timed out, will continue as zombie thread!" % self.job.id)
 
     def run(self):
-        if django.db.connection.connection:
-            log.error("RunJobThread started with a DB connection!")
+        self._started.set()
+
+        # The worker may hold a database connection from previous work, but steps may only use the
+        # database when they have a token from the connection quota.
+        _disable_database()
 
         try:
             self._run()
@@ -469,10 +525,16 @@ class JobScheduler(object):
         self._lock_cache = LockCache()
         self._job_collection = JobCollection()
         self._notification_buffer = NotificationBuffer()
+        self._dep_cache = DepCache()
 
         self._db_quota = SimpleConnectionQuota(self.MAX_STEP_DB_CONNECTIONS)
         self._run_threads = {}  # Map of job ID to RunJobThread
 
+        # Runs jobs, and RPCs to the job scheduler, with RPCs taking priority over jobs
+        self.executor = Executor(
+            "job_scheduler", settings.JOB_SCHEDULER_MAX_WORKERS, settings.JOB_SCHEDULER_RPC_RESERVED_WORKERS
+        )
+
         self.progress = JobProgress(self)
 
         # This is an actual list of hooks, so that we can actually have completion hooks in our code. Basic today
@@ -480,9 +542,8 @@ class JobScheduler(object):
         self.completion_hooks = []
 
     def join_run_threads(self):
-        for job_id, thread in self._run_threads.items():
-            log.info("Joining thread for job %s" % job_id)
-            thread.join()
+        log.info("Joining %s running jobs (%s)" % (len(self._run_threads), self.executor.stats()))
+        self.executor.shutdown()
 
     def _run_next(self):
         ready_jobs = self._job_collection.ready_jobs
@@ -492,8 +553,8 @@ class JobScheduler(object):
             % (len(ready_jobs), len(self._job_collection.pending_jobs), len(self._job_collection.tasked_jobs))
         )
 
-        dep_cache = DepCache()
-        ok_jobs, cancel_jobs = self._check_jobs(ready_jobs, dep_cache)
+        ok_jobs, cancel_jobs = self._check_jobs(ready_jobs, self._dep_cache)
+        log.debug("run_next: dependency cache hits=%s misses=%s" % (self._dep_cache.hits, self._dep_cache.misses))
 
         for job in cancel_jobs:
             self._complete_job(job, False, True)
@@ -548,8 +609,11 @@ class JobScheduler(object):
             assert job.id not in self._run_threads
             self._run_threads[job.id] = thread
 
-            thread.start()
-            log.debug("_spawn_job: %s threads in flight" % len(self._run_threads))
+            self.executor.submit(Executor.LOW_PRIORITY, thread.run)
+            log.debug(
+                "_spawn_job: %s jobs in flight, %s waiting for a worker"
+                % (len(self._run_threads), self.executor.queue_depth)
+            )
         else:
             log.debug("_spawn_job: No steps for %s, completing" % job.pk)
             # No steps: skip straight to completion
@@ -17,12 +17,19 @@ Outside of `chroma_service`, use `log_set_filename` to set the filename, or
 
 `settings.LOG_PATH` and `settings.LOG_LEVEL` control the global directory
 and level for logging.
+
+On busy paths, pass arguments to the logger rather than formatting the message
+yourself, so that nothing is formatted unless the message is emitted, wrap large
+payloads in `LogPreview`, and use `SampledLog` for messages logged per host:
+
+    log.debug("Received %s", LogPreview(body))
 """
 
 
 import logging
 from logging.handlers import WatchedFileHandler, MemoryHandler
 import os
+import threading
 import settings
 
 
@@ -162,3 +169,108 @@ def log_register(log_name):
 
     _loggers.add(logger)
     return logger
+
+
+class _PreviewFull(Exception):
+    pass
+
+
+class LogPreview(object):
+    """A log message argument which renders a possibly very large object (e.g. an agent
+    message body) only when the log record is emitted, and then only the first
+    `max_length` (default settings.LOG_PREVIEW_LENGTH) characters of it.  Rendering
+    stops as soon as the preview is full, so it costs no more than the preview is long.
+    """
+
+    def __init__(self, obj, max_length=None):
+        self.obj = obj
+        self.max_length = max_length
+
+    def __str__(self):
+        max_length = settings.LOG_PREVIEW_LENGTH if self.max_length is None else self.max_length
+        parts = []
+        length = [0]
+
+        def emit(text):
+            parts.append(text)
+            length[0] += len(text)
+            if length[0] > max_length:
+                raise _PreviewFull()
+
+        def render(obj):
+            if isinstance(obj, dict):
+                emit("{")
+                for i, (key, value) in enumerate(obj.iteritems()):
+                    if i:
+                        emit(", ")
+                    render(key)
+                    emit(": ")
+                    render(value)
+                emit("}")
+            elif isinstance(obj, (list, tuple)):
+                emit("[" if isinstance(obj, list) else "(")
+                for i, value in enumerate(obj):
+                    if i:
+                        emit(", ")
+                    render(value)
+                emit("]" if isinstance(obj, list) else ")")
+            elif isinstance(obj, basestring):
+                emit(repr(obj[: max_length + 1]))
+            else:
+                emit(repr(obj))
+
+        if isinstance(self.obj, basestring):
+            text = self.obj
+        else:
+            try:
+                render(self.obj)
+            except _PreviewFull:
+                pass
+            text = "".join(parts)
+
+        if len(text) > max_length:
+            return "%s...(truncated)" % text[:max_length]
+        else:
+            return text
+
+
+class SampledLog(object):
+    """Log messages which are repeated for each host on a busy path (e.g. every message
+    to or from an agent), emitting only one in every `sample_rate` of them for each host.
+
+    The arguments are passed on to the logger unformatted, and nothing is counted or
+    formatted at all unless the logger is enabled for the level.
+    """
+
+    def __init__(self, logger, sample_rate=1):
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def log(self, level, key, msg, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+
+        if self.sample_rate > 1:
+            with self._lock:
+                count = self._counts.get(key, 0)
+                self._counts[key] = count + 1
+
+            if count % self.sample_rate:
+                return
+
+            msg = "%s [1 in %s sampled]" % (msg, self.sample_rate)
+
+        self.logger.log(level, msg, *args)
+
+    def debug(self, key, msg, *args):
+        self.log(logging.DEBUG, key, msg, *args)
+
+    def info(self, key, msg, *args):
+        self.log(logging.INFO, key, msg, *args)
+
+    def forget(self, key):
+        """Drop the count for a key (e.g. a host which has been removed)"""
+        with self._lock:
+            self._counts.pop(key, None)
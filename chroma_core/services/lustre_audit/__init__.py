@@ -6,6 +6,7 @@
 import traceback
 import sys
 from chroma_core.services.lustre_audit.update_scan import UpdateScan
+from chroma_core.services.lustre_audit.package_index import PackageUpdateIndex
 from chroma_core.models import ManagedHost
 from chroma_core.services import ChromaService, log_register
 from chroma_core.services.queue import AgentRxQueue
@@ -20,6 +21,7 @@ class Service(ChromaService):
     def __init__(self):
         self._queue = AgentRxQueue(Service.PLUGIN_NAME)
         self._queue.purge()
+        self._package_index = PackageUpdateIndex()
 
     def run(self):
         super(Service, self).run()
@@ -29,7 +31,7 @@ class Service(ChromaService):
     def on_data(self, fqdn, data):
         try:
             host = ManagedHost.objects.get(fqdn=fqdn)
-            UpdateScan().run(host.id, data)
+            UpdateScan(self._package_index).run(host.id, data)
         except Exception:
             log.error("Error handling lustre message: %s", "\n".join(traceback.format_exception(*(sys.exc_info()))))
 
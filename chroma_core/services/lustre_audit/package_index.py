@@ -0,0 +1,139 @@
+# Copyright (c) 2018 DDN. All rights reserved.
+# Use of this source code is governed by a MIT-style
+# license that can be found in the LICENSE file.
+
+
+import time
+
+from chroma_core.models import ServerProfilePackage
+from chroma_core.services import log_register
+from iml_common.lib.package_version_info import VersionInfo
+
+
+log = log_register(__name__)
+
+
+def _versions_key(package_versions):
+    # Versions are reported as lists of (EPOCH, VERSION, RELEASE, ARCH)
+    return tuple(tuple(version) for version in package_versions)
+
+
+class PackageUpdateIndex(object):
+    """
+    Whether hosts need updating, from the package reports that they send.
+
+    Hundreds of hosts share a server profile and see the same repos, so most reports
+    ask the same question.  The package lists of each profile, the latest version
+    of each package list by arch, and the answer for each distinct report (the
+    parts of it which concern the profile's packages) are kept, so that only
+    the first host to send a report does the version comparisons.
+    """
+
+    # Reload profile package lists this often, so that changes from upgrades are noticed
+    REFRESH_INTERVAL = 60
+
+    # Start again rather than grow without limit if reports keep changing
+    MAX_ENTRIES = 10000
+
+    def __init__(self):
+        # Profile name to (loaded at, list of package names)
+        self._profile_packages = {}
+
+        # Versions key to {arch: latest VersionInfo}
+        self._latest = {}
+
+        # (profile name, report fingerprint) to (needs update, reason)
+        self._results = {}
+
+    def _get_profile_packages(self, server_profile_id):
+        loaded_at, package_names = self._profile_packages.get(server_profile_id, (None, None))
+        if loaded_at is None or time.time() - loaded_at > self.REFRESH_INTERVAL:
+            package_names = list(
+                ServerProfilePackage.objects.filter(server_profile_id=server_profile_id)
+                .order_by("id")
+                .values_list("package_name", flat=True)
+            )
+            self._profile_packages[server_profile_id] = (time.time(), package_names)
+
+        return package_names
+
+    def _get_latest(self, versions_key):
+        try:
+            return self._latest[versions_key]
+        except KeyError:
+            if len(self._latest) >= self.MAX_ENTRIES:
+                self._latest.clear()
+
+            latest = {}
+            for version in versions_key:
+                version_info = VersionInfo(*version)
+                if version_info.arch not in latest or version_info > latest[version_info.arch]:
+                    latest[version_info.arch] = version_info
+
+            self._latest[versions_key] = latest
+            return latest
+
+    def _evaluate(self, package_names, packages):
+        """
+        An update is required if:
+         * A package is installed on the storage server for which there is a more recent version
+           available on the manager
+         or
+         * A package is available on the manager, and specified in the server's profile's list of
+           packages, but is not installed on the storage server.
+        """
+        for package_name, package_data in zip(package_names, packages):
+            if package_data is None:
+                continue
+
+            installed_key, available_key = package_data
+            if not installed_key:
+                return True, "Update available (not installed): %s" % package_name
+
+            max_installed_version = self._get_latest(installed_key)
+            for arch, available_info in self._get_latest(available_key).items():
+                max_inst = max_installed_version.get(arch)
+                if max_inst is not None and available_info > max_inst:
+                    return True, "Update needed: %s (%s > %s)" % (package_name, available_info, max_inst)
+
+        return False, None
+
+    def needs_update(self, host, package_report):
+        """
+        :param host: The ManagedHost which sent the report
+        :param package_report: The 'packages' of the host's report, a dict of repo to package name
+                               to installed and available versions
+        :return: True if the host has packages to update
+        """
+        package_names = self._get_profile_packages(host.server_profile_id) if host.server_profile_id else []
+
+        repos = package_report.keys()
+        packages = []
+        for package_name in package_names:
+            package_data = None
+            for repo in repos:
+                try:
+                    package_data = package_report[repo][package_name]
+                except KeyError:
+                    continue
+                break
+
+            if not package_data:
+                log.warning("Required Package %s not available for %s" % (package_name, host))
+                packages.append(None)
+            else:
+                packages.append((_versions_key(package_data["installed"]), _versions_key(package_data["available"])))
+
+        fingerprint = (host.server_profile_id, tuple(package_names), tuple(packages))
+        try:
+            updates, reason = self._results[fingerprint]
+        except KeyError:
+            if len(self._results) >= self.MAX_ENTRIES:
+                self._results.clear()
+
+            updates, reason = self._results[fingerprint] = self._evaluate(package_names, packages)
+
+        if reason:
+            log.info("%s on %s" % (reason, host))
+
+        return updates
@@ -23,7 +23,7 @@ from django.db import transaction
 from chroma_core.lib.storage_plugin.api.resources import LogicalDrive, LogicalDriveSlice
 from chroma_core.lib.storage_plugin.base_plugin import BaseStoragePlugin
 
-from chroma_core.lib.storage_plugin.query import ResourceQuery
+from chroma_core.lib.storage_plugin.query import ResourceQuery, RecordGraph
 
 from chroma_core.services.job_scheduler.job_scheduler_client import JobSchedulerClient
 from chroma_core.lib.storage_plugin.api import attributes, relations
@@ -1105,23 +1105,19 @@ class ResourceManager(object):
                     del self._active_alerts[(record_pk, alert_class)]
 
     def _get_descendents(self, record_global_pk):
-        def collect_children(resource_id):
-            result = set()
-            child_record_ids = self._edges.get_children(resource_id)
-            result = result | set(child_record_ids)
-            for c in child_record_ids:
-                result = result | collect_children(c)
-            return result
-
-        return list(collect_children(record_global_pk))
+        return list(RecordGraph(self._edges).descendants([record_global_pk])[record_global_pk])
 
     # FIXME: the alert propagation and unpropagation should happen with the AlertState
     # raise/lower in a transaction.
     def _persist_alert_propagate(self, alert_state):
         record_global_pk = alert_state.alert_item_id
-        descendents = self._get_descendents(record_global_pk)
-        for d in descendents:
-            sap, created = StorageAlertPropagated.objects.get_or_create(storage_resource_id=d, alert_state=alert_state)
+        descendents = set(self._get_descendents(record_global_pk))
+        descendents -= set(
+            StorageAlertPropagated.objects.filter(alert_state=alert_state).values_list("storage_resource_id", flat=True)
+        )
+        StorageAlertPropagated.objects.bulk_create(
+            [StorageAlertPropagated(storage_resource_id=d, alert_state=alert_state) for d in descendents]
+        )
 
     def _persist_alert_unpropagate(self, alert_state):
         StorageAlertPropagated.objects.filter(alert_state=alert_state).delete()
@@ -1400,20 +1396,21 @@ class ResourceManager(object):
         # Must be run in a transaction to avoid leaving invalid things in the DB on failure.
         assert not transaction.get_autocommit()
 
-        # Sort the resources into an order based on ResourceReference
-        # attributes, such that the referenced resource is created
-        # before the referencing resource.
-        ordered_for_creation = []
+        def has_record(resource):
+            # The _handle_global case is a bit of _a weird one: it covers a plugin session
+            # being given a root resource that had some ResourceReference attributes
+            # that pointed to resources from a different plugin
+            return resource._handle_global or resource._handle in session.local_id_to_global_id
 
-        def order_by_references(resource):
-            if resource._handle_global:
-                # Bit of _a weird one: this covers the case where a plugin session
-                # was given a root resource that had some ResourceReference attributes
-                # that pointed to resources from a different plugin
-                return False
+        # Sort the resources into levels based on ResourceReference attributes, such
+        # that a referenced resource is in an earlier level than the referencing resource.
+        # A resource's ID may include the global ID of a resource it refers to, so the
+        # records for each level are created before the IDs of the next level are known.
+        levels = {}
 
-            if resource._handle in session.local_id_to_global_id:
-                return False
+        def level_by_references(resource):
+            if resource in levels:
+                return levels[resource]
 
             resource_class, resource_class_id = storage_plugin_manager.get_plugin_resource_class(
                 resource.__class__.__module__, resource.__class__.__name__
@@ -1421,88 +1418,54 @@ class ResourceManager(object):
 
             # Find any ResourceReference attributes ensure that the target
             # resource gets constructed before this one
+            level = 0
             for key, value in resource._storage_dict.items():
                 # Special case for ResourceReference attributes, because the resource
                 # object passed from the plugin won't have a global ID for the referenced
                 # resource -- we have to do the lookup inside ResourceManager
                 attribute_obj = resource_class.get_attribute_properties(key)
                 if isinstance(attribute_obj, attributes.ResourceReference):
-                    if value:
-                        referenced_resource = value
-                        if not referenced_resource._handle_global:
-                            if not referenced_resource._handle in session.local_id_to_global_id:
-                                order_by_references(referenced_resource)
+                    if value and not has_record(value):
+                        level = max(level, level_by_references(value) + 1)
 
-            if not resource in ordered_for_creation:
-                ordered_for_creation.append(resource)
+            levels[resource] = level
+            ordered_for_creation.append(resource)
+            return level
 
+        ordered_for_creation = []
         for resource in resources:
-            if not resource in ordered_for_creation:
-                order_by_references(resource)
+            if not has_record(resource):
+                level_by_references(resource)
 
-        # Create StorageResourceRecords for any resources which
-        # do not already have one, and update the local_id_to_global_id
-        # map with the DB ID for each resource.
+        # Create StorageResourceRecords for any resources which do not already have one,
+        # a level at a time, and update the local_id_to_global_id map with the DB ID
+        # for each resource.
         creations = {}
-        for resource in ordered_for_creation:
-            if isinstance(resource._meta.identifier, BaseScopedId):
-                scope_id = session.scannable_id
-            elif isinstance(resource._meta.identifier, BaseGlobalId):
-                scope_id = None
-            else:
-                raise NotImplementedError
-
-            resource_class, resource_class_id = storage_plugin_manager.get_plugin_resource_class(
-                resource.__class__.__module__, resource.__class__.__name__
+        for level in sorted(set(levels.values())):
+            creations.update(
+                self._persist_new_records(session, [r for r in ordered_for_creation if levels[r] == level])
             )
 
-            id_tuple = resource.id_tuple()
-            cleaned_id_items = []
-            for t in id_tuple:
-                if isinstance(t, BaseStorageResource):
-                    cleaned_id_items.append(session.local_id_to_global_id[t._handle])
-                else:
-                    cleaned_id_items.append(t)
-
-            id_str = json.dumps(tuple(cleaned_id_items))
-
-            record, created = StorageResourceRecord.objects.get_or_create(
-                resource_class_id=resource_class_id, storage_id_str=id_str, storage_id_scope_id=scope_id
-            )
-
-            session.local_id_to_global_id[resource._handle] = record.pk
-            session.global_id_to_local_id[record.pk] = resource._handle
-            self._label_cache[record.id] = resource.get_label()
-
-            if created:
-                # Record a user-visible event
-                log.debug(
-                    "ResourceManager._persist_new_resource[%s] %s %s %s"
-                    % (session.scannable_id, created, record.pk, resource._handle)
-                )
-
-            creations[resource] = (record, created)
-
-            # Add the new record to the index so that future records and resolve their
-            # provide/subscribe relationships with respect to it
-            self._subscriber_index.add_resource(record.pk, resource)
+        log.debug(
+            "ResourceManager._persist_new_resources[%s] %s resources, %s new records"
+            % (session.scannable_id, len(creations), len([c for r, c in creations.values() if c]))
+        )
 
-            self._class_index.add_record(record.pk, resource_class)
+        # GlobalId resources are reported by every scannable which sees them
+        reported_by = []
+        for resource in ordered_for_creation:
+            record, created = creations[resource]
+            if isinstance(resource._meta.identifier, BaseGlobalId) and session.scannable_id != record.id:
+                reported_by.append((record.id, session.scannable_id))
+        reported_by_through = StorageResourceRecord.reported_by.through
+        for record_id, scannable_id in self._add_record_relations(reported_by_through, reported_by):
+            log.debug("saw GlobalId resource %s from scope %s for the first time" % (record_id, scannable_id))
 
         # Update or create attribute records
         attr_classes = set()
         for resource in ordered_for_creation:
             record, created = creations[resource]
 
-            if isinstance(resource._meta.identifier, BaseGlobalId) and session.scannable_id != record.id:
-                try:
-                    record.reported_by.get(pk=session.scannable_id)
-                except StorageResourceRecord.DoesNotExist:
-                    log.debug(
-                        "saw GlobalId resource %s from scope %s for the first time" % (record.id, session.scannable_id)
-                    )
-                    record.reported_by.add(session.scannable_id)
-
             resource_class = storage_plugin_manager.get_resource_class_by_id(record.resource_class_id)
 
             attrs = {}
@@ -1522,32 +1485,43 @@ class ResourceManager(object):
                     attrs[key] = value
 
             for key, val in attrs.items():
-                resource_class = storage_plugin_manager.get_resource_class_by_id(record.resource_class_id)
-
-                # Try to update an existing record
                 attr_model_class = resource_class.attr_model_class(key)
 
-                updated = attr_model_class.objects.filter(resource=record, key=key).update(
-                    value=attr_model_class.encode(val)
-                )
+                # Try to update an existing record: a new record has none
+                if not created:
+                    updated = attr_model_class.objects.filter(resource=record, key=key).update(
+                        value=attr_model_class.encode(val)
+                    )
+                    if updated:
+                        continue
 
-                # If there was no existing record, create one
-                if not updated:
-                    delayed_attr_model_class = DelayedContextFrom(attr_model_class)
+                # There was no existing record, create one
+                delayed_attr_model_class = DelayedContextFrom(attr_model_class)
 
-                    attr_classes.add(delayed_attr_model_class)
+                attr_classes.add(delayed_attr_model_class)
 
-                    if issubclass(attr_model_class, StorageResourceAttributeSerialized):
-                        data = dict(resource_id=record.id, key=key, value=attr_model_class.encode(val))
-                    else:
-                        data = dict(resource_id=record.id, key=key, value_id=attr_model_class.encode(val))
+                if issubclass(attr_model_class, StorageResourceAttributeSerialized):
+                    data = dict(resource_id=record.id, key=key, value=attr_model_class.encode(val))
+                else:
+                    data = dict(resource_id=record.id, key=key, value_id=attr_model_class.encode(val))
 
-                    delayed_attr_model_class.insert(data)
+                delayed_attr_model_class.insert(data)
 
         [x.item_cache.flush() for x in attr_classes]
 
+        # Now that all of the records exist, add them to the indices in one pass, so
+        # that new resources can resolve their provide/subscribe relationships with
+        # respect to each other as well as to existing records.
+        for resource in ordered_for_creation:
+            record, created = creations[resource]
+            resource_class = storage_plugin_manager.get_resource_class_by_id(record.resource_class_id)
+            self._label_cache[record.id] = resource.get_label()
+            self._subscriber_index.add_resource(record.pk, resource)
+            self._class_index.add_record(record.pk, resource_class)
+
         # Find out if new resources match anything in SubscriberIndex and create
-        # relationships if so.
+        # relationships if so.  Edges go from child to parent.
+        edges = []
         logicaldrives_with_new_descendents = []
         for resource in ordered_for_creation:
             record, created = creations[resource]
@@ -1560,9 +1534,7 @@ class ResourceManager(object):
                     if s == record.pk:
                         continue
                     log.info("Linked up me %s as parent of %s" % (record.pk, s))
-                    self._edges.add_parent(s, record.pk)
-                    s_record = StorageResourceRecord.objects.get(pk=s)
-                    s_record.parents.add(record.pk)
+                    edges.append((s, record.pk))
                     if isinstance(resource, LogicalDrive):
                         # A new LogicalDrive ancestor might affect the labelling
                         # of another LogicalDrive's Volume.
@@ -1576,23 +1548,18 @@ class ResourceManager(object):
                     if p == record.pk:
                         continue
                     log.info("Linked up %s as parent of me, %s" % (p, record.pk))
-                    self._edges.add_parent(record.pk, p)
-                    record.parents.add(p)
+                    edges.append((record.pk, p))
 
-        # Update EdgeIndex and StorageResourceRecord.parents
+        # Parents reported by the plugin
         for resource in resources:
-            try:
-                record, created = creations[resource]
-            except KeyError:
-                record = StorageResourceRecord.objects.get(pk=session.local_id_to_global_id[resource._handle])
-
-            # Update self._edges
+            record_id = session.local_id_to_global_id[resource._handle]
             for p in resource._parents:
-                parent_global_id = session.local_id_to_global_id[p._handle]
-                self._edges.add_parent(record.id, parent_global_id)
+                edges.append((record_id, session.local_id_to_global_id[p._handle]))
 
-            new_parent_pks = [session.local_id_to_global_id[p._handle] for p in resource._parents]
-            record.parents.add(*new_parent_pks)
+        # Update StorageResourceRecord.parents and the EdgeIndex
+        self._add_record_relations(StorageResourceRecord.parents.through, edges)
+        for child, parent in edges:
+            self._edges.add_parent(child, parent)
 
         # For any LogicalDrives we created that have been hooked up via SubscriberIndex,
         # see if their presence should change the name of a Volume
@@ -1606,12 +1573,117 @@ class ResourceManager(object):
                         Volume.objects.filter(storage_resource=descendent_ld).update(label=self.get_label(ld_id))
 
         # Create StorageResourceLearnEvent for anything we found new
-        for resource in creations:
-            record, created = creations[resource]
+        if hasattr(session, "host_id"):
+            host = None
+            for resource in creations:
+                record, created = creations[resource]
 
-            if created and hasattr(session, "host_id"):
-                StorageResourceLearnEvent.register_event(
-                    severity=logging.INFO,
-                    alert_item=ManagedHost.objects.get(id=getattr(session, "host_id")),
-                    storage_resource=record,
-                )
+                if created:
+                    if host is None:
+                        host = ManagedHost.objects.get(id=getattr(session, "host_id"))
+
+                    StorageResourceLearnEvent.register_event(
+                        severity=logging.INFO, alert_item=host, storage_resource=record
+                    )
+
+    def _persist_new_records(self, session, resources):
+        """
+        Find or create the StorageResourceRecords for resources which do not refer to each other,
+        with one query to find those which exist, and one to create the rest.
+
+        :return: A dict of resource to (record, created)
+        """
+        from chroma_core.lib.storage_plugin.manager import storage_plugin_manager
+
+        resource_keys = {}
+        for resource in resources:
+            if isinstance(resource._meta.identifier, BaseScopedId):
+                scope_id = session.scannable_id
+            elif isinstance(resource._meta.identifier, BaseGlobalId):
+                scope_id = None
+            else:
+                raise NotImplementedError
+
+            resource_class, resource_class_id = storage_plugin_manager.get_plugin_resource_class(
+                resource.__class__.__module__, resource.__class__.__name__
+            )
+
+            id_tuple = resource.id_tuple()
+            cleaned_id_items = []
+            for t in id_tuple:
+                if isinstance(t, BaseStorageResource):
+                    cleaned_id_items.append(session.local_id_to_global_id[t._handle])
+                else:
+                    cleaned_id_items.append(t)
+
+            resource_keys[resource] = (resource_class_id, json.dumps(tuple(cleaned_id_items)), scope_id)
+
+        def find_records(keys):
+            found = {}
+            for record in StorageResourceRecord.objects.filter(
+                storage_id_str__in=set(key[1] for key in keys),
+                resource_class_id__in=set(key[0] for key in keys),
+            ).filter(Q(storage_id_scope_id=session.scannable_id) | Q(storage_id_scope__isnull=True)):
+                key = (record.resource_class_id, record.storage_id_str, record.storage_id_scope_id)
+                if key in keys:
+                    found[key] = record
+            return found
+
+        keys = set(resource_keys.values())
+        records = find_records(keys)
+
+        new_keys = keys - set(records.keys())
+        if new_keys:
+            StorageResourceRecord.objects.bulk_create(
+                [
+                    StorageResourceRecord(
+                        resource_class_id=resource_class_id, storage_id_str=id_str, storage_id_scope_id=scope_id
+                    )
+                    for resource_class_id, id_str, scope_id in new_keys
+                ]
+            )
+            # bulk_create does not give us the IDs of the new records
+            records.update(find_records(new_keys))
+
+        creations = {}
+        for resource in resources:
+            key = resource_keys[resource]
+            record = records[key]
+            # Only the first of any resources with the same ID created the record
+            created = key in new_keys
+            new_keys.discard(key)
+
+            session.local_id_to_global_id[resource._handle] = record.pk
+            session.global_id_to_local_id[record.pk] = resource._handle
+            creations[resource] = (record, created)
+
+        return creations
+
+    @staticmethod
+    def _add_record_relations(through, pairs):
+        """
+        Add rows to one of StorageResourceRecord's many to many tables in bulk, skipping those which exist
+
+        :param through: The through model of the relation
+        :param pairs: (from record ID, to record ID) for each row
+        :return: The pairs which were added
+        """
+        pairs = set(pairs)
+        if not pairs:
+            return set()
+
+        existing = set(
+            through.objects.filter(
+                from_storageresourcerecord_id__in=set(from_id for from_id, to_id in pairs)
+            ).values_list("from_storageresourcerecord_id", "to_storageresourcerecord_id")
+        )
+
+        new_pairs = pairs - existing
+        through.objects.bulk_create(
+            [
+                through(from_storageresourcerecord_id=from_id, to_storageresourcerecord_id=to_id)
+                for from_id, to_id in new_pairs
+            ]
+        )
+
+        return new_pairs
@@ -4,11 +4,15 @@
 
 
 from collections import defaultdict
+import functools
 import threading
-from Queue import Queue
+import traceback
+from Queue import Queue, Empty
 
 from django.db import transaction
 
+import settings
+
 from chroma_core.lib.util import CommandLine, CommandError
 from chroma_core.services.log import log_register
 from chroma_core.models import PowerControlDevice, PowerControlDeviceOutlet
@@ -24,8 +28,10 @@ class PowerControlManager(CommandLine):
         # Per-device locks
         self._device_locks = defaultdict(threading.Lock)
         self._power_devices = {}
-        # Allow us to communicate with our monitoring threads
-        self.monitor_task_queue = defaultdict(Queue)
+        # Tasks for the monitor daemon, as (sockaddr, (task, kwargs)), and an event
+        # which is set to wake the monitor daemon when there is something for it to do
+        self._monitor_tasks = []
+        self.monitor_wakeup = threading.Event()
 
         self._refresh_power_devices()
 
@@ -41,13 +47,15 @@ class PowerControlManager(CommandLine):
         with self._lock:
             return self._power_devices
 
-    def get_monitor_tasks(self, sockaddr):
+    def pop_monitor_tasks(self):
         with self._lock:
-            return self.monitor_task_queue[sockaddr]
+            tasks, self._monitor_tasks = self._monitor_tasks, []
+            return tasks
 
     def add_monitor_task(self, sockaddr, task):
         with self._lock:
-            self.monitor_task_queue[sockaddr].put(task)
+            self._monitor_tasks.append((sockaddr, task))
+        self.monitor_wakeup.set()
 
     def register_device(self, device_id):
         device = PowerControlDevice.objects.get(pk=device_id)
@@ -139,28 +147,114 @@ class PowerControlManager(CommandLine):
                 return False
             return True
 
+    def _run_device_operations(self, operations):
+        """
+        Run an operation on each of a number of devices concurrently, at most
+        POWER_CONTROL_MAX_PARALLEL_DEVICES at a time.  Each operation holds its
+        device's lock, so operations on the same device are still run one at a time.
+
+        Operations are run on other threads, so must not use the database.
+
+        :param operations: A list of (device, fn), fn is called with no arguments
+        :return: A list of the operations' results, in the same order
+        """
+        results = [None] * len(operations)
+        errors = []
+        pending = Queue()
+        for index in range(len(operations)):
+            pending.put(index)
+
+        def run_operations():
+            while True:
+                try:
+                    index = pending.get_nowait()
+                except Empty:
+                    return
+
+                device, fn = operations[index]
+                try:
+                    with self._device_locks[device.sockaddr]:
+                        results[index] = fn()
+                except Exception as e:
+                    log.error("Operation on %s failed: %s" % (device, traceback.format_exc()))
+                    errors.append(e)
+
+        workers = [
+            threading.Thread(target=run_operations, name="power-control-%s" % i)
+            for i in range(min(len(operations), settings.POWER_CONTROL_MAX_PARALLEL_DEVICES) - 1)
+        ]
+        for worker in workers:
+            worker.start()
+
+        # The calling thread does its share, which is all of it when there is one device
+        run_operations()
+
+        for worker in workers:
+            worker.join()
+
+        if errors:
+            raise errors[0]
+
+        return results
+
+    def _update_outlets_power(self, has_power):
+        """
+        :param has_power: A dict of outlet id to its new has_power
+        """
+        outlet_ids = defaultdict(list)
+        for outlet_id, power in has_power.items():
+            outlet_ids[power].append(outlet_id)
+
+        for power, ids in outlet_ids.items():
+            PowerControlDeviceOutlet.objects.filter(id__in=ids).update(has_power=power)
+
     @transaction.atomic
     def toggle_device_outlets(self, toggle_state, outlet_ids):
         state_commands = {"on": "poweron_command", "off": "poweroff_command", "reboot": "powercycle_command"}
 
+        outlets = PowerControlDeviceOutlet.objects.select_related("device__device_type").in_bulk(outlet_ids)
+        missing = set(outlet_ids) - set(outlets.keys())
+        if missing:
+            raise PowerControlDeviceOutlet.DoesNotExist("Outlets %s not found" % sorted(missing))
+
+        # Each device's outlets, in the order they were given in
+        devices = {}
+        device_outlets = defaultdict(list)
         for outlet_id in outlet_ids:
-            outlet = PowerControlDeviceOutlet.objects.select_related("device").get(pk=outlet_id)
-            device = outlet.device
-            command = getattr(device, state_commands[toggle_state])
+            outlet = outlets[outlet_id]
+            devices.setdefault(outlet.device_id, outlet.device)
+            device_outlets[outlet.device_id].append(outlet)
 
-            with self._device_locks[device.sockaddr]:
+        def toggle(device, outlets):
+            command = getattr(device, state_commands[toggle_state])
+            has_power = {}
+            for outlet in outlets:
                 try:
                     stdout = self.try_shell(command(outlet.identifier))[1]
                     log.info("Toggled %s:%s -> %s: %s" % (device, outlet.identifier, toggle_state, stdout))
-                    has_power = toggle_state in ("on", "reboot")
+                    has_power[outlet.id] = toggle_state in ("on", "reboot")
                 except CommandError as e:
                     log.error("Failed to toggle %s:%s -> %s: %s" % (device, outlet.identifier, toggle_state, e.stderr))
-                    has_power = None
-                PowerControlDeviceOutlet.objects.filter(id=outlet.id).update(has_power=has_power)
+                    has_power[outlet.id] = None
+            return has_power
+
+        results = self._run_device_operations(
+            [
+                (device, functools.partial(toggle, device, device_outlets[device_id]))
+                for device_id, device in devices.items()
+            ]
+        )
+
+        has_power = {}
+        for result in results:
+            has_power.update(result)
+        self._update_outlets_power(has_power)
 
     @transaction.atomic
     def query_device_outlets(self, device_id):
         device = PowerControlDevice.objects.select_related().get(pk=device_id)
+        outlets = list(device.outlets.order_by("identifier"))
+        has_power = {}
 
         # With HYD-2089 landed, we can query PDU outlet states in one
         # shot, rather than sequentially.
@@ -171,21 +265,22 @@ class PowerControlManager(CommandLine):
         with self._device_locks[device.sockaddr]:
             if device.is_ipmi:
                 # IPMI -- query sequentially
-                for outlet in device.outlets.order_by("identifier"):
+                for outlet in outlets:
                     rc, stdout, stderr = self.shell(device.outlet_query_command(outlet.identifier))
 
                     # These RCs seem to be common across agents.
                     # Verified: fence_apc, fence_wti, fence_xvm
-                    has_power = {0: True, 2: False}.get(rc)
-                    if has_power is None:
+                    has_power[outlet.id] = {0: True, 2: False}.get(rc)
+                    if has_power[outlet.id] is None:
                         log.error(
                             "Unknown outlet state for %s:%s:%s: %s %s %s"
                             % (device.sockaddr + tuple([outlet.identifier, rc, stdout, stderr]))
                         )
                     log.debug("Learned outlet %s on %s:%s" % (tuple([outlet]) + device.sockaddr))
-                    PowerControlDeviceOutlet.objects.filter(id=outlet.id).update(has_power=has_power)
             else:
                 # PDU -- one-shot query
+                outlets_by_identifier = dict((outlet.identifier, outlet) for outlet in outlets)
+
                 rc, stdout, stderr = self.try_shell(device.outlet_list_command())
                 for line in stdout.split("\n"):
                     try:
@@ -196,17 +291,18 @@ class PowerControlManager(CommandLine):
                         continue
 
                     try:
-                        outlet = [o for o in device.outlets.all() if o.identifier == id][0]
-                    except IndexError:
+                        outlet = outlets_by_identifier[id]
+                    except KeyError:
                         log.debug("Skipping unknown outlet %s:%s:%s" % (device.sockaddr + tuple([id])))
                         continue
 
-                    has_power = {"ON": True, "OFF": False}.get(status)
-                    if has_power is None:
+                    has_power[outlet.id] = {"ON": True, "OFF": False}.get(status)
+                    if has_power[outlet.id] is None:
                         log.error(
                             "Unknown outlet state for %s:%s:%s: %s %s %s"
                             % (device.sockaddr + tuple([id, rc, stdout, stderr]))
                         )
 
                     log.debug("Learned outlet %s on %s:%s" % (tuple([outlet]) + device.sockaddr))
-                    PowerControlDeviceOutlet.objects.filter(id=outlet.id).update(has_power=has_power)
+
+        self._update_outlets_power(has_power)
@@ -3,13 +3,17 @@
 # license that can be found in the LICENSE file.
 
 
+import heapq
+import random
+import time
 import traceback
 import threading
 import Queue
 
+from chroma_core.services.executor import Executor
 from chroma_core.services.log import log_register
 from chroma_core.models import PowerControlDevice, PowerControlDeviceUnavailableAlert, IpmiBmcUnavailableAlert
-from settings import DISABLE_POWER_CONTROL_DEVICE_MONITORING
+from settings import DISABLE_POWER_CONTROL_DEVICE_MONITORING, POWER_CONTROL_MONITOR_MAX_WORKERS
 
 
 log = log_register(__name__.split(".")[-1])
@@ -17,145 +21,235 @@ log = log_register(__name__.split(".")[-1])
 # time, in seconds, between PDU monitor operations
 MONITORING_INTERVAL = 30
 
+# Each device's checks are spread randomly by up to this fraction of MONITORING_INTERVAL, so
+# that devices which were registered together are not all checked at once.
+MONITORING_JITTER = 0.1
 
-class PowerDeviceMonitor(threading.Thread):
+
+class PowerDeviceMonitor(object):
     """
-    Instances of this class do double-duty: Their primary mission in life is
-    to watch an assigned PDU and raise Alerts if the PDU becomes unmonitorable.
-    As a secondary duty, they handle asynchronous tasks for the manager:
-    slowish, fiddly things like querying a PDU's outlet states, etc.
+    Watch an assigned PDU, or the BMCs of an IPMI pseudo-PDU, and raise Alerts
+    if it becomes unmonitorable.
+
+    Alerts are only notified when a device's availability changes from what
+    we last notified, so that a healthy device costs nothing but the check.
     """
 
     def __init__(self, device, power_control_manager):
-        super(PowerDeviceMonitor, self).__init__()
         self.device = device
         self._manager = power_control_manager
-        self._stopping = threading.Event()
-        self._interval_ctr = 0
 
-    def run(self):
-        try:
-            self._run()
-        finally:
-            # Make sure we always clean up.
-            # HYD-1918: Refactor this kludgy mess so that these threads don't
-            # get DB access and therefore don't need to clean up.
-            import django.db
+        # When the next check is due, and whether a check is queued or running
+        self.deadline = None
+        self.checking = False
 
-            if django.db.connection.connection:
-                django.db.connection.close()
+        # The availability we last notified, by alert item
+        self._available = {}
 
-    def _run_manager_tasks(self):
-        try:
-            task, kwargs = self._manager.get_monitor_tasks(self.device.sockaddr).get_nowait()
-            log.debug("Found task for %s:%s: %s" % (self.device.sockaddr + tuple([task])))
-            if task == "stop":
-                self.stop()
-            else:
-                getattr(self._manager, task)(**kwargs)
-            log.debug("Ran %s for %s:%s" % (tuple([task]) + self.device.sockaddr))
-        except Queue.Empty:
-            pass
-        except PowerControlDevice.DoesNotExist:
-            log.error("Attempted to run %s on %s, but it no longer exists" % (task, self.device))
-            self.stop()
-        except Exception as e:
-            log.error("Caught and re-raising exception: %s" % traceback.format_exc())
-            raise e
+    def schedule(self, first=False):
+        if first:
+            interval = random.uniform(0, MONITORING_INTERVAL)
+        else:
+            interval = MONITORING_INTERVAL * random.uniform(1 - MONITORING_JITTER, 1 + MONITORING_JITTER)
 
-    def _check_monitored_device(self):
-        if DISABLE_POWER_CONTROL_DEVICE_MONITORING:
-            return
+        self.deadline = time.time() + interval
 
+    def check(self):
+        """
+        Check that we can log into the PDU (or each BMC) and that it is responsive to commands.
+
+        :return: A dict of alert item to availability, for the items whose availability has changed
+        """
         if self.device.is_ipmi:
-            # Check to see if we can log into each BMC and that they're
-            # responsive to commands.
-            bmc_states = self._manager.check_bmc_availability(self.device)
-            for bmc in bmc_states:
-                if PowerControlDevice.objects.filter(id=self.device.id, not_deleted=True).exists():
-                    IpmiBmcUnavailableAlert.notify(bmc, not bmc_states[bmc])
+            states = self._manager.check_bmc_availability(self.device)
         else:
-            # Check to see if we can log into the PDU and that it's
-            # responsive to commands.
             available = self._manager.check_device_availability(self.device)
-            if available or PowerControlDevice.objects.filter(id=self.device.id, not_deleted=True).exists():
-                PowerControlDeviceUnavailableAlert.notify(self.device, not available)
             log.debug(
                 "Checked on %s:%s: %s" % (self.device.sockaddr + tuple(["available" if available else "unavailable"]))
             )
+            states = {self.device: available}
 
-    def _run(self):
-        log.info("Starting monitor for %s" % self.device)
+        return dict((item, available) for item, available in states.items() if self._available.get(item) != available)
 
-        while not self._stopping.is_set():
-            # Check to see if the manager has scheduled something for
-            # us to do besides monitoring.
-            self._run_manager_tasks()
+    def notify(self, changes):
+        # Note that for IPMI the notification goes to the BMC (PowerControlDeviceOutlet
+        # instance), not the pseudo-PDU device
+        alert_class = IpmiBmcUnavailableAlert if self.device.is_ipmi else PowerControlDeviceUnavailableAlert
 
-            if self._interval_ctr >= MONITORING_INTERVAL:
-                self._interval_ctr = 0
-                self._check_monitored_device()
+        for item, available in changes.items():
+            alert_class.notify(item, not available)
+            self._available[item] = available
 
-            self._interval_ctr += 1
-            self._stopping.wait(timeout=1)
+    def _check_monitored_device(self):
+        if DISABLE_POWER_CONTROL_DEVICE_MONITORING:
+            return
 
-    def stop(self):
-        log.info("Stopping monitor for %s" % self.device)
-        self._stopping.set()
+        changes = self.check()
+        if changes and PowerControlDevice.objects.filter(id=self.device.id, not_deleted=True).exists():
+            self.notify(changes)
 
 
 class PowerMonitorDaemon(object):
+    """
+    Schedule the monitoring of every power device, and the asynchronous tasks
+    which the manager asks for (slowish, fiddly things like querying a PDU's
+    outlet states), on a bounded pool of workers.
+
+    With IPMI every server is its own device, so rather than a thread (and a
+    database connection) per device, devices are kept in a heap ordered by when
+    their next check is due, and this thread sleeps until then or until the
+    manager adds a task.  Workers only run the checks: the results come back
+    here, so that the devices whose availability has changed can be checked
+    for deletion in one query before their alerts are notified.
+    """
+
     def __init__(self, power_control_manager):
         self._manager = power_control_manager
         self._stopping = threading.Event()
+        self._wakeup = power_control_manager.monitor_wakeup
 
-        self.device_monitors = {}
+        # Outlet queries and other tasks are taken before periodic checks
+        self._executor = Executor("power_monitor", POWER_CONTROL_MONITOR_MAX_WORKERS, reserved_workers=1)
+
+        # (deadline, sockaddr) for each monitor, entries which are out of date are skipped
+        self._deadlines = []
+
+        # (monitor, changes) from completed checks
+        self._results = Queue.Queue()
 
-        for sockaddr, device in self._manager.power_devices.items():
-            self.device_monitors[sockaddr] = PowerDeviceMonitor(device, self._manager)
+        self.device_monitors = {}
+        self._sync_devices()
 
         log.info("Found %d power devices to monitor" % len(self.device_monitors))
 
+    def _sync_devices(self):
+        power_devices = self._manager.power_devices.copy()
+
+        # Check for new devices to monitor, or devices which have been re-registered
+        for sockaddr, device in power_devices.items():
+            monitor = self.device_monitors.get(sockaddr)
+            if monitor is not None and monitor.device is device:
+                continue
+
+            if monitor is None:
+                log.info("Found new power device: %s:%s" % sockaddr)
+
+            monitor = self.device_monitors[sockaddr] = PowerDeviceMonitor(device, self._manager)
+            monitor.schedule(first=True)
+            heapq.heappush(self._deadlines, (monitor.deadline, sockaddr))
+
+        # Check for old devices to stop monitoring
+        for sockaddr in self.device_monitors.keys():
+            if sockaddr not in power_devices:
+                log.info("Reaping monitor for old power device: %s:%s" % sockaddr)
+                del self.device_monitors[sockaddr]
+
+    def _run_task(self, sockaddr, task, kwargs):
+        if self._stopping.is_set():
+            return
+
+        try:
+            getattr(self._manager, task)(**kwargs)
+            log.debug("Ran %s for %s:%s" % (tuple([task]) + sockaddr))
+        except PowerControlDevice.DoesNotExist:
+            log.error("Attempted to run %s on %s:%s, but it no longer exists" % (tuple([task]) + sockaddr))
+
+    def _run_check(self, monitor):
+        changes = {}
+        try:
+            if not self._stopping.is_set():
+                changes = monitor.check()
+        except Exception:
+            log.error("Checking %s: %s" % (monitor.device, traceback.format_exc()))
+        finally:
+            self._results.put((monitor, changes))
+            self._wakeup.set()
+
+    def _dispatch_tasks(self):
+        for sockaddr, (task, kwargs) in self._manager.pop_monitor_tasks():
+            # Devices which are unregistered have already been reaped by _sync_devices
+            if task == "stop":
+                continue
+
+            log.debug("Found task for %s:%s: %s" % (sockaddr + tuple([task])))
+            self._executor.submit(Executor.HIGH_PRIORITY, self._run_task, sockaddr, task, kwargs)
+
+    def _dispatch_checks(self):
+        now = time.time()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, sockaddr = heapq.heappop(self._deadlines)
+            monitor = self.device_monitors.get(sockaddr)
+            if monitor is None or monitor.deadline != deadline or monitor.checking:
+                continue
+
+            monitor.checking = True
+            self._executor.submit(Executor.LOW_PRIORITY, self._run_check, monitor)
+
+    def _notify_results(self):
+        changed = []
+        while True:
+            try:
+                monitor, changes = self._results.get_nowait()
+            except Queue.Empty:
+                break
+
+            if self.device_monitors.get(monitor.device.sockaddr) is not monitor:
+                # Unregistered (or re-registered) while it was being checked
+                continue
+
+            monitor.checking = False
+            monitor.schedule()
+            heapq.heappush(self._deadlines, (monitor.deadline, monitor.device.sockaddr))
+
+            if changes:
+                changed.append((monitor, changes))
+
+        if changed:
+            existing = set(
+                PowerControlDevice.objects.filter(
+                    id__in=[monitor.device.id for monitor, changes in changed], not_deleted=True
+                ).values_list("id", flat=True)
+            )
+            for monitor, changes in changed:
+                if monitor.device.id in existing:
+                    monitor.notify(changes)
+
+    def _next_timeout(self):
+        if DISABLE_POWER_CONTROL_DEVICE_MONITORING or not self._deadlines:
+            return None
+
+        return max(0, self._deadlines[0][0] - time.time())
+
     def run(self):
         log.info("entering main loop")
 
-        for monitor in self.device_monitors.values():
-            monitor.start()
-
-        while not self._stopping.is_set():
-            # Check for new devices to monitor, or dead threads. A thread
-            # may suicide if the manager has enqueued a 'stop' task.
-            for sockaddr, device in self._manager.power_devices.items():
-                if sockaddr in self.device_monitors and not self.device_monitors[sockaddr].is_alive():
-                    log.warn("Monitor for %s:%s died, restarting" % sockaddr)
-                elif not sockaddr in self.device_monitors:
-                    log.info("Found new power device: %s:%s" % sockaddr)
-                else:
-                    continue
-                monitor = PowerDeviceMonitor(device, self._manager)
-                self.device_monitors[sockaddr] = monitor
-                monitor.start()
-
-            # Check for old devices to stop monitoring
-            for sockaddr, monitor in self.device_monitors.items():
-                if sockaddr not in self._manager.power_devices:
-                    log.info("Reaping monitor for old power device: %s:%s" % sockaddr)
-                    monitor.stop()
-                    monitor.join()
-                    del self.device_monitors[sockaddr]
-
-            self._stopping.wait(timeout=1)
-
-        for monitor in self.device_monitors.values():
-            monitor.stop()
+        try:
+            while not self._stopping.is_set():
+                # Anything which happens after this will wake us again
+                self._wakeup.clear()
+
+                self._sync_devices()
+                self._dispatch_tasks()
+                self._notify_results()
+                if not DISABLE_POWER_CONTROL_DEVICE_MONITORING:
+                    self._dispatch_checks()
+
+                self._wakeup.wait(timeout=self._next_timeout())
+        finally:
+            self._executor.shutdown(wait=False)
+
+            import django.db
+
+            if django.db.connection.connection:
+                django.db.connection.close()
 
         log.info("leaving main loop")
 
     def stop(self):
         log.info("Stopping...")
         self._stopping.set()
+        self._wakeup.set()
 
     def join(self):
         log.info("Joining...")
-        for monitor in self.device_monitors.values():
-            monitor.join()
+        self._executor.join()
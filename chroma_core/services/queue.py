@@ -33,16 +33,62 @@ class ServiceQueue(object):
 
         AcmeQueue().put({'foo': 'bar'})
 
+    Senders which put messages at a high rate should keep a persistent instance, which
+    sends everything over a single broker connection rather than connecting per message:
+    ::
+
+        acme_queue = AcmeQueue(persistent=True)
+        acme_queue.put({'foo': 'bar'})
+        ...
+        acme_queue.close()
+
     """
 
     name = None
 
     def put(self, body):
-        with _amqp_connection() as conn:
-            q = conn.SimpleQueue(
-                self.name, serializer="json", exchange_opts={"durable": False}, queue_opts={"durable": False}
-            )
-            q.put(body)
+        if self._persistent:
+            self._persistent_put(body)
+        else:
+            with _amqp_connection() as conn:
+                q = conn.SimpleQueue(
+                    self.name, serializer="json", exchange_opts={"durable": False}, queue_opts={"durable": False}
+                )
+                q.put(body)
+
+    def _persistent_put(self, body):
+        with self._producer_lock:
+            for attempt in range(0, 2):
+                if self._producer_queue is None:
+                    self._producer_connection = _amqp_connection()
+                    self._producer_queue = self._producer_connection.SimpleQueue(
+                        self.name, serializer="json", exchange_opts={"durable": False}, queue_opts={"durable": False}
+                    )
+
+                try:
+                    self._producer_queue.put(body)
+                    return
+                except self._producer_connection.connection_errors as e:
+                    # The broker connection has gone away, reconnect and retry once.
+                    self._close_producer()
+                    if attempt:
+                        raise
+                    log.warning("Reconnecting to '%s' queue after error: %s" % (self.name, e))
+
+    def _close_producer(self):
+        if self._producer_queue is not None:
+            try:
+                self._producer_queue.close()
+                self._producer_connection.release()
+            except self._producer_connection.connection_errors:
+                pass
+        self._producer_queue = None
+        self._producer_connection = None
+
+    def close(self):
+        """Release the broker connection held by a persistent instance"""
+        with self._producer_lock:
+            self._close_producer()
 
     def purge(self):
         with _amqp_connection() as conn:
@@ -51,9 +97,14 @@ class ServiceQueue(object):
             ).consumer.purge()
             log.info("Purged %s messages from '%s' queue" % (purged, self.name))
 
-    def __init__(self):
+    def __init__(self, persistent=False):
         self._stopping = threading.Event()
 
+        self._persistent = persistent
+        self._producer_lock = threading.Lock()
+        self._producer_connection = None
+        self._producer_queue = None
+
     def stop(self):
         log.info("Stopping ServiceQueue %s" % self.name)
         self._stopping.set()
@@ -18,7 +18,6 @@ import logging
 import socket
 import threading
 import uuid
-import django
 import errno
 import os
 import time
@@ -33,6 +32,9 @@ from kombu.entity import TRANSIENT_DELIVERY_MODE
 
 from chroma_core.services.log import log_register
 from chroma_core.services import _amqp_connection, _amqp_exchange, dbutils
+from chroma_core.services.executor import Executor
+
+import settings
 
 
 REQUEST_SCHEMA = {
@@ -90,12 +92,11 @@ class RpcTimeout(Exception):
     pass
 
 
-class RunOneRpc(threading.Thread):
-    """Handle a single incoming RPC in a new thread, and send the
+class RunOneRpc(object):
+    """Handle a single incoming RPC on an Executor worker thread, and send the
     response (result or exception) from the execution thread."""
 
     def __init__(self, rpc, body, response_conn_pool):
-        super(RunOneRpc, self).__init__()
         self.rpc = rpc
         self.body = body
         self._response_conn_pool = response_conn_pool
@@ -131,8 +132,6 @@ class RunOneRpc(threading.Thread):
                 "traceback": backtrace,
             }
             log.error("RunOneRpc: exception calling %s: %s" % (self.body["method"], backtrace))
-        finally:
-            django.db.connection.close()
 
         with self._response_conn_pool[_amqp_connection()].acquire(block=True) as connection:
 
@@ -159,11 +158,13 @@ class RunOneRpc(threading.Thread):
 
 
 class RpcServer(ConsumerMixin):
-    def __init__(self, rpc, connection, service_name, serialize=False):
+    def __init__(self, rpc, connection, service_name, serialize=False, executor=None):
         """
         :param rpc: A ServiceRpcInterface instance
         :param serialize: If True, then process RPCs one after another in a single thread
-        rather than running a thread for each RPC.
+        rather than running RPCs concurrently.
+        :param executor: An Executor shared with other work in this service, RPCs are submitted to
+        it at high priority.  If None then the server runs its own pool of RPC_MAX_WORKERS threads.
         """
         super(RpcServer, self).__init__()
         self.serialize = serialize
@@ -173,6 +174,11 @@ class RpcServer(ConsumerMixin):
         self.request_routing_key = "%s.requests" % self.queue_name
         self._response_conn_pool = kombu.pools.Connections(limit=RESPONSE_CONN_LIMIT)
 
+        self._own_executor = executor is None
+        if executor is None:
+            executor = Executor("%s-rpc" % service_name, 1 if serialize else settings.RPC_MAX_WORKERS)
+        self._executor = executor
+
     def get_consumers(self, Consumer, channel):
         return [
             Consumer(
@@ -195,7 +201,18 @@ class RpcServer(ConsumerMixin):
             # breaks our faith in request_id and response_routing_key
             log.error("Invalid RPC body: %s" % e)
         else:
-            RunOneRpc(self.rpc, body, self._response_conn_pool).start()
+            self._executor.submit(Executor.HIGH_PRIORITY, RunOneRpc(self.rpc, body, self._response_conn_pool).run)
+
+            queue_depth = self._executor.queue_depth
+            if queue_depth:
+                log.debug("RpcServer %s: %s RPCs waiting for a worker" % (self.queue_name, queue_depth))
+
+    def run(self, *args, **kwargs):
+        try:
+            super(RpcServer, self).run(*args, **kwargs)
+        finally:
+            if self._own_executor:
+                self._executor.shutdown()
 
     def stop(self):
         self.should_stop = True
@@ -559,9 +576,10 @@ class ServiceRpcInterface(object):
 
     """
 
-    def __init__(self, wrapped=None):
+    def __init__(self, wrapped=None, executor=None):
         self.worker = None
         self.wrapped = wrapped
+        self.executor = executor
 
         if wrapped:
             # Raise an exception if any of the declared methods don't exist
@@ -622,7 +640,7 @@ class ServiceRpcInterface(object):
 
     def run(self):
         with _amqp_connection() as connection:
-            self.worker = RpcServer(self, connection, self.__class__.__name__)
+            self.worker = RpcServer(self, connection, self.__class__.__name__, executor=self.executor)
             self.worker.run()
 
     def stop(self):
@@ -5,43 +5,13 @@
 
 from chroma_core.services import log_register
 from chroma_core.models import SyslogEvent, ClientConnectEvent, ManagedHost
+from chroma_core.models.log import LogMessage
 from django.db import transaction
 import logging
 import re
 
 syslog_events_log = log_register("syslog_events")
 
-_re_cache = {}
-
-
-def _re_find_one_in_many(haystack, needles):
-    """Find the first instance of any of 'needles' in haystack"""
-    if not isinstance(needles, tuple):
-        needles = tuple(needles)
-
-    try:
-        expr = _re_cache[needles]
-    except:
-        expr = re.compile("|".join([re.escape(n) for n in needles]))
-        _re_cache[needles] = expr
-
-    result = expr.search(haystack)
-    if result:
-        return result.group(0)
-    else:
-        return None
-
-
-def _plain_find_one_in_many(haystack, needles):
-    for n in needles:
-        if haystack.find(n) != -1:
-            return n
-
-
-# use the plain version for now
-# in the future, we can switch to REs or a combination
-find_one_in_many = _plain_find_one_in_many
-
 
 def _get_word_after(string, after):
     s = string.find(after) + len(after)
@@ -143,6 +113,9 @@ class LogMessageParser(object):
     def __init__(self):
         self._hosts = {}
 
+        # One search for all the selectors at once
+        self._selectors_re = re.compile("|".join([re.escape(s) for s in self.selectors.keys()]))
+
     # FIXME: need to update this cache of hosts when a host is removed
     def get_host(self, fqdn):
         try:
@@ -155,14 +128,47 @@ class LogMessageParser(object):
             except ManagedHost.DoesNotExist:
                 return None
 
-    @transaction.atomic
+    def classify(self, message):
+        """
+        :param message: The text of a log message
+        :return: A 2-tuple of the message's MessageClass, and the handler for the message (or None)
+        """
+        message_class = LogMessage.get_message_class(message)
+
+        selector = self._selectors_re.search(message)
+        if selector:
+            return message_class, self.selectors[selector.group(0)]
+        else:
+            return message_class, None
+
     def parse(self, fqdn, message):
-        hit = find_one_in_many(message["message"], self.selectors.keys())
-        if hit:
-            h = self.get_host(fqdn)
-            if h is None:
-                return
+        message_class, handler = self.classify(message["message"])
+        if handler:
+            self.run_handlers(fqdn, [(message["message"], handler)])
+
+    def run_handlers(self, fqdn, handler_calls):
+        """Run the handlers for a batch of messages from one host in a single transaction.  If
+        that fails, run them again in a transaction each, so that one bad message does not lose
+        the events for the rest of the batch.
 
-            fn = self.selectors[hit]
+        :param handler_calls: A list of (message text, handler) tuples, as from classify()
+        """
+        host = self.get_host(fqdn)
+        if host is None:
+            return
 
-            fn(message["message"], h)
+        try:
+            with transaction.atomic():
+                for message, handler in handler_calls:
+                    handler(message, host)
+        except Exception as e:
+            syslog_events_log.warning(
+                "Error %s handling %s messages from %s, retrying individually" % (e, len(handler_calls), fqdn)
+            )
+
+            for message, handler in handler_calls:
+                try:
+                    with transaction.atomic():
+                        handler(message, host)
+                except Exception as e:
+                    syslog_events_log.error("Error %s handling message from %s: %s" % (e, fqdn, message))
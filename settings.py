@@ -223,6 +223,13 @@ GUNICORN_PID_PATH = "/var/run/gunicorn.pid"
 
 LOG_LEVEL = logging.INFO
 
+# Longest rendering, in characters, of a message payload in a log line (see chroma_core.services.log.LogPreview)
+LOG_PREVIEW_LENGTH = 1024
+
+# Per-message debug logging on the agent communications path is emitted for one in every
+# AGENT_COMMS_LOG_SAMPLE_RATE messages from each host
+AGENT_COMMS_LOG_SAMPLE_RATE = 1
+
 EMAIL_HOST = None
 EMAIL_SUBJECT_PREFIX = "[Chroma Server]"
 EMAIL_SENDER = "noreply@%s" % socket.getfqdn()
@@ -292,6 +299,18 @@ DBLOG_HW = 1200000
 # The value at which we stop aging database log entries out to a flat
 # text file
 DBLOG_LW = 1000000
+# The number of log entries in each partition of the log table: entries are
+# aged out a partition at a time
+DBLOG_PARTITION_SIZE = 100000
+
+# How long, in seconds, the log API may remember which hosts and targets the
+# NIDs and target names in log messages refer to
+LOG_LINK_CACHE_TIMEOUT = 60
+
+# The longest, in seconds, that a client may wait for a command to change with
+# command/<id>/wait/, and how often the command is checked meanwhile
+COMMAND_WAIT_MAX_TIMEOUT = 30
+COMMAND_WAIT_POLL_INTERVAL = 0.5
 
 # In development, where to serve repos from
 DEV_REPO_PATH = os.path.join(os.path.dirname(os.path.abspath(sys.modules["settings"].__file__)), "repo")
@@ -315,6 +334,30 @@ INSTALLATION_REBOOT_TIMEOUT = 300
 # How long to wait for an agent to resume contact after being restarted
 AGENT_RESTART_TIMEOUT = 30
 
+# How often (in seconds) buffered job step log and console output is written to the database
+STEP_OUTPUT_FLUSH_INTERVAL = 0.5
+
+# Maximum number of threads each service uses to handle incoming RPCs
+RPC_MAX_WORKERS = 32
+
+# Maximum number of threads the job scheduler uses to run jobs and handle RPCs, of which
+# JOB_SCHEDULER_RPC_RESERVED_WORKERS are kept for RPCs so they never wait behind long jobs
+JOB_SCHEDULER_MAX_WORKERS = 64
+JOB_SCHEDULER_RPC_RESERVED_WORKERS = 8
+
+# Maximum number of threads the power control service uses to check power control devices and
+# query their outlets, however many devices there are (with IPMI, every server is its own device)
+POWER_CONTROL_MONITOR_MAX_WORKERS = 16
+
+# Maximum number of power control devices which are operated on at once, e.g. when
+# powering off a rack of servers
+POWER_CONTROL_MAX_PARALLEL_DEVICES = 8
+
+# Limits on the number of messages, and bytes of JSON-encoded messages, sent to an agent in response
+# to one long-polling GET (a single message bigger than the byte limit is still sent, on its own)
+AGENT_TX_MAX_MESSAGES = 100
+AGENT_TX_MAX_BYTES = 1024 * 1024
+
 SSH_CONFIG = None
 
 TASTYPIE_DEFAULT_FORMATS = ["json"]
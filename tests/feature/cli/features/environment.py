@@ -160,6 +160,12 @@ def before_feature(context, feature):
 
     ApiHandle.ApiClient = TestApiClient
 
+    # Every feature gets a fresh test server, so don't let the CLI reuse a cached schema
+    from chroma_cli.defaults import defaults
+
+    context.old_schema_cache = defaults["schema_cache"]
+    defaults["schema_cache"] = ""
+
     from chroma_api.authentication import CsrfAuthentication
 
     context.old_is_authenticated = CsrfAuthentication.is_authenticated
@@ -210,6 +216,10 @@ def after_feature(context, feature):
 
     ApiHandle.ApiClient = context.old_api_client
 
+    from chroma_cli.defaults import defaults
+
+    defaults["schema_cache"] = context.old_schema_cache
+
     from chroma_api.authentication import CsrfAuthentication
 
     CsrfAuthentication.is_authenticated = context.old_is_authenticated
@@ -1,8 +1,13 @@
+from chroma_cli.api import ApiHandle, CommandMonitor
+from chroma_core.lib.job import Step
 from chroma_core.models import Command
+from chroma_core.models import DetectTargetsJob
 from chroma_core.models.host import ManagedHost
+from chroma_core.services.job_scheduler.job_scheduler import JobProgress
 from chroma_core.services.job_scheduler.job_scheduler_client import JobSchedulerClient
 import mock
 from tests.unit.chroma_api.chroma_api_test_case import ChromaApiTestCase
+from tests.unit.chroma_core.helpers.test_api_client import TestApiClient
 
 
 class TestCommandResource(ChromaApiTestCase):
@@ -36,3 +41,78 @@ class TestCommandResource(ChromaApiTestCase):
             JobSchedulerClient.command_run_jobs.assert_called_once_with(
                 [{"class_name": "UpdateNidsJob", "args": {"host_ids": host_ids}}], "Test command"
             )
+
+    def test_logs(self):
+        """The command's logs include the log output of its steps"""
+        command = Command.objects.create(message="Test command")
+        job = DetectTargetsJob.objects.create()
+        command.jobs.add(job)
+
+        job_progress = JobProgress(mock.Mock())
+        job_progress._handle(
+            ("start_step", (job.id,), {"step_klass": Step, "args": {}, "step_index": 0, "step_count": 1})
+        )
+        job_progress._handle(("log", (job.id, "Step 0\n"), {}))
+        job_progress._handle(("step_success", (job.id, None), {}))
+
+        response = self.api_client.get("/api/command/%s/" % command.id)
+        self.assertHttpOK(response)
+        self.assertEqual(self.deserialize(response)["logs"], "Step 0\n")
+
+    def test_wait_bad_timeout(self):
+        command = Command.objects.create(message="Test command")
+
+        response = self.api_client.get("/api/command/%s/wait/" % command.id, data={"timeout": -1})
+        self.assertHttpBadRequest(response)
+
+    def test_monitor_requests(self):
+        """Following a command takes the same number of requests however many jobs it has"""
+        command = Command.objects.create(message="Test command")
+        jobs = [DetectTargetsJob.objects.create(state="complete") for _ in range(1000)]
+        command.jobs.add(*jobs)
+        for job in jobs[:10]:
+            job.state = "tasked"
+            job.save()
+
+        old_api_client = ApiHandle.ApiClient
+        ApiHandle.ApiClient = TestApiClient
+        self.addCleanup(setattr, ApiHandle, "ApiClient", old_api_client)
+
+        api = ApiHandle(authentication={"username": self.username, "password": self.password})
+        api.endpoints["command"].schema
+        get = mock.Mock(wraps=api.api_client.get)
+        api.api_client.get = get
+
+        monitor = CommandMonitor(api, {"id": command.id, "complete": False, "cancelled": False, "errored": False})
+        self.assertEqual(monitor.incomplete_jobs, [job.id for job in jobs[:10]])
+        self.assertEqual(monitor.status, "Tasked")
+        self.assertEqual(get.call_count, 1)
+
+        for job in jobs[:10]:
+            job.state = "complete"
+            job.save()
+        command.complete = True
+        command.save()
+
+        self.assertEqual(monitor.wait_complete()["complete"], True)
+        self.assertEqual(monitor.incomplete_jobs, [])
+        self.assertEqual(get.call_count, 2)
+
+    def test_monitor_cancelled_due_to_error(self):
+        """A command which is cancelled and errored is complete, and is not followed any further"""
+        command = Command.objects.create(message="Test command", complete=True, cancelled=True, errored=True)
+
+        old_api_client = ApiHandle.ApiClient
+        ApiHandle.ApiClient = TestApiClient
+        self.addCleanup(setattr, ApiHandle, "ApiClient", old_api_client)
+
+        api = ApiHandle(authentication={"username": self.username, "password": self.password})
+        api.endpoints["command"].schema
+        get = mock.Mock(wraps=api.api_client.get)
+        api.api_client.get = get
+
+        monitor = CommandMonitor(api, {"id": command.id, "complete": False, "cancelled": False, "errored": False})
+        self.assertEqual(monitor.wait_complete()["errored"], True)
+        self.assertTrue(monitor.completed)
+        self.assertEqual(monitor.status, "Canceled due to error")
+        self.assertEqual(get.call_count, 1)
@@ -1,9 +1,10 @@
 import mock
 
 from chroma_core.lib.cache import ObjectCache
-from chroma_core.models import Command
+from chroma_core.lib.conf_param import get_conf_params
+from chroma_core.models import Command, OstConfParam, MdtConfParam
 from chroma_core.models.filesystem import ManagedFilesystem
-from chroma_core.models.target import ManagedOst
+from chroma_core.models.target import ManagedOst, ManagedTarget
 from chroma_core.services.job_scheduler.job_scheduler_client import JobSchedulerClient
 from tests.unit.chroma_api.chroma_api_test_case import ChromaApiTestCase
 from tests.unit.chroma_core.helpers import (
@@ -258,3 +259,29 @@ class TestFilesystemConfParamValidation(ChromaApiTestCase):
         self.assertEqual(
             self.deserialize(response)["conf_params"]["sys.at_history"], ["May not contain leading or trailing spaces"]
         )
+
+
+class TestTargetConfParams(ChromaApiTestCase):
+    def setUp(self):
+        super(TestTargetConfParams, self).setUp()
+        self.host = synthetic_host("myserver")
+        self.create_simple_filesystem(self.host)
+
+    def test_list_matches_detail(self):
+        """Check that the conf params loaded for a page of targets are the latest ones, as get_conf_params"""
+        for version, value in enumerate(["20", "30"]):
+            OstConfParam.objects.create(ost=self.ost, key="osc.max_pages_per_rpc", value=value, version=version)
+        MdtConfParam.objects.create(mdt=self.mdt, key="lov.qos_prio_free", value="50", version=0)
+
+        targets = self.deserialize(self.api_client.get("/api/target/", data={"limit": 0}))["objects"]
+        self.assertEqual(len(targets), 3)
+        for target in targets:
+            if target["kind"] == "MGT":
+                self.assertEqual(target["conf_params"], None)
+            else:
+                self.assertEqual(target["conf_params"], get_conf_params(ManagedTarget.objects.get(id=target["id"])))
+
+        ost = next(target for target in targets if target["kind"] == "OST")
+        self.assertEqual(ost["conf_params"]["osc.max_pages_per_rpc"], "30")
+        mdt = next(target for target in targets if target["kind"] == "MDT")
+        self.assertEqual(mdt["conf_params"]["lov.qos_prio_free"], "50")
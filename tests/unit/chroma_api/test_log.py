@@ -50,3 +50,31 @@ class TestLogResource(ChromaApiTestCase):
             log_entries = [log_entry["message"] for log_entry in self.deserialize(client.get("/api/log/"))["objects"]]
             xs = self.messages[::-1]
             self.assertListEqual(xs, log_entries)
+
+    def test_search(self):
+        """Verifies search finds messages containing words with the same stems, best matches first"""
+
+        fake_log_message("LustreError: testfs-OST0001: client evicted, evicting more")
+        fake_log_message("Lustre: testfs-OST0001: evicting client")
+        fake_log_message("Lustre: testfs-OST0002: recovery complete")
+
+        response = self.api_client.get("/api/log/", data={"search": "evict"})
+        self.assertHttpOK(response)
+        log_entries = [log_entry["message"] for log_entry in self.deserialize(response)["objects"]]
+        self.assertListEqual(
+            log_entries,
+            [
+                "LustreError: testfs-OST0001: client evicted, evicting more",
+                "Lustre: testfs-OST0001: evicting client",
+            ],
+        )
+
+        response = self.api_client.get("/api/log/", data={"search": "testfs-OST0002"})
+        log_entries = [log_entry["message"] for log_entry in self.deserialize(response)["objects"]]
+        self.assertListEqual(log_entries, ["Lustre: testfs-OST0002: recovery complete"])
+
+        # Paginated like any other list
+        response = self.api_client.get("/api/log/", data={"search": "client", "limit": 1})
+        content = self.deserialize(response)
+        self.assertEqual(content["meta"]["total_count"], 2)
+        self.assertEqual(len(content["objects"]), 1)
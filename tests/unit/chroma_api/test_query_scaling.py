@@ -1,13 +1,18 @@
-from collections import namedtuple
+from collections import namedtuple, defaultdict
+import json
 
+import mock
 from django.db import connection
 
 from chroma_api.filesystem import FilesystemResource
 from chroma_api.host import HostResource
-from chroma_api.log import LogResource
+from chroma_api.log import LogResource, link_resolver
+from chroma_api.storage_resource import StorageResourceResource
+from chroma_api.storage_resource_class import filter_class_ids
 from chroma_api.target import TargetResource
 from chroma_api.volume import VolumeResource
 from chroma_core.lib.cache import ObjectCache
+from chroma_core.services.job_scheduler.job_scheduler_client import JobSchedulerClient
 from chroma_core.models import (
     LogMessage,
     ManagedHost,
@@ -21,9 +26,16 @@ from chroma_core.models import (
     ManagedMdt,
     ManagedOst,
     CorosyncConfiguration,
+    StorageResourceRecord,
+    StorageResourceAttributeSerialized,
+    StorageResourceAttributeReference,
+    StorageResourceStatistic,
+    SimpleHistoStoreTime,
+    SimpleHistoStoreBin,
 )
 from tests.unit.chroma_api.chroma_api_test_case import ChromaApiTestCase
 from tests.unit.chroma_core.helpers import fake_log_message, synthetic_volume
+from tests.unit.chroma_core.lib.storage_plugin.helper import load_plugins
 
 
 Order1 = namedtuple("Order1", ["query_count"])
@@ -37,11 +49,16 @@ OrderBad = namedtuple("OrderBad", [])
 # then think about whether you meant to do that, and grudgingly
 # update this number upwards if necessary, or go back and
 # revise the API change.
-QUERIES_PER_TARGET = 6  # queries per target accessing that resource directly
-QUERIES_PER_FILESYSTEM_TARGET = 4  # queries per target when included in a filesystem resource
+QUERIES_PER_TARGET = 1  # queries per target accessing that resource directly (downcasts by the faked job scheduler)
+QUERIES_DEHYDRATING_TARGETS = 10  # total queries to load mounts, volumes, filesystems and conf params for a page
+QUERIES_DEHYDRATING_HOSTS = 4  # total queries to load NIDs and filesystem membership for a page of hosts
+QUERIES_LOADING_OBJECT_CACHE = 11  # total queries to populate ObjectCache, which provides hosts' client mounts
+QUERIES_PER_FILESYSTEM_TARGET = 2  # queries per target when included in a filesystem resource
 QUERIES_PER_VOLUME = 1  # queries per volume object when reading volumes
 QUERIES_PER_VOLUME_HOST = 1  # additional queries per-volume per-host
 QUERIES_TOTAL_UNDECORATED_LOGS = 5  # total queries to get all log messages (when they don't have any NIDs or targets)
+QUERIES_DECORATING_LOGS = 2  # additional queries to resolve all the NIDs and target names in a page of log messages
+QUERIES_DEHYDRATING_STORAGE_RESOURCES = 10  # total queries to load attributes, references, alerts and stats for a page
 PAGING_AND_AUTH_QUERIES = 5
 
 
@@ -118,11 +135,12 @@ class TestQueryScaling(ChromaApiTestCase):
     def test_logs(self):
         def create_n_logs_decorated(n):
             LogMessage.objects.all().delete()
+            link_resolver.clear()
 
             for i in range(0, n):
                 # Ensure log messages have some NID-like and target-like strings
-                # to exercise annotation
-                fake_log_message("fake %s bogus-MDT0000 192.168.0.1@tcp1" % i)
+                # to exercise annotation, which differ so that each has to be resolved
+                fake_log_message("fake %s bogus-MDT%04x 192.168.0.%s@tcp1" % (i, i, i))
 
         def create_n_logs_undecorated(n):
             LogMessage.objects.all().delete()
@@ -135,8 +153,9 @@ class TestQueryScaling(ChromaApiTestCase):
         decorated_scaling = self._measure_scaling(create_n_logs_decorated, LogResource)
         undecorated_scaling = self._measure_scaling(create_n_logs_undecorated, LogResource)
 
-        # FIXME: log decoration is O(N) because we issue a separate query for decorating each log message
-        self.assertIsInstance(decorated_scaling, OrderN)
+        # The NIDs and target names in a page are resolved together
+        self.assertIsInstance(decorated_scaling, Order1)
+        self.assertEqual(decorated_scaling.query_count, QUERIES_TOTAL_UNDECORATED_LOGS + QUERIES_DECORATING_LOGS)
 
         self.assertIsInstance(undecorated_scaling, Order1)
         self.assertEqual(undecorated_scaling.query_count, QUERIES_TOTAL_UNDECORATED_LOGS)
@@ -249,3 +268,116 @@ class TestQueryScaling(ChromaApiTestCase):
         filesystem_scaling = self._measure_scaling(self._create_filesystem_n_osts, FilesystemResource, TargetResource)
         self.assertIsInstance(filesystem_scaling, OrderN)
         self.assertEqual(filesystem_scaling.queries_per_object, QUERIES_PER_FILESYSTEM_TARGET)
+
+    def _count_list_queries(self, resource, count):
+        """The number of queries to GET all of the objects of a resource, of which there should be count"""
+        ObjectCache.clear()
+        response = self.api_client.get("/api/%s/" % resource._meta.resource_name, data={"limit": 0})
+        self.assertHttpOK(response)
+        self.assertEqual(len(self.deserialize(response)["objects"]), count)
+
+        return len(connection.queries)
+
+    def _job_scheduler_without_queries(self):
+        """
+        ChromaApiTestCase fakes the job scheduler's available_transitions and available_jobs by
+        looking up each object, which the API itself doesn't do: replace them with fakes which
+        don't, so that only the API's queries are counted.
+        """
+        return mock.patch.multiple(
+            JobSchedulerClient,
+            available_transitions=mock.Mock(return_value=defaultdict(list)),
+            available_jobs=mock.Mock(return_value=defaultdict(list)),
+        )
+
+    def test_targets(self):
+        """A page of targets is dehydrated with a fixed number of queries, however large"""
+        with self._job_scheduler_without_queries():
+            scaling = self._measure_scaling(self._create_filesystem_n_osts, TargetResource)
+            self.assertIsInstance(scaling, Order1)
+            self.assertEqual(scaling.query_count, PAGING_AND_AUTH_QUERIES + QUERIES_DEHYDRATING_TARGETS)
+
+            self._create_filesystem_n_osts(1000)
+            self.assertEqual(self._count_list_queries(TargetResource, 1000), scaling.query_count)
+
+    def test_hosts(self):
+        """A page of hosts is dehydrated with a fixed number of queries, however large"""
+        with self._job_scheduler_without_queries():
+            scaling = self._measure_scaling(self._create_n_hosts, HostResource)
+            self.assertIsInstance(scaling, Order1)
+            self.assertEqual(
+                scaling.query_count,
+                PAGING_AND_AUTH_QUERIES + QUERIES_DEHYDRATING_HOSTS + QUERIES_LOADING_OBJECT_CACHE,
+            )
+
+            self._create_n_hosts(200)
+            self.assertEqual(self._count_list_queries(HostResource, 200), scaling.query_count)
+
+    def test_storage_resources(self):
+        import chroma_core.lib.storage_plugin.manager
+
+        manager = load_plugins(["controller_plugin"])
+        self.addCleanup(
+            setattr,
+            chroma_core.lib.storage_plugin.manager,
+            "storage_plugin_manager",
+            chroma_core.lib.storage_plugin.manager.storage_plugin_manager,
+        )
+        chroma_core.lib.storage_plugin.manager.storage_plugin_manager = manager
+
+        # Re-initialize queryset to pick up loaded plugins
+        old_queryset = StorageResourceResource._meta.queryset
+        StorageResourceResource._meta.queryset = StorageResourceRecord.objects.filter(
+            resource_class__id__in=filter_class_ids()
+        )
+        self.addCleanup(setattr, StorageResourceResource._meta, "queryset", old_queryset)
+
+        controller_class, controller_class_id = manager.get_plugin_resource_class("controller_plugin", "Controller")
+        drive_class, drive_class_id = manager.get_plugin_resource_class("controller_plugin", "DiskDrive")
+
+        def create_n_resources(n):
+            """A controller and n - 1 drives, each drive with a histogram which has been sampled twice"""
+            SimpleHistoStoreBin.objects.all().delete()
+            SimpleHistoStoreTime.objects.all().delete()
+            StorageResourceStatistic.objects.all().delete()
+            StorageResourceAttributeReference.objects.all().delete()
+            StorageResourceAttributeSerialized.objects.all().delete()
+            StorageResourceRecord.objects.all().delete()
+
+            controller = StorageResourceRecord.objects.create(
+                resource_class_id=controller_class_id, storage_id_str=json.dumps(["controller"])
+            )
+            StorageResourceAttributeSerialized.objects.create(resource=controller, key="name", value=json.dumps("ctrl"))
+
+            for i in range(0, n - 1):
+                serial = "drive_%s" % i
+                drive = StorageResourceRecord.objects.create(
+                    resource_class_id=drive_class_id, storage_id_str=json.dumps([serial])
+                )
+                StorageResourceAttributeSerialized.objects.create(
+                    resource=drive, key="serial", value=json.dumps(serial)
+                )
+                StorageResourceAttributeReference.objects.create(resource=drive, key="controller", value=controller)
+
+                StorageResourceStatistic.objects.create(storage_resource=drive, sample_period=10, name="temperature")
+                io_sizes = StorageResourceStatistic.objects.create(
+                    storage_resource=drive, sample_period=10, name="io_sizes"
+                )
+                for time in [1000, 1010]:
+                    histo_store_time = SimpleHistoStoreTime.objects.create(
+                        storage_resource_statistic=io_sizes, time=time
+                    )
+                    for bin_idx in range(0, 3):
+                        SimpleHistoStoreBin.objects.create(
+                            histo_store_time=histo_store_time, bin_idx=bin_idx, value=time + bin_idx
+                        )
+
+        scaling = self._measure_scaling(create_n_resources, StorageResourceResource)
+        self.assertIsInstance(scaling, Order1)
+        self.assertEqual(scaling.query_count, PAGING_AND_AUTH_QUERIES + QUERIES_DEHYDRATING_STORAGE_RESOURCES)
+
+        # The drives were dehydrated with the latest histogram sample, and their controller
+        response = self.api_client.get("/api/storage_resource/", data={"limit": 0})
+        drives = [o for o in self.deserialize(response)["objects"] if o["class_name"] == "DiskDrive"]
+        self.assertEqual(drives[0]["stats"]["io_sizes"]["data"]["values"], [1010, 1011, 1012])
+        self.assertEqual(drives[0]["attributes"]["controller"]["markup"], "ctrl")
@@ -0,0 +1,53 @@
+import mock
+
+from chroma_cli.api import ApiHandle
+from chroma_cli.exceptions import NotFound
+from tests.unit.chroma_api.chroma_api_test_case import ChromaApiTestCase
+from tests.unit.chroma_core.helpers import synthetic_host
+from tests.unit.chroma_core.helpers.test_api_client import TestApiClient
+
+
+class TestResolve(ChromaApiTestCase):
+    def setUp(self):
+        super(TestResolve, self).setUp()
+
+        self.hosts = [synthetic_host("myserver%s" % i, nodename="node%s" % i) for i in range(200)]
+
+    def test_resolve(self):
+        response = self.api_client.post(
+            "/api/host/resolve/",
+            data={"identifiers": ["myserver0", "node1", str(self.hosts[2].id), "nonexistent"]},
+        )
+        self.assertHttpOK(response)
+
+        objects = self.deserialize(response)["objects"]
+        self.assertEqual(
+            objects["myserver0"], [{"id": self.hosts[0].id, "resource_uri": "/api/host/%s/" % self.hosts[0].id}]
+        )
+        self.assertEqual([o["id"] for o in objects["node1"]], [self.hosts[1].id])
+        self.assertEqual([o["id"] for o in objects[str(self.hosts[2].id)]], [self.hosts[2].id])
+        self.assertEqual(objects["nonexistent"], [])
+
+    def test_resolve_bad_request(self):
+        self.assertHttpBadRequest(self.api_client.post("/api/host/resolve/", data={"identifiers": "myserver0"}))
+        self.assertHttpMethodNotAllowed(self.api_client.get("/api/host/resolve/"))
+
+    def test_cli_resolve_requests(self):
+        """The CLI resolves any number of hosts with one request"""
+        old_api_client = ApiHandle.ApiClient
+        ApiHandle.ApiClient = TestApiClient
+        self.addCleanup(setattr, ApiHandle, "ApiClient", old_api_client)
+
+        api = ApiHandle(authentication={"username": self.username, "password": self.password})
+        endpoint = api.endpoints["host"]
+        endpoint.schema
+        get = mock.Mock(wraps=api.api_client.get)
+        post = mock.Mock(wraps=api.api_client.post)
+        api.api_client.get, api.api_client.post = get, post
+
+        resolved = endpoint.resolve([host.fqdn for host in self.hosts])
+        self.assertEqual([r["id"] for r in resolved], [host.id for host in self.hosts])
+        self.assertEqual((get.call_count, post.call_count), (0, 1))
+
+        with self.assertRaises(NotFound):
+            endpoint.resolve(["myserver0", "nonexistent"])
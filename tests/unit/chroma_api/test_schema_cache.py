@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+import mock
+
+from chroma_cli.api import ApiHandle
+from chroma_cli.config import Configuration
+from tests.unit.chroma_api.chroma_api_test_case import ChromaApiTestCase
+from tests.unit.chroma_core.helpers.test_api_client import TestApiClient
+
+
+class TestSchemaCacheConfiguration(TestCase):
+    def test_defaults(self):
+        """The CLI's configuration can be read with the shipped defaults, and gives the max age that main() uses"""
+        home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home)
+
+        with mock.patch.dict(os.environ, {"HOME": home}):
+            config = Configuration()
+
+        self.assertEqual(int(config.schema_cache_max_age), 300)
+        self.assertEqual(config.schema_cache, "~/.chroma_cache")
+
+
+class TestSchemaCache(ChromaApiTestCase):
+    """The CLI's cache of the API schema, and the ETag on the top level of the API which it relies on"""
+
+    def setUp(self):
+        super(TestSchemaCache, self).setUp()
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+        self.old_api_client = ApiHandle.ApiClient
+        ApiHandle.ApiClient = TestApiClient
+        self.addCleanup(setattr, ApiHandle, "ApiClient", self.old_api_client)
+
+    def _host_schema(self, max_age=300):
+        """Get the host resource schema as a new CLI invocation would, returning the requests that it made"""
+        api = ApiHandle(
+            authentication={"username": self.username, "password": self.password},
+            schema_cache_dir=self.cache_dir,
+            schema_cache_max_age=max_age,
+        )
+        get = mock.Mock(wraps=api.api_client.get)
+        api.api_client.get = get
+
+        self.assertIn("fqdn", api.endpoints["host"].schema["fields"])
+
+        return get.call_args_list
+
+    def test_etag(self):
+        response = self.api_client.get("/api/")
+        self.assertHttpOK(response)
+        etag = response["ETag"]
+
+        response = self.api_client.get("/api/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.api_client.get("/api/", HTTP_IF_NONE_MATCH='"stale"')
+        self.assertHttpOK(response)
+
+    def test_fresh(self):
+        """A fresh cache is used without asking the server"""
+        self.assertEqual(len(self._host_schema()), 2)
+        self.assertEqual(len(self._host_schema()), 0)
+
+    def test_revalidate(self):
+        """A stale cache costs one conditional request, and no resource schemas"""
+        self._host_schema()
+
+        with mock.patch("time.time", return_value=time.time() + 301):
+            requests = self._host_schema()
+        self.assertEqual(len(requests), 1)
+        self.assertIn("HTTP_IF_NONE_MATCH", requests[0][1])
+
+        # ... and then it is fresh again
+        with mock.patch("time.time", return_value=time.time() + 302):
+            self.assertEqual(len(self._host_schema()), 0)
+
+    def test_server_changed(self):
+        """A change to the server's ETag invalidates the cached resource schemas"""
+        self._host_schema()
+
+        with mock.patch("django.conf.settings.BUILD", "changed"):
+            self.assertEqual(len(self._host_schema(max_age=0)), 2)
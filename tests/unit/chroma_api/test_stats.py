@@ -2,6 +2,7 @@ import os
 import json
 import collections
 import operator
+import mock
 
 from chroma_core.lib.cache import ObjectCache
 from chroma_core.lib import metrics
@@ -215,3 +216,26 @@ class TestStats(ChromaApiTestCase):
         for (data,) in content.values():
             prefixes = set(name.split("_")[0] for name in data["data"])
             self.assertEqual(prefixes, set(["mem", "cpu"]))
+
+    def test_filesystem_capacity(self):
+        "Verify the filesystem capacity summary agrees with fetch_last, and the filesystem resource uses it."
+        store = metrics.FilesystemMetricStore(self.fs)
+        expected = {}
+        for target_class, fetch_metrics in metrics.FilesystemMetricStore.CAPACITY_METRICS:
+            expected.update(store.fetch_last(target_class, fetch_metrics)[1])
+        self.assertTrue(expected)
+        capacity = metrics.FilesystemMetricStore.fetch_capacity([self.fs])
+        self.assertEqual(capacity.keys(), [self.fs.id])
+        for name, value in expected.items():
+            self.assertAlmostEqual(capacity[self.fs.id][name], value)
+
+        # ... and read from the database when the latest points aren't cached in this process
+        with mock.patch.object(Stats[0], "cache", collections.defaultdict(collections.deque)):
+            capacity = metrics.FilesystemMetricStore.fetch_capacity([self.fs])
+        for name, value in expected.items():
+            self.assertAlmostEqual(capacity[self.fs.id][name], value)
+
+        filesystem = self.fetch("filesystem/{0:d}/".format(self.fs.id))
+        self.assertAlmostEqual(filesystem["bytes_free"], expected["kbytesfree"] * 1024)
+        self.assertAlmostEqual(filesystem["bytes_total"], expected["kbytestotal"] * 1024)
+        self.assertAlmostEqual(filesystem["files_free"], expected["filesfree"])
@@ -0,0 +1,34 @@
+from chroma_core.lib.job import Step
+from chroma_core.models import DetectTargetsJob
+from chroma_core.models import StepResult
+from chroma_core.models import StepResultChunk
+from tests.unit.chroma_api.chroma_api_test_case import ChromaApiTestCase
+
+
+class TestStepResource(ChromaApiTestCase):
+    def setUp(self):
+        super(TestStepResource, self).setUp()
+
+        self.step_result = StepResult.objects.create(
+            job=DetectTargetsJob.objects.create(), step_klass=Step, args={}, step_index=0, step_count=1
+        )
+
+        for sequence, content in enumerate(["one\n", "two\n"]):
+            StepResultChunk.objects.create(
+                step_result=self.step_result, stream="console", sequence=sequence, offset=sequence * 4, content=content
+            )
+
+    def test_console(self):
+        response = self.api_client.get("/api/step/%s/" % self.step_result.id)
+        self.assertHttpOK(response)
+        self.assertEqual(self.deserialize(response)["console"], "one\ntwo\n")
+
+    def test_output(self):
+        response = self.api_client.get("/api/step/%s/output/" % self.step_result.id, data={"offset": 4})
+        self.assertHttpOK(response)
+        self.assertEqual(
+            self.deserialize(response), {"stream": "console", "output": "two\n", "offset": 8, "state": "incomplete"}
+        )
+
+        response = self.api_client.get("/api/step/%s/output/" % self.step_result.id, data={"stream": "stdout"})
+        self.assertHttpBadRequest(response)
@@ -0,0 +1,33 @@
+from chroma_core.lib.storage_plugin.api import attributes, statistics
+from chroma_core.lib.storage_plugin.api.identifiers import GlobalId
+from chroma_core.lib.storage_plugin.api import resources
+from chroma_core.lib.storage_plugin.api.plugin import Plugin
+
+
+version = 1
+
+
+class Controller(resources.ScannableResource):
+    class Meta:
+        identifier = GlobalId("name")
+
+    name = attributes.String()
+
+    def get_label(self):
+        return self.name
+
+
+class DiskDrive(resources.Resource):
+    class Meta:
+        identifier = GlobalId("serial")
+        charts = [{"title": "Temperature", "series": ["temperature"]}]
+
+    serial = attributes.String()
+    controller = attributes.ResourceReference()
+    temperature = statistics.Gauge(units="C")
+    io_sizes = statistics.BytesHistogram(bins=[(0, 512), (513, 4096), (4097, None)])
+
+
+class TestPlugin(Plugin):
+    def initial_scan(self, controller):
+        pass
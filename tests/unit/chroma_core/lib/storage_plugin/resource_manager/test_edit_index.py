@@ -1,5 +1,6 @@
 from django.db.models.query_utils import Q
 
+from chroma_core.lib.storage_plugin.query import RecordGraph, ResourceQuery
 from chroma_core.models.storage_plugin import StorageResourceRecord
 from tests.unit.chroma_core.lib.storage_plugin.resource_manager.test_resource_manager import ResourceManagerTestCase
 
@@ -53,3 +54,46 @@ class TestEdgeIndex(ResourceManagerTestCase):
         index.populate()
         self.assertEqual(index.get_parents(controller_record.pk), [resource_record.pk])
         self.assertEqual(index.get_children(resource_record.pk), [controller_record.pk])
+
+    def test_closures(self):
+        from chroma_core.services.plugin_runner.resource_manager import EdgeIndex
+
+        couplet_record, couplet_resource = self._make_global_resource(
+            "example_plugin", "Couplet", {"address_1": "foo", "address_2": "bar"}
+        )
+        controller_resource = self._make_local_resource(
+            "example_plugin", "Controller", index=0, parents=[couplet_resource]
+        )
+        drive_resource = self._make_local_resource(
+            "example_plugin", "HardDrive", serial_number="foobar", capacity=1024, parents=[controller_resource]
+        )
+
+        self.resource_manager.session_open(
+            self.plugin, couplet_record.pk, [couplet_resource, controller_resource, drive_resource], 60
+        )
+
+        session = self.resource_manager._sessions[couplet_record.pk]
+        controller_id = session.local_id_to_global_id[controller_resource._handle]
+        drive_id = session.local_id_to_global_id[drive_resource._handle]
+        record_ids = [couplet_record.pk, controller_id, drive_id]
+
+        index = EdgeIndex()
+        index.populate()
+        for graph in [RecordGraph(index), RecordGraph()]:
+            self.assertEqual(
+                graph.ancestors(record_ids),
+                {
+                    couplet_record.pk: set(),
+                    controller_id: {couplet_record.pk},
+                    drive_id: {couplet_record.pk, controller_id},
+                },
+            )
+            self.assertEqual(
+                graph.descendants(record_ids),
+                {couplet_record.pk: {controller_id, drive_id}, controller_id: {drive_id}, drive_id: set()},
+            )
+
+        self.assertEqual(
+            set(record.pk for record in ResourceQuery().record_all_ancestors(drive_id)),
+            {couplet_record.pk, controller_id, drive_id},
+        )
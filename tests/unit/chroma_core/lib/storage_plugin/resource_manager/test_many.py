@@ -1,4 +1,5 @@
 from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from chroma_core.lib.util import dbperf
 from chroma_core.models.host import Volume, VolumeNode
 from chroma_core.models.storage_plugin import StorageResourceRecord
@@ -85,3 +86,31 @@ class TestManyObjects(ResourceManagerTestCase):
         finally:
             dbperf.enabled = False
             connection.use_debug_cursor = False
+
+    def test_session_open_queries(self):
+        """The records for a controller's drives are created in bulk, however many drives there are"""
+        query_counts = []
+        for count in [10, 100]:
+            couplet_record, couplet_resource = self._make_global_resource(
+                "example_plugin", "Couplet", {"address_1": "foo%s" % count, "address_2": "bar"}
+            )
+            drives = [
+                self._make_local_resource(
+                    "example_plugin", "HardDrive", serial_number="drive%s_%s" % (count, i), capacity=1024
+                )
+                for i in range(0, count)
+            ]
+
+            with CaptureQueriesContext(connection) as queries:
+                self.resource_manager.session_open(self.plugin, couplet_record.pk, [couplet_resource] + drives, 60)
+            query_counts.append(len(queries))
+
+            self.assertEqual(StorageResourceRecord.objects.filter(storage_id_scope=couplet_record.pk).count(), count)
+            self.assertEqual(
+                StorageResourceRecord.parents.through.objects.filter(
+                    to_storageresourcerecord=couplet_record.pk
+                ).count(),
+                0,
+            )
+
+        self.assertEqual(query_counts[0], query_counts[1])
@@ -57,7 +57,7 @@ class TestPlugin(Plugin):
     def update_scan(self, root_resource):
         self.update_scan_called = True
 
-    def _commit_resource_statistics(self):
+    def _commit_resource_statistics(self, resources):
         self._commit_resource_statistics_called = True
 
     def teardown(self):
@@ -316,3 +316,47 @@ class TestAddRemove(IMLUnitTestCase):
 
     def test_update_statistics(self):
         pass
+
+    def test_update_only_dirty(self):
+        self._create_mocked_resource_and_plugin()
+        self.plugin.do_initial_scan()
+
+        def report2(self, root_resource):
+            self.resource1, created = self.update_or_create(TestResourceExtraInfo, name="test1", extra_info="foo")
+            self.resource2, created = self.update_or_create(TestResourceExtraInfo, name="test2", extra_info="foo")
+
+        self.plugin.update_scan = types.MethodType(report2, self.plugin)
+        self.plugin.do_periodic_update()
+
+        # Nothing changed, so nothing should be committed or checked for alerts
+        self.plugin.update_scan = types.MethodType(lambda self, root_resource: None, self.plugin)
+        with mock.patch.object(self.plugin, "_check_alert_conditions") as check_alert_conditions:
+            self.plugin.do_periodic_update()
+            check_alert_conditions.assert_called_once_with(set())
+
+        # Only the modified resource should be committed and checked for alerts
+        def modify(self, root_resource):
+            self.resource2.extra_info = "bar"
+
+        self.plugin.update_scan = types.MethodType(modify, self.plugin)
+        self.resource_manager.session_update_resource.reset_mock()
+        with mock.patch.object(self.plugin, "_check_alert_conditions") as check_alert_conditions:
+            self.plugin.do_periodic_update()
+            check_alert_conditions.assert_called_once_with(set([self.plugin.resource2]))
+        self.resource_manager.session_update_resource.assert_called_once_with(
+            self.plugin._scannable_id, self.plugin.resource2._handle, {"extra_info": "bar"}
+        )
+
+        # Setting an attribute to its existing value does not dirty the resource
+        self.plugin.resource2.extra_info = "bar"
+        self.assertEqual(self.plugin._dirty_resources, set())
+
+        # Removed resources are dropped from the dirty set
+        def modify_and_remove(self, root_resource):
+            self.resource1.extra_info = "baz"
+            self.remove(self.resource1)
+
+        self.plugin.update_scan = types.MethodType(modify_and_remove, self.plugin)
+        self.resource_manager.session_update_resource.reset_mock()
+        self.plugin.do_periodic_update()
+        self.assertFalse(self.resource_manager.session_update_resource.called)
@@ -1,5 +1,10 @@
+from StringIO import StringIO
+
+from django.utils import timezone
+
+from tests.unit.chroma_core.helpers import fake_log_message
 from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
-from chroma_core.models import LogMessage, MessageClass
+from chroma_core.models import LogMessage, LogMessagePartitions, MessageClass
 
 
 class TestLogMessage(IMLUnitTestCase):
@@ -22,3 +27,55 @@ class TestLogMessage(IMLUnitTestCase):
                 test_message = ("[9830337.7944560] " if with_timestamp else "") + test_message
 
                 self.assertEqual(LogMessage.get_message_class(test_message), message_class, test_message)
+
+
+class TestLogMessagePartitions(IMLUnitTestCase):
+    def setUp(self):
+        super(TestLogMessagePartitions, self).setUp()
+
+        self.partitions = LogMessagePartitions(partition_size=10)
+
+    def _messages(self, count):
+        return [
+            dict(
+                datetime=timezone.now(),
+                fqdn="myserver",
+                severity=0,
+                facility=0,
+                tag="",
+                message="Lustre: message %s" % i,
+                message_class=MessageClass.LUSTRE,
+            )
+            for i in range(count)
+        ]
+
+    def test_insert(self):
+        """Messages fill one partition before starting the next, and are all visible through LogMessage"""
+        self.partitions.insert(self._messages(15))
+        self.partitions.insert(self._messages(10))
+
+        self.assertEqual([rows for name, rows in self.partitions.partitions()], [10, 10, 5])
+        self.assertEqual(LogMessage.objects.count(), 25)
+        self.assertEqual(LogMessage.objects.filter(message_class=MessageClass.LUSTRE).count(), 25)
+
+        # A fresh instance finds the same partitions
+        self.assertEqual(LogMessagePartitions(partition_size=10).partitions(), self.partitions.partitions())
+
+    def test_trim(self):
+        """Whole partitions are dropped, oldest first, and never the current one"""
+        fake_log_message("unpartitioned")
+        self.partitions.insert(self._messages(35))
+        self.assertEqual(self.partitions.row_count, 36)
+
+        self.assertEqual(self.partitions.trim(40, 20), 0)
+
+        archive = StringIO()
+        self.assertEqual(self.partitions.trim(30, 20, archive), 21)
+        self.assertEqual(len(archive.getvalue().splitlines()), 21)
+        self.assertEqual(LogMessage.objects.count(), 15)
+        self.assertEqual(self.partitions.row_count, 15)
+        self.assertFalse(LogMessage.objects.filter(message="unpartitioned").exists())
+
+        self.assertEqual(self.partitions.trim(0, 0), 10)
+        self.assertEqual(LogMessage.objects.count(), 5)
+        self.assertEqual(len(self.partitions.partitions()), 1)
@@ -0,0 +1,52 @@
+from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
+from chroma_core.lib.util import all_subclasses
+from chroma_core.models import StatefulObject, SchedulingError
+from chroma_core.models import ManagedTarget, ManagedMgs, CorosyncConfiguration, Corosync2Configuration
+from chroma_core.models import FormatTargetJob, RegisterTargetJob, ConfigureTargetJob, StartTargetJob
+
+
+class TestRouteTables(IMLUnitTestCase):
+    def test_compiled_at_import(self):
+        for klass in all_subclasses(StatefulObject):
+            if not klass._meta.abstract:
+                self.assertIsNotNone(klass.route_table, klass)
+
+    def test_subclasses_share_root_table(self):
+        self.assertIs(ManagedMgs.route_table, ManagedTarget.route_table)
+        self.assertIsNot(Corosync2Configuration.route_table, CorosyncConfiguration.route_table)
+
+    def test_route(self):
+        self.assertEqual(
+            ManagedTarget.get_route("unformatted", "mounted"),
+            ("unformatted", "formatted", "registered", "unmounted", "mounted"),
+        )
+        self.assertEqual(
+            ManagedTarget.get_route_job_classes("unformatted", "mounted"),
+            (FormatTargetJob, RegisterTargetJob, ConfigureTargetJob, StartTargetJob),
+        )
+        self.assertTrue(ManagedTarget.can_reach("unformatted", "mounted"))
+        self.assertFalse(ManagedTarget.can_reach("mounted", "unformatted"))
+
+        with self.assertRaises(SchedulingError):
+            ManagedTarget.get_route("mounted", "unformatted")
+
+        with self.assertRaises(SchedulingError):
+            ManagedTarget.get_route("mounted", "confused")
+
+    def test_routes_use_state_change_jobs(self):
+        """Every advertised state is reached by a route of StateChangeJobs for the class"""
+        for klass in all_subclasses(StatefulObject):
+            if klass._meta.abstract:
+                continue
+
+            root = StatefulObject.so_root(klass)
+            for begin_state in klass.states:
+                for end_state in klass.route_table.available_states(begin_state):
+                    route = klass.get_route(begin_state, end_state)
+                    job_classes = klass.get_route_job_classes(begin_state, end_state)
+
+                    self.assertEqual((route[0], route[-1]), (begin_state, end_state))
+                    self.assertEqual(len(job_classes), len(route) - 1)
+                    for (old_state, new_state), job_class in zip(zip(route[:-1], route[1:]), job_classes):
+                        self.assertEqual(job_class.state_transition.class_, root)
+                        self.assertEqual(job_class.state_transition.new_state, new_state)
@@ -0,0 +1,50 @@
+from chroma_core.lib.job import Step
+from chroma_core.models import DetectTargetsJob
+from chroma_core.models import StepResult
+from chroma_core.models import StepResultChunk
+from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
+
+
+class TestStepResult(IMLUnitTestCase):
+    def setUp(self):
+        super(TestStepResult, self).setUp()
+
+        self.step_result = StepResult.objects.create(
+            job=DetectTargetsJob.objects.create(), step_klass=Step, args={}, step_index=0, step_count=1
+        )
+
+    def _add_chunks(self, stream, contents):
+        offset = len(getattr(self.step_result, stream))
+        for sequence, content in enumerate(contents):
+            StepResultChunk.objects.create(
+                step_result=self.step_result, stream=stream, sequence=sequence, offset=offset, content=content
+            )
+            offset += len(content)
+
+    def test_get_output(self):
+        """Test that chunks are reassembled in order and streams are kept separate"""
+        self._add_chunks("console", ["one\n", "two\n", "three\n"])
+        self._add_chunks("log", ["Running step\n"])
+
+        step_result = StepResult.objects.get(id=self.step_result.id)
+        self.assertEqual(step_result.get_output("console"), "one\ntwo\nthree\n")
+        self.assertEqual(step_result.get_output("log"), "Running step\n")
+
+    def test_get_output_legacy(self):
+        """Test that output stored directly on the StepResult precedes any chunks"""
+        self.step_result.console = "legacy\n"
+        self.step_result.save()
+        self._add_chunks("console", ["chunk\n"])
+
+        self.assertEqual(self.step_result.get_output("console"), "legacy\nchunk\n")
+        self.assertEqual(self.step_result.output_since("console", 3), ("acy\nchunk\n", 13))
+
+    def test_output_since(self):
+        """Test that output can be tailed from any offset, including from within a chunk"""
+        self._add_chunks("console", ["one\n", "two\n", "three\n"])
+
+        self.assertEqual(self.step_result.output_since("console"), ("one\ntwo\nthree\n", 14))
+        self.assertEqual(self.step_result.output_since("console", 4), ("two\nthree\n", 14))
+        self.assertEqual(self.step_result.output_since("console", 6), ("o\nthree\n", 14))
+        self.assertEqual(self.step_result.output_since("console", 14), ("", 14))
+        self.assertEqual(self.step_result.output_since("log"), ("", 0))
@@ -0,0 +1,73 @@
+import datetime
+
+import mock
+
+from chroma_core.models import HostContactAlert
+from chroma_core.services.http_agent.host_state import HostState, HostStateCollection
+from iml_common.lib.date_time import IMLDateTime
+from tests.unit.chroma_core.helpers import synthetic_host, load_default_profile
+from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
+
+
+class TestHostStateCollection(IMLUnitTestCase):
+    def setUp(self):
+        super(TestHostStateCollection, self).setUp()
+
+        load_default_profile()
+        self.hosts = [synthetic_host("myserver%s" % i) for i in range(3)]
+        self.collection = HostStateCollection()
+
+    def _later(self, seconds):
+        return IMLDateTime.utcnow() + datetime.timedelta(seconds=seconds)
+
+    def test_expire_only_timed_out(self):
+        """Only hosts we have stopped hearing from time out, and only once"""
+        for host in self.hosts:
+            self.collection.update(host.fqdn)
+
+        self.assertEqual(self.collection.expire(), [])
+
+        # Keep hearing from one of them
+        state = self.collection._hosts[self.hosts[0].fqdn]
+        state.last_contact = self._later(HostState.CONTACT_TIMEOUT)
+
+        expired = self.collection.expire(self._later(HostState.CONTACT_TIMEOUT + 1))
+        self.assertEqual(sorted(s.fqdn for s in expired), [h.fqdn for h in self.hosts[1:]])
+        self.assertEqual(HostContactAlert.objects.filter(active=True).count(), 2)
+
+        # The one we kept hearing from is still being watched
+        self.assertEqual(self.collection.next_deadline(), state.deadline)
+        self.assertEqual(self.collection.expire(self._later(HostState.CONTACT_TIMEOUT + 1)), [])
+
+        # Hearing from a host again lowers its alert
+        self.collection.update(self.hosts[1].fqdn)
+        self.assertEqual(HostContactAlert.objects.filter(active=True).count(), 1)
+
+    def test_expire_removed(self):
+        self.collection.update(self.hosts[0].fqdn)
+        self.collection.remove_host(self.hosts[0].fqdn)
+
+        self.assertEqual(self.collection.expire(self._later(HostState.CONTACT_TIMEOUT + 1)), [])
+        self.assertEqual(HostContactAlert.objects.filter(active=True).count(), 0)
+
+    def test_alert_state_cached(self):
+        """The alert is only notified when the host's health changes"""
+        with mock.patch.object(HostContactAlert, "notify") as notify:
+            for _ in range(3):
+                self.collection.update(self.hosts[0].fqdn)
+            self.assertEqual(notify.call_count, 0)
+
+            self.collection.expire(self._later(HostState.CONTACT_TIMEOUT + 1))
+            self.assertEqual(notify.call_count, 1)
+
+            for _ in range(3):
+                self.collection.update(self.hosts[0].fqdn)
+            self.assertEqual(notify.call_count, 2)
+
+    def test_existing_alert_lowered(self):
+        """An alert left over from before a restart is lowered when we hear from the host"""
+        HostContactAlert.notify(self.hosts[0], True)
+        collection = HostStateCollection()
+
+        collection.update(self.hosts[0].fqdn)
+        self.assertEqual(HostContactAlert.objects.filter(active=True).count(), 0)
@@ -0,0 +1,127 @@
+import json
+import threading
+
+from chroma_core.services.http_agent.queues import HostTxQueue
+from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
+
+
+class TestHostTxQueue(IMLUnitTestCase):
+    CLIENT_START_TIME = "2018-01-01T00:00:00.000000+00:00"
+
+    def setUp(self):
+        super(TestHostTxQueue, self).setUp()
+
+        self.queue = HostTxQueue("myserver")
+
+    def _data(self, seq, body=None, plugin="action_runner"):
+        return {
+            "fqdn": "myserver",
+            "type": "DATA",
+            "plugin": plugin,
+            "session_id": "session",
+            "session_seq": seq,
+            "body": body,
+        }
+
+    def _terminate(self, plugin="action_runner"):
+        return {
+            "fqdn": "myserver",
+            "type": "SESSION_TERMINATE",
+            "plugin": plugin,
+            "session_id": None,
+            "session_seq": None,
+            "body": None,
+        }
+
+    def _barrier(self, client_start_time):
+        return {"fqdn": "myserver", "type": "TX_BARRIER", "client_start_time": client_start_time}
+
+    def _get(self, timeout=0, max_messages=100, max_bytes=1024 * 1024):
+        result = self.queue.get(self.CLIENT_START_TIME, timeout, max_messages, max_bytes)
+        if result is None:
+            return None
+        return [message for message, encoded in result]
+
+    def test_timeout(self):
+        self.assertEqual(self._get(timeout=0.1), [])
+
+    def test_encoded(self):
+        message = self._data(0)
+        self.queue.put(message)
+
+        self.assertEqual(self.queue.get(self.CLIENT_START_TIME, 0, 100, 1024), [(message, json.dumps(message))])
+
+    def test_message_limit(self):
+        messages = [self._data(i) for i in range(0, 10)]
+        for message in messages:
+            self.queue.put(message)
+
+        self.assertEqual(self._get(max_messages=4), messages[0:4])
+        self.assertEqual(self._get(max_messages=4), messages[4:8])
+        self.assertEqual(self._get(max_messages=4), messages[8:10])
+
+    def test_byte_limit(self):
+        messages = [self._data(i, body="x" * 1000) for i in range(0, 10)]
+        for message in messages:
+            self.queue.put(message)
+
+        self.assertEqual(self._get(max_bytes=3500), messages[0:3])
+
+        # An oversized message is still sent, on its own
+        self.assertEqual(self._get(max_bytes=10), messages[3:4])
+
+    def test_terminate_coalesced(self):
+        for i in range(0, 5):
+            self.queue.put(self._terminate())
+            self.queue.put(self._terminate(plugin="other"))
+
+        self.assertEqual(self._get(), [self._terminate(), self._terminate(plugin="other")])
+
+    def test_terminate_not_coalesced_across_data(self):
+        messages = [self._terminate(), self._data(0), self._terminate()]
+        for message in messages:
+            self.queue.put(message)
+
+        self.assertEqual(self._get(), messages)
+
+    def test_barrier(self):
+        self.queue.put(self._barrier("2017-01-01T00:00:00.000000+00:00"))
+        self.queue.put(self._data(0))
+
+        # A GET from a different agent instance is cancelled by the barrier
+        self.assertEqual(self._get(), None)
+        self.assertEqual(self._get(), [self._data(0)])
+
+    def test_barriers_coalesced(self):
+        self.queue.put(self._barrier("2017-01-01T00:00:00.000000+00:00"))
+        self.queue.put(self._barrier(self.CLIENT_START_TIME))
+        self.queue.put(self._data(0))
+
+        self.assertEqual(self._get(), [self._data(0)])
+
+    def test_wakeup(self):
+        """Test that a waiting GET returns as soon as a message is sent"""
+        result = []
+        get_thread = threading.Thread(target=lambda: result.append(self._get(timeout=30)))
+        get_thread.start()
+
+        self.queue.put(self._data(0))
+        get_thread.join(10)
+
+        self.assertFalse(get_thread.is_alive())
+        self.assertEqual(result, [[self._data(0)]])
+
+    def test_superseded(self):
+        """Test that a waiting GET is detached by a newer GET for the same host"""
+        result = []
+        get_thread = threading.Thread(target=lambda: result.append(self._get(timeout=30)))
+        get_thread.start()
+
+        while not self.queue._consumer:
+            get_thread.join(0.01)
+
+        self.assertEqual(self._get(), [])
+        get_thread.join(10)
+
+        self.assertFalse(get_thread.is_alive())
+        self.assertEqual(result, [None])
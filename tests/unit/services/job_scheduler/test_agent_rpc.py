@@ -0,0 +1,94 @@
+import threading
+import time
+
+import mock
+
+from chroma_core.services.job_scheduler.agent_rpc import AgentCancellation
+from chroma_core.services.job_scheduler.agent_rpc import AgentRpcMessenger
+from chroma_core.services.job_scheduler.agent_rpc import CancellationEvent
+from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
+
+
+class TestAgentRpcMessenger(IMLUnitTestCase):
+    FQDN = "myserver"
+
+    def setUp(self):
+        super(TestAgentRpcMessenger, self).setUp()
+
+        mock.patch("chroma_core.services.job_scheduler.agent_rpc.AgentRxQueue").start()
+        self.tx_queue = mock.patch("chroma_core.services.job_scheduler.agent_rpc.AgentTxQueue").start().return_value
+        self.addCleanup(mock.patch.stopall)
+
+        self.messenger = AgentRpcMessenger()
+
+    def _session_create(self, session_id="session_1"):
+        self.messenger.on_rx({"type": "SESSION_CREATE", "fqdn": self.FQDN, "session_id": session_id})
+
+    def _in_thread(self, fn, delay=0.1):
+        def run():
+            time.sleep(delay)
+            fn()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def test_await_session_signalled(self):
+        """Test that a waiter is woken as soon as a session is created, rather than polling for it"""
+        self._in_thread(self._session_create)
+
+        start = time.time()
+        self.assertTrue(self.messenger.await_session(self.FQDN, 30))
+        self.assertLess(time.time() - start, 0.9)
+
+    def test_await_session_timeout(self):
+        self.assertEqual(self.messenger.await_session(self.FQDN, 0.2), 0)
+
+    def test_await_restart(self):
+        self._session_create("session_1")
+        self._in_thread(lambda: self._session_create("session_2"))
+
+        start = time.time()
+        self.messenger.await_restart(self.FQDN, 30)
+        self.assertLess(time.time() - start, 0.9)
+        self.assertEqual(self.messenger.get_session_id(self.FQDN), "session_2")
+
+    def test_call_complete(self):
+        """Test that requests go out over the one persistent queue and complete when the response arrives"""
+        self._session_create()
+
+        def respond():
+            request = self.tx_queue.put.call_args[0][0]
+            self.messenger.on_rx(
+                {
+                    "type": "DATA",
+                    "fqdn": self.FQDN,
+                    "session_id": "session_1",
+                    "body": {
+                        "type": "ACTION_COMPLETE",
+                        "id": request["body"]["id"],
+                        "exception": None,
+                        "result": "result",
+                        "subprocesses": [],
+                    },
+                }
+            )
+
+        self._in_thread(respond)
+
+        result, rpc = self.messenger.call(self.FQDN, "action", {}, CancellationEvent())
+        self.assertEqual(result, "result")
+        self.assertEqual(self.tx_queue.put.call_count, 1)
+
+    def test_call_cancelled(self):
+        """Test that cancelling wakes a waiting call immediately and sends a cancellation"""
+        self._session_create()
+        cancel_event = CancellationEvent()
+        self._in_thread(cancel_event.set)
+
+        start = time.time()
+        with self.assertRaises(AgentCancellation):
+            self.messenger.call(self.FQDN, "action", {}, cancel_event)
+        self.assertLess(time.time() - start, 0.9)
+
+        self.assertEqual(self.tx_queue.put.call_args[0][0]["body"]["type"], "ACTION_CANCEL")
@@ -0,0 +1,45 @@
+from chroma_core.lib.cache import ObjectCache
+from chroma_core.models import LNetConfiguration, ManagedHost
+from chroma_core.services.job_scheduler.dep_cache import DepCache
+from tests.unit.services.job_scheduler.job_test_case import JobTestCaseWithHost
+
+
+class TestDepCache(JobTestCaseWithHost):
+    def setUp(self):
+        super(TestDepCache, self).setUp()
+
+        self.dep_cache = DepCache()
+        self.lnet_configuration = ObjectCache.get_by_id(LNetConfiguration, self.host.lnet_configuration.id)
+
+    def test_memoized(self):
+        deps = self.dep_cache.get(self.lnet_configuration)
+
+        self.assertIs(self.dep_cache.get(self.lnet_configuration), deps)
+        self.assertEqual((self.dep_cache.hits, self.dep_cache.misses), (1, 1))
+
+        # A different state is a different entry
+        self.dep_cache.get(self.lnet_configuration, "lnet_down")
+        self.assertEqual((self.dep_cache.hits, self.dep_cache.misses), (1, 2))
+
+    def test_dependents_memoized(self):
+        host = ObjectCache.get_by_id(ManagedHost, self.host.id)
+        dependents = self.dep_cache.get_dependents(host)
+
+        self.assertEqual(dependents, host.get_dependent_objects())
+        self.assertIs(self.dep_cache.get_dependents(host), dependents)
+        self.assertEqual((self.dep_cache.hits, self.dep_cache.misses), (1, 1))
+
+    def test_object_cache_update_invalidates(self):
+        deps = self.dep_cache.get(self.lnet_configuration)
+
+        fresh_lnet_configuration = ObjectCache.update(self.lnet_configuration)
+
+        self.assertIsNot(self.dep_cache.get(fresh_lnet_configuration), deps)
+        self.assertEqual((self.dep_cache.hits, self.dep_cache.misses), (0, 2))
+
+    def test_invalidate(self):
+        self.dep_cache.get(self.lnet_configuration)
+        self.dep_cache.invalidate()
+        self.dep_cache.get(self.lnet_configuration)
+
+        self.assertEqual((self.dep_cache.hits, self.dep_cache.misses), (0, 2))
@@ -0,0 +1,59 @@
+import mock
+
+from chroma_core.lib.job import Step
+from chroma_core.models import DetectTargetsJob
+from chroma_core.models import StepResult
+from chroma_core.models import StepResultChunk
+from chroma_core.services.job_scheduler.job_scheduler import JobProgress
+from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
+
+
+class TestJobProgress(IMLUnitTestCase):
+    def setUp(self):
+        super(TestJobProgress, self).setUp()
+
+        self.job = DetectTargetsJob.objects.create()
+        self.job_progress = JobProgress(mock.Mock())
+
+    def _start_step(self, step_index):
+        self.job_progress._handle(
+            ("start_step", (self.job.id,), {"step_klass": Step, "args": {}, "step_index": step_index, "step_count": 2})
+        )
+
+        return StepResult.objects.filter(job=self.job).latest("id")
+
+    def test_output_batched(self):
+        """Test that output is buffered and written as a single chunk per stream"""
+        step_result = self._start_step(0)
+
+        for line in range(0, 100):
+            self.job_progress._handle(("console", (self.job.id, "line %s\n" % line), {}))
+        self.job_progress._handle(("log", (self.job.id, "Step 0\n"), {}))
+
+        self.assertEqual(StepResultChunk.objects.count(), 0)
+
+        self.job_progress._handle(("step_success", (self.job.id, None), {}))
+
+        self.assertEqual(StepResultChunk.objects.filter(stream="console").count(), 1)
+        self.assertEqual(StepResultChunk.objects.filter(stream="log").count(), 1)
+        self.assertEqual(step_result.get_output("console"), "".join("line %s\n" % line for line in range(0, 100)))
+        self.assertEqual(step_result.get_output("log"), "Step 0\n")
+
+    def test_output_appended(self):
+        """Test that successive flushes append to the stream, and a new step starts a new stream"""
+        step_result = self._start_step(0)
+
+        self.job_progress._handle(("console", (self.job.id, "first\n"), {}))
+        self.job_progress._flush_output()
+        self.job_progress._handle(("console", (self.job.id, "second\n"), {}))
+        self.job_progress._handle(("step_success", (self.job.id, None), {}))
+
+        self.assertEqual(step_result.output_since("console"), ("first\nsecond\n", 13))
+        self.assertEqual(step_result.output_since("console", 6), ("second\n", 13))
+
+        next_step_result = self._start_step(1)
+        self.job_progress._handle(("console", (self.job.id, "third\n"), {}))
+        self.job_progress._handle(("step_failure", (self.job.id, "backtrace"), {}))
+
+        self.assertEqual(next_step_result.output_since("console"), ("third\n", 6))
+        self.assertEqual(step_result.get_output("console"), "first\nsecond\n")
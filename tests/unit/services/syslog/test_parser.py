@@ -0,0 +1,63 @@
+import mock
+
+from chroma_core.models import MessageClass
+from chroma_core.models.event import ClientConnectEvent
+from chroma_core.services.syslog.parser import LogMessageParser, client_connection_handler, client_eviction_handler
+from tests.unit.chroma_core.helpers import synthetic_host
+from tests.unit.chroma_core.helpers import load_default_profile
+from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
+from tests.unit.services.syslog.test_handlers import examples
+
+
+class TestLogMessageParser(IMLUnitTestCase):
+    def setUp(self):
+        super(TestLogMessageParser, self).setUp()
+        load_default_profile()
+        self.host = synthetic_host("myaddress")
+        self.parser = LogMessageParser()
+
+    def test_classify(self):
+        for handler, handler_examples in examples.items():
+            for example in handler_examples:
+                self.assertEqual(self.parser.classify(example["message"])[1], handler)
+
+        self.assertEqual(
+            self.parser.classify(examples[client_connection_handler][0]["message"]),
+            (MessageClass.LUSTRE, client_connection_handler),
+        )
+        self.assertEqual(
+            self.parser.classify(examples[client_eviction_handler][0]["message"]),
+            (MessageClass.LUSTRE_ERROR, client_eviction_handler),
+        )
+        self.assertEqual(self.parser.classify("Lustre: nothing to handle"), (MessageClass.LUSTRE, None))
+        self.assertEqual(self.parser.classify("Nothing to see here"), (MessageClass.NORMAL, None))
+
+    def test_run_handlers(self):
+        handler_calls = [
+            (example["message"], client_connection_handler) for example in examples[client_connection_handler]
+        ]
+
+        self.parser.run_handlers(self.host.fqdn, handler_calls)
+
+        self.assertEqual(
+            [e.lustre_pid for e in ClientConnectEvent.objects.order_by("id")],
+            [example["lustre_pid"] for example in examples[client_connection_handler]],
+        )
+
+    def test_run_handlers_error(self):
+        """Test that a handler failing does not lose the events from the rest of the batch"""
+        broken_handler = mock.Mock(side_effect=RuntimeError("broken"))
+        handler_calls = [
+            (example["message"], client_connection_handler) for example in examples[client_connection_handler]
+        ]
+        handler_calls.insert(1, ("broken message", broken_handler))
+
+        self.parser.run_handlers(self.host.fqdn, handler_calls)
+
+        self.assertEqual(ClientConnectEvent.objects.count(), len(examples[client_connection_handler]))
+
+    def test_unknown_host(self):
+        handler = mock.Mock()
+        self.parser.run_handlers("unknown.mycompany.com", [("message", handler)])
+
+        self.assertFalse(handler.called)
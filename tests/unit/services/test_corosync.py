@@ -345,3 +345,55 @@ class CorosyncTests(CorosyncTestCase):
 
         alerts_raised = StonithNotEnabledAlert.objects.count()
         self.assertEqual(alerts_raised, 1)
+
+    def _peer_notifications(self):
+        return [
+            (args[0].id, args[2]["ha_cluster_peers"])
+            for args, kwargs in job_scheduler_notify.notify.call_args_list
+            if "ha_cluster_peers" in args[2]
+        ]
+
+    def test_cluster_reports_merged(self):
+        """Every member reports on the whole cluster: only changes reach the database"""
+
+        node1 = self.make_managed_host("node1")
+        node2 = self.make_managed_host("node2")
+        nodes = ((node1, ONLINE), (node2, OFFLINE))
+
+        with mock.patch.object(HostOfflineAlert, "notify") as offline_notify:
+            for second in range(4):
+                msg_date = "2013-01-11T19:04:0%s+00:00" % second
+                for node in [node1, node2]:
+                    self.corosync_service.on_data(node.fqdn, self.get_test_message(msg_date, nodes))
+
+            offline_notify.assert_called_once_with(node2, True)
+
+        self.assertEqual(sorted(self._peer_notifications()), [(node1.id, [node2.id]), (node2.id, [node1.id])])
+
+    def test_cluster_membership_change(self):
+        """A node joining the cluster updates every member's peers, and late reports are still dropped"""
+
+        node1 = self.make_managed_host("node1")
+        node2 = self.make_managed_host("node2")
+        node3 = self.make_managed_host("node3")
+
+        msg_date = "2013-01-11T19:04:07+00:00"
+        nodes = ((node1, ONLINE), (node2, OFFLINE))
+        self.corosync_service.on_data(node1.fqdn, self.get_test_message(msg_date, nodes))
+        job_scheduler_notify.notify.reset_mock()
+
+        msg_date = "2013-01-11T19:04:08+00:00"
+        nodes = ((node1, ONLINE), (node2, OFFLINE), (node3, ONLINE))
+        self.corosync_service.on_data(node1.fqdn, self.get_test_message(msg_date, nodes))
+
+        self.assertEqual(
+            sorted(self._peer_notifications()),
+            [(node1.id, [node2.id, node3.id]), (node2.id, [node1.id, node3.id]), (node3.id, [node1.id, node2.id])],
+        )
+
+        # A report from before node3 joined says nothing new
+        msg_date = "2013-01-11T19:04:07+00:00"
+        nodes = ((node1, ONLINE), (node2, ONLINE))
+        self.corosync_service.on_data(node2.fqdn, self.get_test_message(msg_date, nodes))
+
+        self.assertTrue(HostOfflineAlert.objects.get().active)
@@ -0,0 +1,83 @@
+import threading
+
+from chroma_core.services.executor import Executor
+from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
+
+
+class TestExecutor(IMLUnitTestCase):
+    def setUp(self):
+        super(TestExecutor, self).setUp()
+
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.order = []
+        self.started = threading.Semaphore(0)
+
+    def _blocking(self, name):
+        self.started.release()
+        self.release.wait()
+        with self.lock:
+            self.order.append(name)
+
+    def _record(self, name):
+        with self.lock:
+            self.order.append(name)
+
+    def test_bounded(self):
+        """Test that no more than max_workers threads are started however much work is queued"""
+        executor = Executor("test", 4)
+        self.addCleanup(executor.shutdown)
+
+        for i in range(0, 100):
+            executor.submit(Executor.LOW_PRIORITY, self._blocking, i)
+
+        for i in range(0, 4):
+            self.started.acquire()
+
+        self.assertEqual(executor.stats()["workers"], 4)
+        self.assertEqual(executor.queue_depth, 96)
+
+        self.release.set()
+        executor.shutdown()
+        self.assertEqual(sorted(self.order), range(0, 100))
+        self.assertEqual(executor.queue_depth, 0)
+
+    def test_priority(self):
+        """Test that queued high priority work is run before queued low priority work"""
+        executor = Executor("test", 1)
+
+        executor.submit(Executor.LOW_PRIORITY, self._blocking, "first")
+        self.started.acquire()
+        executor.submit(Executor.LOW_PRIORITY, self._record, "low")
+        executor.submit(Executor.HIGH_PRIORITY, self._record, "high")
+
+        self.release.set()
+        executor.shutdown()
+        self.assertEqual(self.order, ["first", "high", "low"])
+
+    def test_reserved(self):
+        """Test that high priority work is run while low priority work occupies all unreserved workers"""
+        executor = Executor("test", 3, reserved_workers=1)
+        self.addCleanup(executor.shutdown)
+        self.addCleanup(self.release.set)
+
+        for i in range(0, 10):
+            executor.submit(Executor.LOW_PRIORITY, self._blocking, i)
+
+        for i in range(0, 2):
+            self.started.acquire()
+
+        high_complete = threading.Event()
+        executor.submit(Executor.HIGH_PRIORITY, high_complete.set)
+
+        self.assertTrue(high_complete.wait(10))
+        self.assertEqual(executor.stats()["workers"], 3)
+        self.assertEqual(executor.stats()["running_low_priority"], 2)
+        self.assertEqual(executor.stats()["queued_low_priority"], 8)
+
+    def test_shutdown(self):
+        executor = Executor("test", 2)
+        executor.shutdown()
+
+        with self.assertRaises(RuntimeError):
+            executor.submit(Executor.HIGH_PRIORITY, self._record, "late")
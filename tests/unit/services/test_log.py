@@ -0,0 +1,79 @@
+import logging
+
+from chroma_core.services.log import LogPreview, SampledLog
+from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class Unprintable(object):
+    def __repr__(self):
+        raise AssertionError("Should not have been formatted")
+
+
+class TestLogPreview(IMLUnitTestCase):
+    def test_truncated(self):
+        body = {"devices": dict(("device%s" % i, {"size": i}) for i in range(0, 10000))}
+
+        preview = str(LogPreview(body, max_length=100))
+
+        self.assertTrue(preview.startswith("{'devices': {'device"))
+        self.assertTrue(preview.endswith("...(truncated)"))
+        self.assertEqual(len(preview), 100 + len("...(truncated)"))
+
+    def test_short(self):
+        self.assertEqual(str(LogPreview({"a": 1}, max_length=100)), "{'a': 1}")
+        self.assertEqual(str(LogPreview("a string", max_length=100)), "a string")
+
+
+class TestSampledLog(IMLUnitTestCase):
+    def setUp(self):
+        super(TestSampledLog, self).setUp()
+
+        self.logger = logging.getLogger("test_sampled_log")
+        self.logger.propagate = False
+        self.handler = RecordingHandler()
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def test_disabled(self):
+        """Test that arguments are not formatted when the level is disabled"""
+        self.logger.setLevel(logging.INFO)
+
+        SampledLog(self.logger).debug("host1", "message %s", Unprintable())
+
+        self.assertEqual(self.handler.messages, [])
+
+    def test_sampled(self):
+        self.logger.setLevel(logging.DEBUG)
+        sampled_log = SampledLog(self.logger, 3)
+
+        for i in range(0, 5):
+            sampled_log.debug("host1", "host1 message %s", i)
+            sampled_log.debug("host2", "host2 message %s", i)
+
+        self.assertEqual(
+            self.handler.messages,
+            [
+                "host1 message 0 [1 in 3 sampled]",
+                "host2 message 0 [1 in 3 sampled]",
+                "host1 message 3 [1 in 3 sampled]",
+                "host2 message 3 [1 in 3 sampled]",
+            ],
+        )
+
+    def test_unsampled(self):
+        self.logger.setLevel(logging.DEBUG)
+        sampled_log = SampledLog(self.logger)
+
+        for i in range(0, 3):
+            sampled_log.debug("host1", "message %s", i)
+
+        self.assertEqual(self.handler.messages, ["message 0", "message 1", "message 2"])
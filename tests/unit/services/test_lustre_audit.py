@@ -0,0 +1,79 @@
+import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
+from tests.unit.chroma_core.helpers import load_default_profile, synthetic_host
+from chroma_core.models import ServerProfilePackage
+from chroma_core.services.lustre_audit.package_index import PackageUpdateIndex
+from chroma_core.services.lustre_audit.update_scan import UpdateScan
+
+
+def package_report(installed, available):
+    return {
+        "lustre": {
+            "lustre": {
+                "installed": [["0", v, "1", "x86_64"] for v in installed],
+                "available": [["0", v, "1", "x86_64"] for v in available],
+            }
+        }
+    }
+
+
+class TestPackageUpdateIndex(IMLUnitTestCase):
+    def setUp(self):
+        super(TestPackageUpdateIndex, self).setUp()
+
+        load_default_profile()
+        ServerProfilePackage.objects.create(bundle_id="lustre", server_profile_id="test_profile", package_name="lustre")
+        self.hosts = [synthetic_host("host%s" % i) for i in range(0, 3)]
+
+        self.notify = mock.patch("chroma_core.services.job_scheduler.job_scheduler_notify.notify").start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_needs_update(self):
+        index = PackageUpdateIndex()
+        host = self.hosts[0]
+
+        self.assertFalse(index.needs_update(host, package_report(["2.10"], ["2.10"])))
+        self.assertTrue(index.needs_update(host, package_report(["2.10"], ["2.10", "2.12"])))
+        self.assertTrue(index.needs_update(host, package_report([], ["2.12"])))
+        self.assertFalse(index.needs_update(host, package_report(["2.12"], ["2.10"])))
+
+        # Packages which aren't in the profile don't matter
+        self.assertFalse(index.needs_update(host, {"lustre": {"other": {"installed": [], "available": []}}}))
+
+    def test_shared_reports(self):
+        """Once the first host's report has been evaluated, the same report from other hosts needs no queries"""
+        index = PackageUpdateIndex()
+        report = package_report(["2.10"], ["2.10", "2.12"])
+
+        self.assertTrue(index.needs_update(self.hosts[0], report))
+        with CaptureQueriesContext(connection) as queries:
+            for host in self.hosts[1:]:
+                self.assertTrue(index.needs_update(host, report))
+        self.assertEqual(len(queries), 0)
+
+    def test_notify_on_change(self):
+        """needs_update is only notified when it differs from the host's"""
+        index = PackageUpdateIndex()
+        host = self.hosts[0]
+
+        def scan(report):
+            scan = UpdateScan(index)
+            scan.host = host
+            scan.started_at = None
+            scan.update_packages(report)
+
+        host.needs_update = False
+        scan(package_report(["2.10"], ["2.10"]))
+        self.assertFalse(self.notify.called)
+
+        scan(package_report(["2.10"], ["2.12"]))
+        self.notify.assert_called_once_with(host, None, {"needs_update": True})
+
+        host.needs_update = True
+        self.notify.reset_mock()
+        scan(package_report(["2.10"], ["2.12"]))
+        self.assertFalse(self.notify.called)
@@ -1,10 +1,13 @@
 import threading
+import time
 
 import mock
+import settings
 
 from tests.unit.lib.iml_unit_test_case import IMLUnitTestCase
 from chroma_core.models.power_control import PowerControlType, PowerControlDevice, PowerControlDeviceOutlet
 from chroma_core.services.power_control.manager import PowerControlManager
+from chroma_core.services.power_control import monitor_daemon
 from chroma_core.services.power_control.monitor_daemon import PowerMonitorDaemon, PowerDeviceMonitor
 from tests.integration.core.constants import TEST_TIMEOUT
 
@@ -18,15 +21,15 @@ class PowerControlTestCase(IMLUnitTestCase):
         self.threads_at_start = set(threading.enumerate())
 
         self.power_manager = PowerControlManager()
-        monitor_daemon = PowerMonitorDaemon(self.power_manager)
+        self.monitor_daemon = daemon = PowerMonitorDaemon(self.power_manager)
 
         class MonitorDaemonThread(threading.Thread):
             def run(self):
-                monitor_daemon.run()
+                daemon.run()
 
             def stop(self):
-                monitor_daemon.stop()
-                monitor_daemon.join()
+                daemon.stop()
+                daemon.join()
 
         self.md_thread = MonitorDaemonThread()
         self.md_thread.start()
@@ -79,33 +82,40 @@ class PowerMonitoringTests(PowerControlTestCase):
         self.md_thread.stop()
         self.wait_for_assert(lambda: self.assertNotIn("MonitorDaemonThread", self.thread_class_names))
 
-    def test_pdu_add_remove_spawns_reaps_monitors(self, mocked):
-        self.assertNotIn("PowerDeviceMonitor", self.thread_class_names)
-
+    def test_pdu_add_remove_adds_reaps_monitors(self, mocked):
         pdu = PowerControlDevice.objects.create(device_type=self.fence_type, address="localhost")
         # This normally happens via a post_save signal
         self.power_manager.register_device(pdu.id)
-        self.wait_for_assert(lambda: self.assertIn("PowerDeviceMonitor", self.thread_class_names))
+        self.wait_for_assert(lambda: self.assertIn(pdu.sockaddr, self.monitor_daemon.device_monitors))
 
         pdu.mark_deleted()
         # This normally happens via a post_delete signal
         self.power_manager.unregister_device(pdu.sockaddr)
-        self.wait_for_assert(lambda: self.assertNotIn("PowerDeviceMonitor", self.thread_class_names))
+        self.wait_for_assert(lambda: self.assertNotIn(pdu.sockaddr, self.monitor_daemon.device_monitors))
 
-    def test_pdu_update_respawns_monitors(self, mocked):
+    def test_pdu_update_replaces_monitors(self, mocked):
         pdu = PowerControlDevice.objects.create(device_type=self.fence_type, address="localhost")
         # This normally happens via a post_save signal
         self.power_manager.register_device(pdu.id)
-        self.wait_for_assert(lambda: self.assertIn("PowerDeviceMonitor", self.thread_class_names))
+        self.wait_for_assert(lambda: self.assertIn(pdu.sockaddr, self.monitor_daemon.device_monitors))
 
-        start_threads = threading.enumerate()
         pdu.address = "1.2.3.4"
         pdu.username = "bob"
         pdu.save()
         # This normally happens via a post_save signal
         self.power_manager.reregister_device(pdu.id)
 
-        self.wait_for_assert(lambda: self.assertNotEqual(start_threads, threading.enumerate()))
+        self.wait_for_assert(lambda: self.assertEqual(self.monitor_daemon.device_monitors.keys(), [pdu.sockaddr]))
+
+    def test_no_thread_per_device(self, mocked):
+        for address in ["10.0.0.%s" % i for i in range(1, 21)]:
+            pdu = PowerControlDevice.objects.create(device_type=self.fence_type, address=address)
+            self.power_manager.register_device(pdu.id)
+
+        self.wait_for_assert(lambda: self.assertEqual(len(self.monitor_daemon.device_monitors), 20))
+        self.assertLessEqual(
+            len(set(threading.enumerate()) - self.threads_at_start), 1 + settings.POWER_CONTROL_MONITOR_MAX_WORKERS
+        )
 
 
 @mock.patch("chroma_core.services.power_control.rpc.PowerControlRpc")
@@ -167,3 +177,110 @@ class MonitorThreadCase(IMLUnitTestCase):
         # Note that the notification goes to the BMC (PowerControlDeviceOutlet
         # instance), not the pseudo-PDU device
         mock_notify.assert_called_with(bmc, False)
+
+    @mock.patch("chroma_core.models.power_control.IpmiBmcUnavailableAlert.notify")
+    def test_daemon_notifies_changes(self, mock_notify, mock_rpc):
+        type = PowerControlType.objects.filter(max_outlets=0)[0]
+        bmcs = []
+        for i in range(10):
+            device = PowerControlDevice.objects.create(device_type=type, address="bmc%s" % i)
+            bmcs.append(PowerControlDeviceOutlet.objects.create(device=device, identifier="bmc%s" % i))
+
+        daemon = PowerMonitorDaemon(PowerControlManager())
+        # Run the checks inline rather than on the daemon's workers
+        daemon._executor = mock.Mock(submit=lambda priority, fn, *args: fn(*args))
+
+        clock = mock.Mock()
+        clock.time.return_value = time.time()
+
+        def check_all_devices(notify_queries):
+            clock.time.return_value += monitor_daemon.MONITORING_INTERVAL * 2
+            with mock.patch.object(monitor_daemon, "time", clock):
+                daemon._dispatch_checks()
+                with self.assertNumQueries(notify_queries):
+                    daemon._notify_results()
+
+            notified = sorted((args[0].id, args[1]) for args, kwargs in mock_notify.call_args_list)
+            mock_notify.reset_mock()
+            return notified
+
+        # The devices which changed are checked for deletion in one query
+        self.assertEqual(check_all_devices(1), [(bmc.id, True) for bmc in bmcs])
+
+        # Nothing changed, nothing to notify
+        self.assertEqual(check_all_devices(0), [])
+
+        self.device_checks_should_fail = True
+        self.assertEqual(check_all_devices(1), [(bmc.id, False) for bmc in bmcs])
+
+
+class StubFenceAgent(object):
+    """Stands in for PowerControlManager.shell, recording how many commands run at once"""
+
+    def __init__(self, failing_identifiers=()):
+        self.failing_identifiers = failing_identifiers
+        self.commands = []
+        self.max_running = 0
+        self.max_running_per_device = 0
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, cmdline, *args, **kwargs):
+        address = cmdline[cmdline.index("-a") + 1]
+        identifier = cmdline[cmdline.index("-n") + 1]
+
+        with self._lock:
+            self.commands.append((address, identifier))
+            self._running[address] = self._running.get(address, 0) + 1
+            self.max_running = max(self.max_running, sum(self._running.values()))
+            self.max_running_per_device = max(self.max_running_per_device, self._running[address])
+
+        time.sleep(0.1)
+
+        with self._lock:
+            self._running[address] -= 1
+
+        return (1, "", "failed") if identifier in self.failing_identifiers else (0, "", "")
+
+
+@mock.patch("chroma_core.services.power_control.rpc.PowerControlRpc")
+class OutletOperationTests(IMLUnitTestCase):
+    def setUp(self):
+        super(OutletOperationTests, self).setUp()
+
+        type = PowerControlType.objects.filter(max_outlets__gt=1)[0]
+        self.devices = [
+            PowerControlDevice.objects.create(device_type=type, address="10.0.0.%s" % i) for i in range(1, 5)
+        ]
+        self.manager = PowerControlManager()
+
+    def _outlets(self):
+        return [outlet for device in self.devices for outlet in device.outlets.order_by("identifier")[0:2]]
+
+    def test_toggle_devices_in_parallel(self, mock_rpc):
+        outlets = self._outlets()
+        agent = StubFenceAgent(failing_identifiers=[outlets[0].identifier])
+
+        with mock.patch.object(self.manager, "shell", agent):
+            self.manager.toggle_device_outlets("off", [outlet.id for outlet in outlets])
+
+        self.assertEqual(
+            sorted(agent.commands), sorted((outlet.device.address, outlet.identifier) for outlet in outlets)
+        )
+        self.assertGreater(agent.max_running, 1)
+        self.assertEqual(agent.max_running_per_device, 1)
+
+        # The first outlet on each device failed, and we don't know what state it is in
+        has_power = dict(
+            PowerControlDeviceOutlet.objects.filter(device__in=self.devices).values_list("id", "has_power")
+        )
+        self.assertEqual(
+            [has_power[outlet.id] for outlet in outlets], [None, False, None, False, None, False, None, False]
+        )
+
+    def test_toggle_missing_outlet(self, mock_rpc):
+        with mock.patch.object(self.manager, "shell", StubFenceAgent()) as agent:
+            with self.assertRaises(PowerControlDeviceOutlet.DoesNotExist):
+                self.manager.toggle_device_outlets("on", [self._outlets()[0].id, -1])
+
+        self.assertEqual(agent.commands, [])